@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import Usuario, Empresa, Medico
+from .models import Usuario, Empresa, Medico, Especialidade, AliasEspecialidade
 
 
 @admin.register(Usuario)
@@ -41,3 +41,17 @@ class MedicoAdmin(admin.ModelAdmin):
     search_fields = ['nome_completo', 'crm', 'cpf']
     readonly_fields = ['data_cadastro', 'data_atualizacao', 'cadastrado_por']
     ordering = ['nome_completo']
+
+
+class AliasEspecialidadeInline(admin.TabularInline):
+    model = AliasEspecialidade
+    extra = 0
+
+
+@admin.register(Especialidade)
+class EspecialidadeAdmin(admin.ModelAdmin):
+    list_display = ['nome', 'nome_normalizado', 'data_cadastro']
+    search_fields = ['nome', 'nome_normalizado', 'aliases__nome_normalizado']
+    readonly_fields = ['data_cadastro', 'data_atualizacao']
+    ordering = ['nome']
+    inlines = [AliasEspecialidadeInline]
@@ -0,0 +1,94 @@
+"""
+Detecção de anomalias no histórico de produção.
+
+Para cada especialidade, métrica e mês, o valor é comparado com a média e o
+desvio padrão dos `PRODUCAO_ANOMALIA_JANELA` meses importados anteriores
+(z-score móvel). Valores com |z| acima de `PRODUCAO_ANOMALIA_LIMIAR` são
+gravados em `AnomaliaProducao`, que o dashboard consulta diretamente.
+
+O histórico inteiro é carregado uma vez (`core/series.py`) e todas as
+especialidades, métricas e meses são avaliados juntos, em arrays
+(métrica × especialidade × mês).
+"""
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .cache import invalidar
+from .models import AnomaliaProducao
+from .series import matriz_producao
+
+
+# Métrica → como combinar linhas da mesma especialidade canônica no mesmo mês
+METRICAS = {
+    'perc_desperdicadas': 'media',
+    'vagas_nao_distribuidas': 'soma',
+    'vagas_extras': 'soma',
+}
+
+# Um histórico constante (ex.: 0% de desperdício em todos os meses) tem desvio
+# zero; o desvio usado no z-score nunca é menor que 1 ponto percentual / 1 vaga.
+DESVIO_MINIMO = 1.0
+
+
+def zscores_moveis(valores, janela, minimo):
+    """Z-score de cada mês em relação aos `janela` meses anteriores (último eixo).
+
+    Retorna `(media, desvio, quantidade, z)` com a forma de `valores`. Onde o
+    histórico tem menos de `minimo` valores, ou o próprio valor falta, z é NaN.
+    """
+    minimo = max(minimo, 2)
+    vazio = np.full(valores.shape[:-1] + (janela,), np.nan)
+    janelas = sliding_window_view(np.concatenate([vazio, valores], axis=-1), janela, axis=-1)
+    janelas = janelas[..., :valores.shape[-1], :]
+
+    validos = ~np.isnan(janelas)
+    quantidade = validos.sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = np.where(validos, janelas, 0).sum(axis=-1) / quantidade
+        diferencas = np.where(validos, janelas - media[..., np.newaxis], 0)
+        desvio = np.sqrt((diferencas ** 2).sum(axis=-1) / (quantidade - 1))
+        z = (valores - media) / np.maximum(desvio, DESVIO_MINIMO)
+    z[(quantidade < minimo) | np.isnan(valores)] = np.nan
+    return media, desvio, quantidade, z
+
+
+def detectar_anomalias():
+    """Calcula as anomalias de todo o histórico (instâncias não salvas)."""
+    especialidades, meses, matrizes = matriz_producao(*METRICAS, agregacao=METRICAS)
+    if not especialidades:
+        return []
+
+    metricas = list(METRICAS)
+    valores = np.stack([matrizes[m] for m in metricas])
+    media, desvio, quantidade, z = zscores_moveis(
+        valores, settings.PRODUCAO_ANOMALIA_JANELA, settings.PRODUCAO_ANOMALIA_MINIMO
+    )
+    with np.errstate(invalid='ignore'):
+        indices = zip(*np.nonzero(np.abs(z) >= settings.PRODUCAO_ANOMALIA_LIMIAR))
+
+    return [
+        AnomaliaProducao(
+            especialidade_id=especialidades[e],
+            mes_ano=meses[t],
+            metrica=metricas[k],
+            valor=float(valores[k, e, t]),
+            media=float(media[k, e, t]),
+            desvio=float(desvio[k, e, t]),
+            zscore=float(z[k, e, t]),
+            meses_historico=int(quantidade[k, e, t]),
+        )
+        for k, e, t in indices
+    ]
+
+
+def recalcular_anomalias():
+    """Substitui o conteúdo de AnomaliaProducao pelo resultado de `detectar_anomalias`."""
+    anomalias = detectar_anomalias()
+    with transaction.atomic():
+        AnomaliaProducao.objects.all().delete()
+        AnomaliaProducao.objects.bulk_create(anomalias, batch_size=1000)
+        # bulk_create não dispara post_save
+        invalidar(AnomaliaProducao)
+    return len(anomalias)
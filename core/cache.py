@@ -0,0 +1,88 @@
+"""
+Cache com chaves versionadas por entidade.
+
+Cada modelo cacheável possui uma chave de versão no cache. Toda gravação ou
+exclusão incrementa essa versão (após o commit da transação), de modo que os
+fragmentos e valores calculados a partir dela passam a usar uma chave nova e
+os antigos simplesmente deixam de ser lidos. A invalidação é exata enquanto
+todos os processos compartilham o cache; o TIMEOUT de CACHES (`CACHE_TIMEOUT`)
+só limita por quanto tempo um cache por processo (locmem) serve dados que
+outro processo já invalidou.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .roteadores import lendo_da_replica
+
+
+PREFIXO_VERSAO = 'farol:versao'
+
+
+def _chave_versao(entidade):
+    return f'{PREFIXO_VERSAO}:{entidade}'
+
+
+def _nome_entidade(entidade):
+    """Aceita o nome da entidade ou a própria classe do modelo."""
+    if isinstance(entidade, str):
+        return entidade
+    return entidade._meta.model_name
+
+
+def _versao_inicial():
+    # Usa o relógio em vez de 1 para que uma chave despejada do cache nunca
+    # volte a um número já utilizado (o que serviria fragmentos antigos).
+    return int(time.time() * 1000)
+
+
+def versao(*entidades):
+    """Retorna a versão combinada das entidades informadas, ex.: '1737..:1737..'."""
+    nomes = [_nome_entidade(e) for e in entidades]
+    chaves = [_chave_versao(n) for n in nomes]
+    valores = cache.get_many(chaves)
+    for chave in chaves:
+        if chave not in valores:
+            cache.add(chave, _versao_inicial())
+            valores[chave] = cache.get(chave)
+    return ':'.join(str(valores[chave]) for chave in chaves)
+
+
+def incrementar_versao(entidade):
+    """Invalida imediatamente tudo o que foi cacheado a partir da entidade."""
+    chave = _chave_versao(_nome_entidade(entidade))
+    try:
+        cache.incr(chave)
+    except ValueError:
+        cache.set(chave, _versao_inicial())
+
+
+def invalidar(entidade, using=None):
+    """Incrementa a versão da entidade quando a transação atual for confirmada.
+
+    Incrementar antes do commit permitiria que outra requisição lesse os dados
+    antigos e os gravasse no cache já com a versão nova.
+    """
+    nome = _nome_entidade(entidade)
+    transaction.on_commit(lambda: incrementar_versao(nome), using=using)
+
+
+def tempo_cache():
+    """Timeout para valores calculados na requisição atual.
+
+    Lidos do primário, ficam no cache até a próxima versão ou o TIMEOUT de
+    CACHES. Lidos da réplica, podem refletir um estado anterior à versão atual
+    (atraso de replicação) e por isso expiram em `DB_REPLICA_ATRASO_MAX`
+    segundos.
+    """
+    if lendo_da_replica():
+        return settings.DB_REPLICA_ATRASO_MAX
+    return cache.default_timeout
+
+
+def em_cache(nome, entidades, calcular):
+    """Retorna o valor de `calcular()` cacheado sob a versão atual das entidades."""
+    chave = f'farol:{nome}:{versao(*entidades)}'
+    return cache.get_or_set(chave, calcular, tempo_cache())
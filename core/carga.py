@@ -0,0 +1,288 @@
+"""
+Cenários do teste de carga (`manage.py teste_carga`).
+
+Cada usuário virtual é uma thread com sua própria sessão HTTP (cookies e
+token CSRF) que faz login no servidor e repete ações sorteadas conforme o
+mix, com uma pausa aleatória entre elas:
+
+- `login`: sai e entra de novo (o hash da senha é a parte cara);
+- `dashboard`: dashboard principal;
+- `listas`: uma das listas de cadastro ou de produção;
+- `producao`: dashboard ou previsão da produção;
+- `upload`: envia uma planilha de produção e confirma a importação.
+
+Os uploads usam meses a partir de `MES_UPLOAD` (um mês por usuário virtual),
+para não se misturarem com a produção real nem disputarem o mesmo mês; mesmo
+assim, gravam produção no banco do servidor. Rode contra uma instância de
+teste, populada com `gerar_dados_sinteticos`.
+
+Quem faz upload precisa de uma conta só sua: o upload descarta a importação
+pendente anterior da conta, então dois usuários virtuais na mesma conta
+excluiriam as importações um do outro entre o upload e a confirmação.
+
+As requisições não seguem redirecionamentos: cada uma é medida isoladamente e
+o destino do redirecionamento indica se a ação deu certo (um POST de login que
+volta 200 é senha errada; uma página que redireciona para o login é sessão
+perdida).
+"""
+import html
+import io
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import date
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode, urljoin, urlparse
+from urllib.request import HTTPCookieProcessor, HTTPRedirectHandler, Request, build_opener
+
+from django.urls import reverse
+
+from . import sinteticos
+
+
+MES_UPLOAD = date(2090, 1, 1)
+LINHAS_UPLOAD = 300
+
+MIX_PADRAO = {'dashboard': 35, 'listas': 30, 'producao': 25, 'login': 5, 'upload': 5}
+# Ação do mix → método de UsuarioVirtual (`login` no mix é sair e entrar de novo)
+ACOES = {'dashboard': 'dashboard', 'listas': 'listas', 'producao': 'producao', 'login': 'relogin', 'upload': 'upload'}
+
+LISTAS = ['empresa_lista', 'medico_lista', 'producao_importacoes', 'producao_anomalias']
+PRODUCAO = ['producao_dashboard', 'producao_previsao']
+
+
+# Mensagem do framework de mensagens no corpo da página (templates/base.html)
+_MENSAGEM = re.compile(r'role="alert">\s*<i[^>]*></i>\s*(.*?)\s*<button', re.DOTALL)
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+class _SemRedirecionamento(HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class Falha(Exception):
+    """Resposta inesperada de uma ação (status, destino do redirecionamento...)."""
+
+
+class Estatisticas:
+    """Latências e erros por endpoint, compartilhados entre as threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencias = {}
+        self.erros = {}
+        self.exemplos = {}
+
+    def registrar(self, endpoint, segundos, erro=None):
+        with self._lock:
+            self.latencias.setdefault(endpoint, []).append(segundos * 1000)
+            if erro is not None:
+                self.erros[endpoint] = self.erros.get(endpoint, 0) + 1
+                self.exemplos.setdefault(endpoint, erro)
+
+    def resumo(self):
+        """Uma linha por endpoint: requisições, erros e percentis em ms."""
+        with self._lock:
+            latencias = {nome: list(valores) for nome, valores in self.latencias.items()}
+            erros = dict(self.erros)
+            exemplos = dict(self.exemplos)
+        linhas = []
+        for endpoint, valores in sorted(latencias.items()):
+            total = len(valores)
+            linhas.append({
+                'endpoint': endpoint,
+                'requisicoes': total,
+                'erros': erros.get(endpoint, 0),
+                'taxa_erro': erros.get(endpoint, 0) / total * 100,
+                'p50': percentil(valores, 0.50),
+                'p95': percentil(valores, 0.95),
+                'p99': percentil(valores, 0.99),
+                'maximo': max(valores),
+                'exemplo_erro': exemplos.get(endpoint),
+            })
+        return linhas
+
+
+class Resposta:
+    __slots__ = ('status', 'destino', 'corpo')
+
+    def __init__(self, status, destino, corpo):
+        self.status = status
+        self.destino = destino
+        self.corpo = corpo
+
+
+def _multipart(campos, arquivos):
+    """Corpo multipart/form-data; `arquivos` é {campo: (nome, bytes)}."""
+    fronteira = uuid.uuid4().hex
+    corpo = io.BytesIO()
+    for nome, valor in campos.items():
+        corpo.write(f'--{fronteira}\r\nContent-Disposition: form-data; name="{nome}"\r\n\r\n{valor}\r\n'.encode())
+    for nome, (arquivo, conteudo) in arquivos.items():
+        corpo.write(
+            f'--{fronteira}\r\nContent-Disposition: form-data; name="{nome}"; filename="{arquivo}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'.encode()
+        )
+        corpo.write(conteudo)
+        corpo.write(b'\r\n')
+    corpo.write(f'--{fronteira}--\r\n'.encode())
+    return corpo.getvalue(), f'multipart/form-data; boundary={fronteira}'
+
+
+class Sessao:
+    """Cliente HTTP de um usuário virtual: cookies próprios e sem seguir redirecionamentos."""
+
+    def __init__(self, base, estatisticas, timeout):
+        self.base = base
+        self.estatisticas = estatisticas
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self._abridor = build_opener(HTTPCookieProcessor(self.cookies), _SemRedirecionamento)
+
+    def reiniciar(self):
+        """Descarta os cookies, como um navegador novo."""
+        self.cookies.clear()
+
+    def _csrf(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def requisitar(self, endpoint, nome_url, dados=None, arquivos=None, esperado=200, destino=None):
+        """Faz a requisição, registra a latência e confere o status e o destino esperados."""
+        url = urljoin(self.base, reverse(nome_url))
+        cabecalhos = {'Referer': url}
+        corpo = None
+        if dados is not None or arquivos:
+            campos = dict(dados or {}, csrfmiddlewaretoken=self._csrf())
+            if arquivos:
+                corpo, tipo = _multipart(campos, arquivos)
+            else:
+                corpo, tipo = urlencode(campos).encode(), 'application/x-www-form-urlencoded'
+            cabecalhos['Content-Type'] = tipo
+        requisicao = Request(url, data=corpo, headers=cabecalhos)
+
+        inicio = time.perf_counter()
+        erro = None
+        try:
+            try:
+                with self._abridor.open(requisicao, timeout=self.timeout) as resposta:
+                    obtida = Resposta(resposta.status, None, resposta.read())
+            except HTTPError as e:
+                obtida = Resposta(e.code, e.headers.get('Location'), e.read())
+        except (URLError, OSError) as e:
+            self.estatisticas.registrar(endpoint, time.perf_counter() - inicio, f'{type(e).__name__}: {e}')
+            raise Falha(str(e))
+        decorrido = time.perf_counter() - inicio
+
+        if obtida.status != esperado:
+            erro = f'status {obtida.status}' + (f' → {obtida.destino}' if obtida.destino else '')
+            mensagem = _MENSAGEM.search(obtida.corpo.decode('utf-8', 'replace'))
+            if mensagem:
+                erro += f': {html.unescape(mensagem.group(1))[:200]}'
+        elif destino is not None and urlparse(obtida.destino or '').path != reverse(destino):
+            erro = f'redirecionou para {obtida.destino}'
+        self.estatisticas.registrar(endpoint, decorrido, erro)
+        if erro is not None:
+            raise Falha(erro)
+        return obtida
+
+
+class UsuarioVirtual(threading.Thread):
+    """Faz login e executa ações do mix até `fim`, pausando `pausa` segundos em média entre elas."""
+
+    def __init__(self, indice, base, credenciais, mix, pausa, fim, estatisticas, timeout, planilha, rajada):
+        super().__init__(name=f'usuario-virtual-{indice}', daemon=True)
+        self.indice = indice
+        self.sessao = Sessao(base, estatisticas, timeout)
+        self.usuario, self.senha = credenciais
+        self.acoes = list(mix)
+        self.pesos = list(mix.values())
+        self.pausa = pausa
+        self.fim = fim
+        self.planilha = planilha
+        self.rajada = rajada
+        self.rng = random.Random(indice)
+
+    def run(self):
+        logado = False
+        while time.monotonic() < self.fim:
+            try:
+                if not logado:
+                    self.login()
+                    logado = True
+                if self.rajada is not None and self.rajada.is_set():
+                    self.rajada = None
+                    self.upload()
+                else:
+                    acao = self.rng.choices(self.acoes, self.pesos)[0]
+                    getattr(self, ACOES[acao])()
+            except Falha:
+                # Sessão em estado desconhecido: recomeça do login, sem cookies
+                self.sessao.reiniciar()
+                logado = False
+            self._pausar()
+
+    def _pausar(self):
+        if self.pausa > 0:
+            time.sleep(min(self.rng.expovariate(1 / self.pausa), max(self.fim - time.monotonic(), 0)))
+
+    def login(self):
+        self.sessao.requisitar('login (página)', 'login')
+        self.sessao.requisitar(
+            'login', 'login', dados={'username': self.usuario, 'password': self.senha},
+            esperado=302, destino='dashboard',
+        )
+
+    def logout(self):
+        self.sessao.requisitar('logout', 'logout', esperado=302, destino='login')
+
+    def dashboard(self):
+        self.sessao.requisitar('dashboard', 'dashboard')
+
+    def listas(self):
+        nome = self.rng.choice(LISTAS)
+        self.sessao.requisitar(nome, nome)
+
+    def producao(self):
+        nome = self.rng.choice(PRODUCAO)
+        self.sessao.requisitar(nome, nome)
+
+    def upload(self):
+        self.sessao.requisitar('producao_upload (página)', 'producao_upload')
+        self.sessao.requisitar(
+            'producao_upload', 'producao_upload', dados={}, arquivos={'arquivo': self.planilha},
+            esperado=302, destino='producao_confirmar',
+        )
+        self.sessao.requisitar('producao_confirmar (página)', 'producao_confirmar')
+        self.sessao.requisitar(
+            'producao_confirmar', 'producao_confirmar', dados={}, esperado=302, destino='producao_dashboard',
+        )
+
+    def relogin(self):
+        self.logout()
+        self.login()
+
+
+def planilha_upload(indice, diretorio, linhas=LINHAS_UPLOAD):
+    """(nome, conteúdo) do CSV de produção do usuário virtual `indice`, em um mês só dele."""
+    numero = MES_UPLOAD.year * 12 + MES_UPLOAD.month - 1 + indice
+    mes = date(numero // 12, numero % 12 + 1, 1)
+    rng = random.Random(indice)
+    registros = sinteticos.registros_producao(
+        mes, [sinteticos.nome_especialidade(i) for i in range(linhas)], rng, anomalias=0
+    )
+    caminho = diretorio / f'carga_{indice}.csv'
+    sinteticos.escrever_csv(caminho, mes, registros)
+    return caminho.name, caminho.read_bytes()
@@ -0,0 +1,152 @@
+"""
+Compressão das respostas com gzip ou, se o pacote `brotli` estiver instalado,
+Brotli.
+
+`CompressaoMiddleware` comprime as respostas cujo Content-Type está em
+`COMPRESSAO_TIPOS` e que têm ao menos `COMPRESSAO_TAMANHO_MINIMO` bytes,
+escolhendo a codificação pelo Accept-Encoding do navegador (Brotli tem
+preferência). Respostas em streaming (exportação CSV) são comprimidas em
+blocos de `BLOCO_STREAMING` bytes, sem serem montadas em memória; o
+compressor só entrega bytes quando tem um bloco cheio, e o final sai no
+`flush`.
+
+Um ETag forte vira fraco (`W/"..."`) na resposta comprimida, como no
+GZipMiddleware do Django: o corpo muda com a codificação, mas o GET
+condicional (`core/condicional.py`) compara ETags de forma fraca e continua
+respondendo 304. O gzip leva um nome de arquivo aleatório no cabeçalho (até
+`PREENCHIMENTO_MAXIMO` bytes), a mesma defesa do Django contra o BREACH.
+"""
+import gzip
+import io
+import re
+import secrets
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+PREENCHIMENTO_MAXIMO = 100
+# Bytes acumulados de uma resposta em streaming antes de passá-los ao compressor
+BLOCO_STREAMING = 16384
+
+_ACCEPT_ENCODING = re.compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+def codificacoes_disponiveis():
+    """Codificações suportadas, da preferida para a menos preferida."""
+    if brotli is not None and getattr(settings, 'COMPRESSAO_BROTLI', True):
+        return ['br', 'gzip']
+    return ['gzip']
+
+
+def escolher_codificacao(accept_encoding, disponiveis):
+    """Primeira codificação de `disponiveis` aceita pelo cabeçalho Accept-Encoding (ou None)."""
+    aceitas = {}
+    for parte in accept_encoding.split(','):
+        encontrado = _ACCEPT_ENCODING.match(parte)
+        if not encontrado:
+            continue
+        nome, q = encontrado.group(1).lower(), encontrado.group(2)
+        try:
+            aceitas[nome] = float(q) if q is not None else 1.0
+        except ValueError:
+            continue
+    for codificacao in disponiveis:
+        if aceitas.get(codificacao, aceitas.get('*', 0)) > 0:
+            return codificacao
+    return None
+
+
+def _nome_aleatorio():
+    return secrets.token_hex(secrets.randbelow(PREENCHIMENTO_MAXIMO // 2) + 1)
+
+
+def comprimir(conteudo, codificacao):
+    """Corpo inteiro comprimido com `codificacao` ('gzip' ou 'br')."""
+    if codificacao == 'br':
+        return brotli.compress(
+            conteudo, mode=brotli.MODE_TEXT, quality=getattr(settings, 'COMPRESSAO_NIVEL_BROTLI', 5)
+        )
+    saida = io.BytesIO()
+    with gzip.GzipFile(
+        filename=_nome_aleatorio(), mode='wb', fileobj=saida, mtime=0,
+        compresslevel=getattr(settings, 'COMPRESSAO_NIVEL_GZIP', 6),
+    ) as arquivo:
+        arquivo.write(conteudo)
+    return saida.getvalue()
+
+
+def comprimir_blocos(blocos, codificacao):
+    """Gerador com os blocos de uma resposta em streaming comprimidos com `codificacao`."""
+    if codificacao == 'br':
+        compressor = brotli.Compressor(
+            mode=brotli.MODE_TEXT, quality=getattr(settings, 'COMPRESSAO_NIVEL_BROTLI', 5)
+        )
+        processar, finalizar = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(getattr(settings, 'COMPRESSAO_NIVEL_GZIP', 6), zlib.DEFLATED, 31)
+        processar, finalizar = compressor.compress, compressor.flush
+    pendentes, tamanho = [], 0
+    for bloco in blocos:
+        # Blocos pequenos (uma linha do CSV) são agrupados: uma chamada ao compressor por bloco
+        # custaria mais CPU que a própria compressão
+        pendentes.append(bloco)
+        tamanho += len(bloco)
+        if tamanho >= BLOCO_STREAMING:
+            saida = processar(b''.join(pendentes))
+            pendentes, tamanho = [], 0
+            if saida:
+                yield saida
+    yield processar(b''.join(pendentes)) + finalizar()
+
+
+class CompressaoMiddleware:
+    """Comprime respostas grandes de texto (HTML, JSON, CSV) conforme o Accept-Encoding."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'COMPRESSAO_ATIVA', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.tipos = {tipo.strip().lower() for tipo in getattr(settings, 'COMPRESSAO_TIPOS', ['text/html'])}
+        self.minimo = getattr(settings, 'COMPRESSAO_TAMANHO_MINIMO', 1024)
+        self.disponiveis = codificacoes_disponiveis()
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header('Content-Encoding'):
+            return response
+        tipo = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if tipo not in self.tipos:
+            return response
+        if not response.streaming and len(response.content) < self.minimo:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codificacao = escolher_codificacao(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.disponiveis)
+        if codificacao is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                return response
+            response.streaming_content = comprimir_blocos(response.streaming_content, codificacao)
+            del response.headers['Content-Length']
+        else:
+            comprimido = comprimir(response.content, codificacao)
+            if len(comprimido) >= len(response.content):
+                return response
+            response.content = comprimido
+            response.headers['Content-Length'] = str(len(comprimido))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codificacao
+        return response
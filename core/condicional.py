@@ -0,0 +1,65 @@
+"""
+GET condicional (ETag) para listas e dashboards.
+
+O ETag de cada página é calculado a partir de `max(data_atualizacao)` e da
+quantidade de registros dos modelos exibidos, além do usuário logado (a barra
+de navegação mostra nome e nível de acesso). Quando o navegador reenvia um
+ETag igual, a view não é executada e a resposta é `304 Not Modified`.
+
+Não usamos Last-Modified: uma exclusão não altera o maior timestamp e o
+navegador poderia continuar exibindo a lista antiga.
+"""
+import hashlib
+from functools import wraps
+
+from django.contrib import messages
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+
+def _campo_atualizacao(modelo):
+    nomes = {f.name for f in modelo._meta.get_fields()}
+    return 'atualizado_em' if 'atualizado_em' in nomes else 'data_atualizacao'
+
+
+def _assinatura_modelo(modelo):
+    # _base_manager: todos os registros, mesmo os que o manager padrão filtra
+    # (lotes inativos de ProducaoMensal), para o MAX/COUNT sair só dos índices
+    dados = modelo._base_manager.aggregate(ultima=Max(_campo_atualizacao(modelo)), total=Count('pk'))
+    ultima = dados['ultima'].isoformat() if dados['ultima'] else '-'
+    return f"{modelo._meta.label}:{ultima}:{dados['total']}"
+
+
+def _assinatura_usuario(user):
+    return f'{user.pk}:{user.tier}:{user.primeiro_acesso}:{user.data_atualizacao.isoformat()}'
+
+
+def etag_modelos(request, modelos):
+    """Calcula o ETag da página a partir dos modelos exibidos."""
+    if not request.user.is_authenticated:
+        return None
+    # Mensagens pendentes só são exibidas se a página for renderizada
+    if len(messages.get_messages(request)):
+        return None
+    partes = [_assinatura_usuario(request.user)]
+    partes.extend(_assinatura_modelo(modelo) for modelo in modelos)
+    return hashlib.md5('|'.join(partes).encode()).hexdigest()
+
+
+def get_condicional(*modelos):
+    """Decorator que responde 304 quando nenhum dos modelos mudou desde a última visita."""
+    def decorator(view_func):
+        view_condicional = condition(
+            etag_func=lambda request, *args, **kwargs: etag_modelos(request, modelos)
+        )(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = view_condicional(request, *args, **kwargs)
+            if response.has_header('ETag'):
+                # Força a revalidação a cada acesso e impede cache compartilhado
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
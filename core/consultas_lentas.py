@@ -0,0 +1,190 @@
+"""
+Registro de consultas lentas com o plano de execução.
+
+`ConsultasLentasMiddleware` instala um `execute_wrapper` em cada conexão
+durante a requisição. Toda consulta acima de `CONSULTAS_LENTAS_LIMIAR_MS` é
+registrada no log `core.consultas_lentas` e guardada, com a view de origem, os
+parâmetros e o plano (`EXPLAIN` no PostgreSQL, `EXPLAIN QUERY PLAN` no SQLite),
+em um buffer circular de `CONSULTAS_LENTAS_MAXIMO` entradas na memória do
+processo. A página de consultas lentas (Tier 5) agrupa as entradas pelo SQL
+normalizado.
+
+O plano é obtido na mesma conexão, logo após a consulta lenta, dentro de um
+savepoint: um erro no EXPLAIN não invalida a transação da view. O próprio
+EXPLAIN não passa pelo registro nem pelas métricas (`metricas.sem_medicao`):
+não soma consultas à requisição em `/metrics` nem em `verificar_orcamentos`.
+"""
+import logging
+import re
+import threading
+from collections import deque
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+
+from .metricas import nome_view, sem_medicao
+
+
+logger = logging.getLogger(__name__)
+
+# Só comandos que aceitam EXPLAIN (BEGIN, SAVEPOINT, PRAGMA... ficam sem plano)
+_EXPLICAVEL = re.compile(r'^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b', re.IGNORECASE)
+
+_NORMALIZACOES = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def normalizar_sql(sql):
+    """SQL sem literais nem parâmetros, para agrupar execuções da mesma consulta."""
+    for padrao, substituto in _NORMALIZACOES:
+        sql = padrao.sub(substituto, sql)
+    return sql.strip()
+
+
+def _plano(conexao, sql, params):
+    if conexao.vendor == 'sqlite':
+        prefixo = 'EXPLAIN QUERY PLAN '
+    elif conexao.vendor == 'postgresql':
+        prefixo = 'EXPLAIN '
+    else:
+        return []
+    try:
+        with transaction.atomic(using=conexao.alias):
+            with conexao.cursor() as cursor:
+                cursor.execute(prefixo + sql, params)
+                return [str(linha[-1]) for linha in cursor.fetchall()]
+    except DatabaseError as e:
+        return [f'(plano indisponível: {e})']
+
+
+class Buffer:
+    """Últimas consultas lentas do processo, da mais antiga para a mais recente."""
+
+    def __init__(self, maximo):
+        self._lock = threading.Lock()
+        self._entradas = deque(maxlen=maximo)
+
+    def adicionar(self, entrada):
+        with self._lock:
+            self._entradas.append(entrada)
+
+    def entradas(self):
+        with self._lock:
+            return list(self._entradas)
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def agrupadas(self):
+        """Entradas agrupadas pelo SQL normalizado, do maior tempo total para o menor."""
+        grupos = {}
+        for entrada in self.entradas():
+            grupo = grupos.get(entrada['normalizada'])
+            if grupo is None:
+                grupo = grupos[entrada['normalizada']] = {
+                    'normalizada': entrada['normalizada'],
+                    'execucoes': 0,
+                    'tempo_total': 0.0,
+                    'tempo_maximo': 0.0,
+                    'views': set(),
+                    'exemplo': entrada,
+                }
+            grupo['execucoes'] += 1
+            grupo['tempo_total'] += entrada['duracao']
+            grupo['views'].add(entrada['view'])
+            if entrada['duracao'] >= grupo['tempo_maximo']:
+                grupo['tempo_maximo'] = entrada['duracao']
+                grupo['exemplo'] = entrada
+        for grupo in grupos.values():
+            grupo['tempo_medio'] = grupo['tempo_total'] / grupo['execucoes']
+            grupo['views'] = sorted(grupo['views'])
+        return sorted(grupos.values(), key=lambda g: g['tempo_total'], reverse=True)
+
+
+buffer = Buffer(getattr(settings, 'CONSULTAS_LENTAS_MAXIMO', 500))
+
+
+class _Monitor:
+    """execute_wrapper de uma requisição: mede cada consulta e registra as lentas."""
+
+    def __init__(self, request, limiar):
+        self.request = request
+        self.limiar = limiar
+        self._explicando = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self._explicando:
+            return execute(sql, params, many, context)
+        inicio = perf_counter()
+        concluida = False
+        try:
+            resultado = execute(sql, params, many, context)
+            concluida = True
+            return resultado
+        finally:
+            duracao = perf_counter() - inicio
+            if duracao >= self.limiar:
+                # Depois de um erro a transação pode estar abortada: sem EXPLAIN
+                explicar = concluida and not many and _EXPLICAVEL.match(sql)
+                self._registrar(context['connection'], sql, params, duracao, explicar)
+
+    def _registrar(self, conexao, sql, params, duracao, explicar):
+        plano = []
+        if explicar:
+            self._explicando = True
+            try:
+                with sem_medicao():
+                    plano = _plano(conexao, sql, params)
+            finally:
+                self._explicando = False
+        view = nome_view(self.request)
+        buffer.adicionar({
+            'quando': timezone.now(),
+            'view': view,
+            'banco': conexao.alias,
+            'sql': sql,
+            'parametros': repr(params)[:1000],
+            'normalizada': normalizar_sql(sql),
+            'duracao': duracao,
+            'plano': plano,
+        })
+        logger.warning('Consulta lenta (%.0f ms) em %s: %s', duracao * 1000, view, sql)
+
+    def instalar(self):
+        pilha = ExitStack()
+        for alias in connections:
+            pilha.enter_context(connections[alias].execute_wrapper(self))
+        return pilha
+
+
+class ConsultasLentasMiddleware:
+    """Registra as consultas acima de CONSULTAS_LENTAS_LIMIAR_MS feitas durante a requisição."""
+
+    def __init__(self, get_response):
+        limiar_ms = getattr(settings, 'CONSULTAS_LENTAS_LIMIAR_MS', 200)
+        if limiar_ms <= 0:
+            raise MiddlewareNotUsed
+        self.limiar = limiar_ms / 1000
+        self.get_response = get_response
+
+    def __call__(self, request):
+        monitor = _Monitor(request, self.limiar)
+        with monitor.instalar():
+            response = self.get_response(request)
+        if response.streaming:
+            response.streaming_content = self._monitorar_streaming(monitor, response.streaming_content)
+        return response
+
+    def _monitorar_streaming(self, monitor, conteudo):
+        with monitor.instalar():
+            yield from conteudo
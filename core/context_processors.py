@@ -0,0 +1,6 @@
+from .cache import tempo_cache
+
+
+def cache(request):
+    """Timeout dos fragmentos `{% cache tempo_cache ... %}` dos templates."""
+    return {'tempo_cache': tempo_cache()}
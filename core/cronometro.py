@@ -0,0 +1,108 @@
+"""
+Tempo por etapa e contadores das importações.
+
+Cada importação (planilha de produção, CSV de cirurgias) recebe um
+`Cronometro`; os parsers e a gravação marcam as etapas com `etapa()` e somam
+contadores com `contar()`. O `resultado()` é gravado junto com o registro da
+importação e exibido nas telas de resultado.
+
+Etapas podem ser aninhadas: o tempo de uma etapa interna é descontado da
+externa, de modo que a soma das etapas nunca passa do total. Uma etapa marcada
+várias vezes acumula os tempos. Em laços por linha, onde um gerenciador de
+contexto por iteração custaria mais que o próprio trabalho, os tempos são
+acumulados em variáveis locais e somados uma vez com `somar()`.
+"""
+from contextlib import contextmanager
+from time import perf_counter
+
+
+ROTULOS = {
+    'leitura_arquivo': 'Leitura do arquivo',
+    'abertura_planilha': 'Abertura da planilha',
+    'decodificacao': 'Decodificação do texto',
+    'deteccao_delimitador': 'Detecção do delimitador',
+    'leitura_html': 'Leitura da tabela HTML',
+    'leitura_celulas': 'Leitura das células',
+    'conversao': 'Conversão numérica',
+    'validacao': 'Validação',
+    'diferencas': 'Comparação com o mês gravado',
+    'armazenamento': 'Armazenamento para confirmação',
+    'leitura_registros': 'Leitura dos registros pendentes',
+    'especialidades': 'Mapeamento de especialidades',
+    'gravacao': 'Gravação no banco',
+    'ativacao': 'Ativação do lote',
+}
+
+ROTULOS_CONTADORES = {
+    'bytes': 'Bytes lidos',
+    'tentativas_decodificacao': 'Tentativas de decodificação',
+    'linhas_lidas': 'Linhas lidas',
+    'linhas_ignoradas': 'Linhas vazias ou sem especialidade',
+    'registros': 'Registros',
+    'celulas_invalidas': 'Células inválidas',
+    'registros_com_violacao': 'Registros com inconsistências',
+    'registros_gravados': 'Registros gravados',
+    'criadas': 'Cirurgias criadas',
+    'atualizadas': 'Cirurgias atualizadas',
+    'erros': 'Linhas com erro',
+}
+
+
+class Cronometro:
+    """Acumula o tempo próprio de cada etapa e contadores de uma importação."""
+
+    def __init__(self):
+        self.inicio = perf_counter()
+        self.tempos = {}
+        self.contadores = {}
+        self.detalhes = {}
+        self._pilha = []
+
+    @contextmanager
+    def etapa(self, nome):
+        self.tempos.setdefault(nome, 0.0)  # etapas na ordem em que começam
+        inicio = perf_counter()
+        self._pilha.append(nome)
+        try:
+            yield
+        finally:
+            self._pilha.pop()
+            self.somar(nome, perf_counter() - inicio)
+
+    def somar(self, nome, segundos):
+        """Soma `segundos` medidos fora de `etapa()` (ex.: acumulados em um laço).
+
+        Como em `etapa()`, o tempo é descontado da etapa externa em andamento.
+        """
+        self.tempos[nome] = self.tempos.get(nome, 0.0) + segundos
+        if self._pilha:
+            externa = self._pilha[-1]
+            self.tempos[externa] = self.tempos.get(externa, 0.0) - segundos
+
+    def contar(self, nome, quantidade=1):
+        self.contadores[nome] = self.contadores.get(nome, 0) + quantidade
+
+    def anotar(self, nome, valor):
+        """Guarda um valor descritivo (codificação, delimitador...)."""
+        self.detalhes[nome] = valor
+
+    def resultado(self):
+        """Dict serializável em JSON com o total, as etapas e os contadores."""
+        total = perf_counter() - self.inicio
+        return {
+            'total': total,
+            'etapas': [
+                {
+                    'nome': nome,
+                    'rotulo': ROTULOS.get(nome, nome),
+                    'segundos': segundos,
+                    'percentual': segundos / total * 100 if total else 0,
+                }
+                for nome, segundos in self.tempos.items()
+            ],
+            'contadores': [
+                {'nome': nome, 'rotulo': ROTULOS_CONTADORES.get(nome, nome), 'valor': valor}
+                for nome, valor in self.contadores.items()
+            ],
+            'detalhes': self.detalhes,
+        }
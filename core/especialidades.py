@@ -0,0 +1,77 @@
+"""
+Normalização e resolução de especialidades.
+
+O texto de especialidade chega de formulários e planilhas com variações de
+acentuação, caixa e espaços ("Ortopedia", "ORTOPEDIA ", "ortopédia"). Todas
+as variações com a mesma forma normalizada apontam para a mesma
+`Especialidade`; grafias diferentes que significam a mesma coisa (ex.:
+"Ortopedia e Traumatologia") são ligadas por `AliasEspecialidade`.
+"""
+import re
+import unicodedata
+
+from .cache import invalidar
+from .models import AliasEspecialidade, Especialidade
+
+
+def normalizar_especialidade(nome):
+    """Remove acentos, pontuação e espaços repetidos e converte para minúsculas."""
+    if not nome:
+        return ''
+    decomposto = unicodedata.normalize('NFKD', str(nome))
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    sem_pontuacao = re.sub(r'[^\w\s]', ' ', sem_acentos)
+    return ' '.join(sem_pontuacao.casefold().split())
+
+
+def _nome_exibicao(nome):
+    return ' '.join(str(nome).split())
+
+
+def mapa_especialidades(nomes):
+    """Resolve vários nomes de uma vez, criando as especialidades que faltarem.
+
+    Retorna {nome: id da especialidade}; nomes vazios ficam de fora. Usa no
+    máximo quatro consultas, independentemente da quantidade de nomes.
+    """
+    chaves = {}
+    for nome in nomes:
+        chave = normalizar_especialidade(nome)
+        if chave:
+            chaves.setdefault(chave, nome)
+    if not chaves:
+        return {}
+
+    ids = dict(
+        AliasEspecialidade.objects
+        .filter(nome_normalizado__in=list(chaves))
+        .values_list('nome_normalizado', 'especialidade_id')
+    )
+    restantes = [c for c in chaves if c not in ids]
+    if restantes:
+        ids.update(
+            Especialidade.objects
+            .filter(nome_normalizado__in=restantes)
+            .values_list('nome_normalizado', 'id')
+        )
+
+    faltando = [c for c in chaves if c not in ids]
+    if faltando:
+        Especialidade.objects.bulk_create(
+            [Especialidade(nome=_nome_exibicao(chaves[c]), nome_normalizado=c) for c in faltando],
+            ignore_conflicts=True,
+        )
+        ids.update(
+            Especialidade.objects
+            .filter(nome_normalizado__in=faltando)
+            .values_list('nome_normalizado', 'id')
+        )
+        # bulk_create não dispara post_save
+        invalidar(Especialidade)
+
+    return {nome: ids[normalizar_especialidade(nome)] for nome in nomes if normalizar_especialidade(nome)}
+
+
+def resolver_especialidade(nome):
+    """Retorna o id da especialidade canônica de `nome` (ou None se vazio)."""
+    return mapa_especialidades([nome]).get(nome)
@@ -0,0 +1,173 @@
+"""
+Arquivos estáticos com hash no nome, pré-comprimidos e servidos pela própria
+aplicação com cache de longo prazo.
+
+`ArmazenamentoEstatico` é o ManifestStaticFilesStorage do Django (o
+`collectstatic` copia `estilo.css` como `estilo.<hash>.css` e o `{% static %}`
+passa a apontar para o nome com hash) que, ao final do `collectstatic`, grava
+ao lado de cada arquivo de texto versões `.gz` e, com o pacote `brotli`
+instalado, `.br`, já na compressão máxima.
+
+`EstaticosMiddleware` atende `STATIC_URL` a partir de `STATIC_ROOT` antes da
+sessão e da autenticação, escolhendo a versão pré-comprimida pelo
+Accept-Encoding. Nomes com hash recebem `Cache-Control: immutable` de um ano
+(`ESTATICOS_MAX_AGE`): o conteúdo nunca muda sob o mesmo nome, então o
+navegador não revalida. Os demais são revalidados a cada uso (Last-Modified).
+A lista de nomes com hash vem do manifesto do `collectstatic` e é relida quando
+o arquivo muda, sem reiniciar os workers.
+Com nginx ou CDN na frente, `ESTATICOS_SERVIR=False` devolve o trabalho a eles.
+Com DEBUG o middleware fica de fora e o runserver serve os arquivos de
+`STATICFILES_DIRS` direto, sem exigir `collectstatic` a cada alteração.
+
+Arquivos ausentes do manifesto (`collectstatic` não executado, referência a um
+arquivo inexistente) saem com o nome original em vez de derrubar a página.
+"""
+import gzip
+import logging
+import mimetypes
+import os
+import posixpath
+import stat
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .compressao import brotli, escolher_codificacao
+
+
+logger = logging.getLogger(__name__)
+
+EXTENSOES_COMPRIMIVEIS = {'.css', '.js', '.map', '.svg', '.json', '.txt', '.html', '.xml', '.ico', '.ttf', '.eot'}
+TAMANHO_MINIMO = 256
+# Codificação → extensão do arquivo pré-comprimido, da preferida para a menos preferida
+VARIANTES = [('br', '.br'), ('gzip', '.gz')]
+
+
+class ArmazenamentoEstatico(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage que também grava `.gz` e `.br` dos arquivos com hash."""
+
+    manifest_strict = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._ausentes = set()
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            if name not in self._ausentes:
+                self._ausentes.add(name)
+                logger.warning('Arquivo estático fora do manifesto, servido sem hash: %s', name)
+            return name
+
+    def post_process(self, *args, **kwargs):
+        yield from super().post_process(*args, **kwargs)
+        if not kwargs.get('dry_run'):
+            for nome in sorted(set(self.hashed_files.values())):
+                self._precomprimir(nome)
+
+    def _precomprimir(self, nome):
+        if os.path.splitext(nome)[1].lower() not in EXTENSOES_COMPRIMIVEIS:
+            return
+        with self.open(nome) as arquivo:
+            conteudo = arquivo.read()
+        if len(conteudo) < TAMANHO_MINIMO:
+            return
+        versoes = {'.gz': gzip.compress(conteudo, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            versoes['.br'] = brotli.compress(conteudo, mode=brotli.MODE_TEXT, quality=11)
+        for extensao, comprimido in versoes.items():
+            if len(comprimido) >= len(conteudo):
+                continue
+            if self.exists(nome + extensao):
+                self.delete(nome + extensao)
+            self._save(nome + extensao, ContentFile(comprimido))
+
+
+class EstaticosMiddleware:
+    """Serve os arquivos de STATIC_ROOT, pré-comprimidos e com cache imutável para nomes com hash."""
+
+    def __init__(self, get_response):
+        prefixo = settings.STATIC_URL or ''
+        if (
+            settings.DEBUG or not getattr(settings, 'ESTATICOS_SERVIR', True)
+            or not prefixo.startswith('/') or not settings.STATIC_ROOT
+        ):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefixo = prefixo
+        self.raiz = str(settings.STATIC_ROOT)
+        self.max_age = getattr(settings, 'ESTATICOS_MAX_AGE', 31536000)
+        self.manifesto = getattr(staticfiles_storage, 'manifest_name', None)
+        # (mtime do manifesto, nomes com hash), trocados juntos quando o collectstatic roda
+        self._com_hash = (None, set(getattr(staticfiles_storage, 'hashed_files', {}).values()))
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and request.path_info.startswith(self.prefixo):
+            response = self.servir(request, request.path_info[len(self.prefixo):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def com_hash(self):
+        """Nomes com hash do manifesto, relidos se ele mudou desde a última leitura."""
+        if self.manifesto is None:
+            return self._com_hash[1]
+        try:
+            mtime = os.stat(os.path.join(self.raiz, self.manifesto)).st_mtime
+        except OSError:
+            return self._com_hash[1]
+        if mtime != self._com_hash[0]:
+            try:
+                caminhos, _ = staticfiles_storage.load_manifest()
+            except ValueError:  # manifesto sendo gravado: tenta de novo na próxima requisição
+                return self._com_hash[1]
+            # Os nomes anteriores continuam imutáveis: o conteúdo sob um nome com hash nunca muda
+            self._com_hash = (mtime, self._com_hash[1] | set(caminhos.values()))
+        return self._com_hash[1]
+
+    def servir(self, request, caminho):
+        """Resposta com o arquivo `caminho` de STATIC_ROOT, ou None se ele não existir."""
+        caminho = posixpath.normpath(caminho).lstrip('/')
+        try:
+            arquivo = safe_join(self.raiz, caminho)
+        except SuspiciousFileOperation:
+            return None
+        try:
+            estado = os.stat(arquivo)
+        except OSError:
+            return None
+        if not stat.S_ISREG(estado.st_mode):
+            return None
+
+        if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), estado.st_mtime):
+            response = HttpResponseNotModified()
+        else:
+            existentes = [cod for cod, extensao in VARIANTES if os.path.isfile(arquivo + extensao)]
+            codificacao = escolher_codificacao(request.META.get('HTTP_ACCEPT_ENCODING', ''), existentes)
+            servido = arquivo + dict(VARIANTES)[codificacao] if codificacao else arquivo
+            tipo, _ = mimetypes.guess_type(arquivo)
+            # filename: sem ele o FileResponse anuncia o nome do .br/.gz no Content-Disposition
+            response = FileResponse(
+                open(servido, 'rb'), content_type=tipo or 'application/octet-stream',
+                filename=os.path.basename(arquivo),
+            )
+            response['Last-Modified'] = http_date(estado.st_mtime)
+            if codificacao:
+                response['Content-Encoding'] = codificacao
+            if existentes:
+                patch_vary_headers(response, ('Accept-Encoding',))
+
+        if caminho in self.com_hash():
+            response['Cache-Control'] = f'public, max-age={self.max_age}, immutable'
+        else:
+            response['Cache-Control'] = 'public, no-cache'
+        return response
@@ -0,0 +1,93 @@
+"""
+Lotes e controle de concorrência das importações de produção.
+
+Cada importação confirmada grava um lote próprio de ProducaoMensal, e
+`MesProducao.importacao_ativa` indica qual lote o mês exibe. Trocar o lote
+ativo (`ativar_importacao`) é a atualização de uma linha: quem lê nunca vê um
+mês pela metade, e reverter para uma importação anterior não exige a planilha
+original. Lotes inativos são removidos por `limpar_importacoes`.
+
+Duas confirmações (ou reversões) do mesmo mês ao mesmo tempo fariam o
+trabalho duas vezes e a última a terminar decidiria o lote ativo sem que o
+usuário soubesse. `reservar_mes` marca o mês em
+`MesProducao` com um UPDATE condicional: só uma requisição consegue a
+reserva, e as demais recebem `ImportacaoEmAndamento` na hora, sem gravar
+nada. A reserva vale para um mês só; meses diferentes são importados em
+paralelo. Uma reserva mais antiga que `PRODUCAO_IMPORTACAO_TIMEOUT` segundos
+(processo interrompido no meio da gravação) é considerada abandonada.
+"""
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .anomalias import recalcular_anomalias
+from .cache import invalidar
+from .models import MesProducao, ProducaoMensal
+from .previsao import previsao
+
+
+class ImportacaoEmAndamento(Exception):
+    """Outro usuário está gravando a produção do mesmo mês."""
+
+    def __init__(self, mes):
+        self.mes = mes
+        usuario = mes.importando_por.nome_completo if mes.importando_por else 'outro usuário'
+        desde = timezone.localtime(mes.importando_desde).strftime('%H:%M') if mes.importando_desde else ''
+        super().__init__(
+            f'A produção de {mes} está sendo importada por {usuario} desde {desde}. '
+            'Aguarde a conclusão e confirme novamente.'
+        )
+
+
+def _limite_reserva():
+    return timezone.now() - timedelta(seconds=settings.PRODUCAO_IMPORTACAO_TIMEOUT)
+
+
+def importacao_em_andamento(mes_ano):
+    """MesProducao com reserva ativa para `mes_ano`, ou None."""
+    return (
+        MesProducao.objects.select_related('importando_por')
+        .filter(mes_ano=mes_ano, importando_desde__gte=_limite_reserva())
+        .first()
+    )
+
+
+@contextmanager
+def reservar_mes(mes_ano, usuario):
+    """Reserva `mes_ano` para `usuario` durante o bloco.
+
+    Deve envolver a transação da gravação (e não ficar dentro dela), para que
+    a reserva fique visível às outras conexões antes de a gravação começar.
+    """
+    MesProducao.objects.get_or_create(mes_ano=mes_ano)
+    agora = timezone.now()
+    reservado = (
+        MesProducao.objects.filter(mes_ano=mes_ano)
+        .filter(Q(importando_desde__isnull=True) | Q(importando_desde__lt=_limite_reserva()))
+        .update(importando_por=usuario, importando_desde=agora)
+    )
+    if not reservado:
+        raise ImportacaoEmAndamento(MesProducao.objects.select_related('importando_por').get(mes_ano=mes_ano))
+    try:
+        yield
+    finally:
+        # Só libera a própria reserva (uma reserva expirada pode ter sido tomada por outro)
+        MesProducao.objects.filter(mes_ano=mes_ano, importando_desde=agora).update(
+            importando_por=None, importando_desde=None
+        )
+
+
+def ativar_importacao(importacao):
+    """Torna `importacao` (já confirmada) o lote exibido do seu mês."""
+    MesProducao.objects.update_or_create(
+        mes_ano=importacao.mes_ano, defaults={'importacao_ativa': importacao}
+    )
+    # A troca não grava ProducaoMensal, então os sinais não invalidam o cache
+    invalidar(ProducaoMensal)
+    # Anomalias e previsão dependem de todo o histórico; recalcula após o commit
+    transaction.on_commit(recalcular_anomalias)
+    transaction.on_commit(previsao)
@@ -0,0 +1,165 @@
+"""
+Benchmark da compressão das respostas: bytes economizados e custo de CPU por página.
+
+Uso:
+
+    python manage.py benchmark_compressao [--linhas 500] [--repeticoes 10] [--niveis-gzip 1,6,9]
+        [--niveis-brotli 4,5,11]
+
+Popula um banco temporário (SQLite) com `gerar_dados_sinteticos`, renderiza as
+listas, os dashboards e a exportação como um usuário Tier 5 e comprime cada
+corpo com as mesmas funções do `CompressaoMiddleware` (`core/compressao.py`),
+nos níveis pedidos (por padrão, os de COMPRESSAO_NIVEL_GZIP e
+COMPRESSAO_NIVEL_BROTLI). Para cada página e codificação, mostra o tamanho
+original e comprimido e o tempo de CPU da compressão, também como fração do
+tempo de renderização da página. Brotli só é medido com o pacote instalado.
+"""
+import io
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core import compressao
+from core.models import Usuario
+
+
+PAGINAS = [
+    'dashboard', 'usuario_lista', 'empresa_lista', 'medico_lista', 'cirurgia_lista', 'exame_lista',
+    'servico_lista', 'producao_dashboard', 'producao_anomalias', 'producao_importacoes', 'producao_previsao',
+    'producao_catalogo', 'producao_valoracao', 'producao_exportar',
+]
+
+
+def _niveis(valor):
+    try:
+        return [int(v) for v in valor.split(',') if v.strip()]
+    except ValueError:
+        raise CommandError(f'Lista de níveis inválida: {valor!r}.')
+
+
+def _menor_tempo(funcao, repeticoes):
+    """Menor tempo de CPU (process_time) de `funcao`, em ms, e o seu resultado."""
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.process_time()
+        resultado = funcao()
+        decorrido = (time.process_time() - inicio) * 1000
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor, resultado
+
+
+class Command(BaseCommand):
+    help = 'Mede bytes economizados e custo de CPU da compressão gzip/Brotli por página'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=500, help='Registros por cadastro e especialidades')
+        parser.add_argument('--meses', type=int, default=12, help='Meses de produção')
+        parser.add_argument('--repeticoes', type=int, default=10)
+        parser.add_argument('--niveis-gzip', type=_niveis, help='Níveis do gzip (1-9)')
+        parser.add_argument('--niveis-brotli', type=_niveis, help='Níveis (quality) do Brotli (0-11)')
+
+    def handle(self, *args, **options):
+        if connections[DEFAULT_DB_ALIAS].vendor != 'sqlite':
+            raise CommandError('Este benchmark popula um banco SQLite temporário; rode-o com DB_ENGINE=sqlite.')
+        if options['repeticoes'] < 1:
+            raise CommandError('--repeticoes deve ser positivo.')
+        codificacoes = [('gzip', 'COMPRESSAO_NIVEL_GZIP', n) for n in
+                        options['niveis_gzip'] or [settings.COMPRESSAO_NIVEL_GZIP]]
+        if compressao.brotli is not None:
+            codificacoes += [('br', 'COMPRESSAO_NIVEL_BROTLI', n) for n in
+                             options['niveis_brotli'] or [settings.COMPRESSAO_NIVEL_BROTLI]]
+        else:
+            self.stdout.write('Pacote brotli não instalado: medindo só o gzip.')
+
+        with tempfile.TemporaryDirectory() as diretorio, override_settings(
+            # Sem cache: cada renderização faz o trabalho completo
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+            ALLOWED_HOSTS=['testserver'],
+        ):
+            conexao = connections[DEFAULT_DB_ALIAS]
+            nome_original = connections.settings[DEFAULT_DB_ALIAS]['NAME']
+            conexao.close()
+            connections.settings[DEFAULT_DB_ALIAS]['NAME'] = str(Path(diretorio) / 'compressao.sqlite3')
+            try:
+                call_command('migrate', verbosity=0, interactive=False)
+                self._popular(options)
+                paginas = self._renderizar(options['repeticoes'])
+            finally:
+                conexao.close()
+                connections.settings[DEFAULT_DB_ALIAS]['NAME'] = nome_original
+
+        self._medir(paginas, codificacoes, options['repeticoes'])
+
+    def _popular(self, options):
+        linhas = options['linhas']
+        call_command(
+            'gerar_dados_sinteticos', usuarios=linhas, empresas=linhas, medicos=linhas, cirurgias=linhas,
+            exames=linhas, servicos=linhas, especialidades=linhas, meses=options['meses'], forcar=True,
+            stdout=self.stdout if options['verbosity'] > 1 else io.StringIO(),
+        )
+
+    def _renderizar(self, repeticoes):
+        """{página: (blocos do corpo sem compressão, ms de renderização, streaming)}."""
+        usuario = Usuario.objects.create(
+            username='benchmark_compressao', email='benchmark_compressao@farol.local',
+            nome_completo='Benchmark', cpf='000.000.000-00', tier=5, primeiro_acesso=False,
+        )
+        cliente = Client()
+        cliente.force_login(usuario)
+        paginas = {}
+        for nome in PAGINAS:
+            def obter():
+                resposta = cliente.get(reverse(nome))
+                if resposta.status_code != 200:
+                    raise CommandError(f'{nome} respondeu {resposta.status_code}.')
+                if resposta.streaming:
+                    return list(resposta.streaming_content), True
+                return [resposta.content], False
+            ms, (blocos, streaming) = _menor_tempo(obter, repeticoes)
+            paginas[nome] = (blocos, ms, streaming)
+        return paginas
+
+    def _medir(self, paginas, codificacoes, repeticoes):
+        self.stdout.write(
+            f'{"página":<22} {"codif.":<7} {"original KiB":>12} {"comprim. KiB":>12} {"economia":>9} '
+            f'{"compr. ms":>10} {"render ms":>10} {"% render":>9}'
+        )
+        totais = {}
+        for nome, (blocos, ms_render, streaming) in paginas.items():
+            original = sum(len(bloco) for bloco in blocos)
+            for codificacao, ajuste, nivel in codificacoes:
+                with override_settings(**{ajuste: nivel}):
+                    if streaming:
+                        ms, saida = _menor_tempo(
+                            lambda: b''.join(compressao.comprimir_blocos(iter(blocos), codificacao)), repeticoes
+                        )
+                    else:
+                        ms, saida = _menor_tempo(lambda: compressao.comprimir(blocos[0], codificacao), repeticoes)
+                rotulo = f'{codificacao}-{nivel}'
+                economia = (1 - len(saida) / original) * 100 if original else 0
+                self.stdout.write(
+                    f'{nome:<22} {rotulo:<7} {original / 1024:>12.1f} {len(saida) / 1024:>12.1f} '
+                    f'{economia:>8.1f}% {ms:>10.2f} {ms_render:>10.1f} '
+                    f'{ms / ms_render * 100 if ms_render else 0:>8.1f}%'
+                )
+                total = totais.setdefault(rotulo, [0, 0, 0.0, 0.0])
+                total[0] += original
+                total[1] += len(saida)
+                total[2] += ms
+                total[3] += ms_render
+
+        self.stdout.write('')
+        for rotulo, (original, comprimido, ms, ms_render) in totais.items():
+            self.stdout.write(
+                f'{rotulo:<7} {original / 1024:,.0f} KiB → {comprimido / 1024:,.0f} KiB '
+                f'({(1 - comprimido / original) * 100:.1f}% a menos), {ms:.1f} ms de CPU '
+                f'({ms / ms_render * 100:.1f}% do tempo de renderização)'
+            )
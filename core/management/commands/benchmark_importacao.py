@@ -0,0 +1,365 @@
+"""
+Benchmark dos parsers e da gravação das importações.
+
+Uso:
+
+    python manage.py benchmark_importacao [--linhas 1000,10000,100000] [--repeticoes 7]
+        [--casos parse_csv,parse_xlsx,...] [--saida resultado.json] [--comparar anterior.json]
+
+Para cada tamanho, gera planilhas de produção sintéticas (`core/sinteticos.py`,
+semente fixa) e mede:
+
+- `parse_csv`, `parse_xlsx`, `parse_xls` (XLS exportado como HTML, o formato
+  mais comum) e `parse_html` (`_parse_html_as_sheet` sobre o texto);
+- `armazenamento`: validação e gravação da importação pendente (`_preparar_importacao`);
+- `confirmacao`: o caminho de gravação de `producao_confirmar_view` (leitura
+  dos registros pendentes e `gravar_producao_mensal`);
+- `cirurgia_upload`: POST do CSV de cirurgias em `cirurgia_upload_view`,
+  até `--maximo-cirurgias` linhas (uma gravação por linha).
+
+Cada caso roda uma vez sem medição (aquecimento: imports tardios, caches) e
+depois `--repeticoes` vezes, com o coletor de lixo desligado, dentro de uma
+transação desfeita ao final; são informados o menor tempo, a mediana e a
+dispersão (desvio absoluto mediano). Antes de cada repetição é medida também
+uma carga fixa de referência (só biblioteca padrão), que mede a velocidade da
+máquina naquele momento. O pico de memória (tracemalloc) e as
+consultas ao banco vêm de uma execução extra. Com SQLite, tudo roda em um
+banco temporário recém-migrado; com outro banco, no banco configurado, sem
+deixar registros.
+
+`--saida` grava o resultado em JSON. `--comparar` lê um JSON anterior,
+ajusta as medianas dele pela razão entre as referências das duas execuções e
+aponta, caso a caso, aumentos da mediana acima de `--tolerancia` (padrão 20%)
+que também superem o ruído medido (três vezes a dispersão das duas execuções,
+e no mínimo `MINIMO_SEGUNDOS`), picos de memória acima da tolerância e
+qualquer aumento de consultas; havendo regressão, o comando termina com erro.
+"""
+import gc
+import csv
+import io
+import json
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from core import sinteticos
+from core.metricas import Medicao
+from core.models import Usuario
+from core.views import (
+    _parse_csv, _parse_html_as_sheet, _parse_xls, _parse_xlsx, _preparar_importacao, _registros_pendentes,
+    gravar_producao_mensal,
+)
+
+
+CASOS = ['parse_csv', 'parse_xlsx', 'parse_xls', 'parse_html', 'armazenamento', 'confirmacao', 'cirurgia_upload']
+VERSAO_FORMATO = 2
+# Mês sem produção, para a comparação com o mês gravado não encontrar nada
+MES_BENCHMARK = date(2100, 1, 1)
+# Aumentos da mediana menores que isso não contam como regressão, por maior que
+# seja a variação percentual: abaixo disso, a medição é dominada por ruído
+MINIMO_SEGUNDOS = 0.05
+# Quantas vezes a dispersão somada das duas execuções um aumento precisa superar
+DISPERSOES_REGRESSAO = 3
+
+
+def _lista_inteiros(valor):
+    try:
+        numeros = [int(v) for v in valor.split(',') if v.strip()]
+    except ValueError:
+        raise CommandError(f'Lista de números inválida: {valor!r}.')
+    if not numeros or min(numeros) < 1:
+        raise CommandError('Os tamanhos devem ser números positivos.')
+    return numeros
+
+
+def _commit_git():
+    try:
+        resultado = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return resultado.stdout.strip() or None
+
+
+def _usuario_benchmark():
+    return Usuario.objects.create(
+        username='benchmark_importacao', email='benchmark_importacao@farol.local',
+        nome_completo='Benchmark', cpf='000.000.000-00', tier=5, primeiro_acesso=False,
+    )
+
+
+def _executar(executar, preparar):
+    """Roda `executar(*preparar())` em uma transação desfeita; retorna (segundos, consultas)."""
+    medicao = Medicao()
+    with transaction.atomic():
+        argumentos = preparar()
+        gc.collect()
+        gc.disable()
+        try:
+            with medicao.instalar():
+                inicio = time.perf_counter()
+                executar(*argumentos)
+                decorrido = time.perf_counter() - inicio
+        finally:
+            gc.enable()
+        transaction.set_rollback(True)
+    return decorrido, medicao.consultas
+
+
+# Carga fixa, só da biblioteca padrão (csv e Decimal, como os parsers), medida
+# junto de cada repetição: a razão entre a referência de hoje e a do JSON anterior
+# desconta a variação de velocidade da máquina entre as duas execuções
+_TEXTO_REFERENCIA = '\n'.join(
+    ';'.join(f'{(i * 7 + j) % 1000},{j:02d}' for j in range(12)) for i in range(4000)
+)
+
+
+def _referencia():
+    inicio = time.perf_counter()
+    for linha in csv.reader(io.StringIO(_TEXTO_REFERENCIA), delimiter=';'):
+        [Decimal(valor.replace(',', '.')) for valor in linha]
+    return time.perf_counter() - inicio
+
+
+def _dispersao(tempos):
+    """Desvio absoluto mediano: como a mediana, pouco afetado por uma execução atípica."""
+    mediana = statistics.median(tempos)
+    return statistics.median(abs(t - mediana) for t in tempos)
+
+
+def _medir(executar, preparar, repeticoes, memoria):
+    _executar(executar, preparar)  # aquecimento, fora da medição
+    tempos, referencias = [], []
+    consultas = 0
+    for _ in range(repeticoes):
+        referencias.append(_referencia())
+        decorrido, consultas = _executar(executar, preparar)
+        tempos.append(decorrido)
+    pico = None
+    if memoria:
+        tracemalloc.start()
+        try:
+            _executar(executar, preparar)
+            pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {
+        'segundos': min(tempos),
+        'mediana': statistics.median(tempos),
+        'dispersao': _dispersao(tempos),
+        'referencia': statistics.median(referencias),
+        'consultas': consultas,
+        'pico_memoria': pico,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Mede tempo, memória e consultas dos parsers e da gravação das importações'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=_lista_inteiros, default=[1000, 10000, 100000],
+                            help='Tamanhos das planilhas, separados por vírgula (ex.: 1000,10000,500000)')
+        parser.add_argument('--casos', default=','.join(CASOS), help='Casos medidos, separados por vírgula')
+        parser.add_argument('--repeticoes', type=int, default=7)
+        parser.add_argument('--maximo-cirurgias', type=int, default=20000,
+                            help='Maior CSV de cirurgias medido (a gravação é linha a linha)')
+        parser.add_argument('--sem-memoria', action='store_true', help='Não mede o pico de memória')
+        parser.add_argument('--saida', type=Path, help='Arquivo JSON com os resultados')
+        parser.add_argument('--comparar', type=Path, help='JSON de uma execução anterior')
+        parser.add_argument('--tolerancia', type=float, default=20.0, help='Variação aceita, em %%')
+        parser.add_argument('--semente', type=int, default=42)
+
+    def handle(self, *args, **options):
+        casos = [c.strip() for c in options['casos'].split(',') if c.strip()]
+        desconhecidos = set(casos) - set(CASOS)
+        if desconhecidos:
+            raise CommandError(f'Casos desconhecidos: {", ".join(sorted(desconhecidos))}.')
+        if options['repeticoes'] < 1:
+            raise CommandError('--repeticoes deve ser positivo.')
+        anterior = None
+        if options['comparar']:
+            try:
+                anterior = json.loads(options['comparar'].read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Não foi possível ler {options["comparar"]}: {e}')
+
+        with tempfile.TemporaryDirectory() as diretorio, override_settings(ALLOWED_HOSTS=['testserver']):
+            diretorio = Path(diretorio)
+            if connections[DEFAULT_DB_ALIAS].vendor == 'sqlite':
+                resultados = self._em_banco_temporario(diretorio, casos, options)
+            else:
+                resultados = self._medir_tudo(diretorio, casos, options)
+
+        relatorio = {
+            'versao': VERSAO_FORMATO,
+            'gerado_em': timezone.now().isoformat(),
+            'commit': _commit_git(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'banco': connections[DEFAULT_DB_ALIAS].vendor,
+            'parametros': {'repeticoes': options['repeticoes'], 'semente': options['semente']},
+            'resultados': resultados,
+        }
+        if options['saida']:
+            options['saida'].write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding='utf-8')
+            self.stdout.write(f'Resultados gravados em {options["saida"]}.')
+        if anterior is not None:
+            self._comparar(anterior, relatorio, options['tolerancia'])
+
+    def _em_banco_temporario(self, diretorio, casos, options):
+        """Troca o banco padrão por um SQLite novo no diretório temporário (como em benchmark_sqlite)."""
+        conexao = connections[DEFAULT_DB_ALIAS]
+        nome_original = connections.settings[DEFAULT_DB_ALIAS]['NAME']
+        conexao.close()
+        connections.settings[DEFAULT_DB_ALIAS]['NAME'] = str(diretorio / 'benchmark.sqlite3')
+        try:
+            call_command('migrate', verbosity=0, interactive=False)
+            return self._medir_tudo(diretorio, casos, options)
+        finally:
+            conexao.close()
+            connections.settings[DEFAULT_DB_ALIAS]['NAME'] = nome_original
+
+    def _medir_tudo(self, diretorio, casos, options):
+        resultados = []
+        self.stdout.write(
+            f'{"caso":<16} {"linhas":>8} {"segundos":>9} {"mediana":>9} {"± ms":>7} {"linhas/s":>10} '
+            f'{"pico MiB":>9} {"consultas":>9}'
+        )
+        for linhas in options['linhas']:
+            rng = random.Random(options['semente'])
+            especialidades = [sinteticos.nome_especialidade(i) for i in range(linhas)]
+            registros = sinteticos.registros_producao(MES_BENCHMARK, especialidades, rng)
+            arquivos = {}
+            for formato, escrever in sinteticos.ESCRITORES.items():
+                caminho = diretorio / f'producao_{linhas}.{formato}'
+                escrever(caminho, MES_BENCHMARK, registros)
+                arquivos[formato] = caminho.read_bytes()
+            caminho_cirurgias = diretorio / f'cirurgias_{linhas}.csv'
+            if 'cirurgia_upload' in casos and linhas <= options['maximo_cirurgias']:
+                sinteticos.escrever_csv_cirurgias(caminho_cirurgias, linhas, rng)
+
+            for caso in casos:
+                if caso == 'cirurgia_upload' and linhas > options['maximo_cirurgias']:
+                    self.stdout.write(f'{caso:<16} {linhas:>8}  (acima de --maximo-cirurgias, não medido)')
+                    continue
+                executar, preparar = self._caso(caso, arquivos, registros, caminho_cirurgias)
+                medida = _medir(executar, preparar, options['repeticoes'], not options['sem_memoria'])
+                medida.update({
+                    'caso': caso,
+                    'linhas': linhas,
+                    'linhas_por_segundo': linhas / medida['segundos'] if medida['segundos'] else None,
+                })
+                resultados.append(medida)
+                pico = f'{medida["pico_memoria"] / 2 ** 20:9.1f}' if medida['pico_memoria'] is not None else f'{"-":>9}'
+                self.stdout.write(
+                    f'{caso:<16} {linhas:>8} {medida["segundos"]:>9.3f} {medida["mediana"]:>9.3f} '
+                    f'{medida["dispersao"] * 1000:>7.1f} '
+                    f'{medida["linhas_por_segundo"] or 0:>10,.0f} {pico} {medida["consultas"]:>9}'
+                )
+        return resultados
+
+    def _caso(self, caso, arquivos, registros, caminho_cirurgias):
+        """(executar, preparar) do caso; `preparar` roda dentro da transação, fora da medição."""
+        def sem_preparo():
+            return ()
+
+        if caso == 'parse_csv':
+            return (lambda: _parse_csv(io.BytesIO(arquivos['csv']))), sem_preparo
+        if caso == 'parse_xlsx':
+            return (lambda: _parse_xlsx(io.BytesIO(arquivos['xlsx']))), sem_preparo
+        if caso == 'parse_xls':
+            return (lambda: _parse_xls(io.BytesIO(arquivos['xls']))), sem_preparo
+        if caso == 'parse_html':
+            texto = arquivos['xls'].decode('utf-8')
+            return (lambda: _parse_html_as_sheet(texto)), sem_preparo
+        if caso == 'armazenamento':
+            def armazenar(usuario):
+                _preparar_importacao(MES_BENCHMARK, registros, 'benchmark.csv', usuario)
+            return armazenar, lambda: (_usuario_benchmark(),)
+        if caso == 'confirmacao':
+            def pendente():
+                usuario = _usuario_benchmark()
+                return _preparar_importacao(MES_BENCHMARK, registros, 'benchmark.csv', usuario), usuario
+
+            def confirmar(importacao, usuario):
+                pendentes = _registros_pendentes(importacao)
+                gravar_producao_mensal(importacao, pendentes, usuario)
+            return confirmar, pendente
+        if caso == 'cirurgia_upload':
+            conteudo = caminho_cirurgias.read_bytes()
+
+            def logado():
+                cliente = Client()
+                cliente.force_login(_usuario_benchmark())
+                return (cliente,)
+
+            def enviar(cliente):
+                arquivo = io.BytesIO(conteudo)
+                arquivo.name = 'cirurgias.csv'
+                resposta = cliente.post('/config/cirurgias/upload/', {'arquivo_csv': arquivo})
+                if resposta.status_code != 302:
+                    raise CommandError(f'Upload de cirurgias respondeu {resposta.status_code}.')
+            return enviar, logado
+        raise CommandError(f'Caso desconhecido: {caso}')
+
+    def _comparar(self, anterior, atual, tolerancia):
+        if anterior.get('versao') != VERSAO_FORMATO:
+            raise CommandError('O JSON anterior é de outro formato; gere-o novamente.')
+        antes = {(r['caso'], r['linhas']): r for r in anterior['resultados']}
+        self.stdout.write('')
+        self.stdout.write(
+            f'Comparação com {anterior.get("commit") or "?"} ({anterior.get("gerado_em", "?")[:19]}), '
+            f'tolerância {tolerancia:.0f}%:'
+        )
+        regressoes = 0
+        for r in atual['resultados']:
+            a = antes.get((r['caso'], r['linhas']))
+            if a is None:
+                continue
+            problemas = []
+            # Mediana anterior na velocidade da máquina de agora
+            ajuste = r['referencia'] / a['referencia']
+            aumento = r['mediana'] - a['mediana'] * ajuste
+            variacao_tempo = aumento / (a['mediana'] * ajuste) * 100 if a['mediana'] else 0
+            ruido = max(DISPERSOES_REGRESSAO * (r['dispersao'] + a['dispersao'] * ajuste), MINIMO_SEGUNDOS)
+            if variacao_tempo > tolerancia and aumento > ruido:
+                problemas.append('tempo')
+            variacao_memoria = None
+            if r['pico_memoria'] and a.get('pico_memoria'):
+                variacao_memoria = (r['pico_memoria'] - a['pico_memoria']) / a['pico_memoria'] * 100
+                if variacao_memoria > tolerancia:
+                    problemas.append('memória')
+            if r['consultas'] > a['consultas']:
+                problemas.append('consultas')
+            memoria = f'{variacao_memoria:+6.1f}%' if variacao_memoria is not None else f'{"-":>7}'
+            linha = (
+                f'{r["caso"]:<16} {r["linhas"]:>8}  mediana {variacao_tempo:+6.1f}% '
+                f'({aumento * 1000:+.0f} ms, ruído {ruido * 1000:.0f} ms)  memória {memoria}  '
+                f'consultas {a["consultas"]} → {r["consultas"]}'
+            )
+            if problemas:
+                regressoes += 1
+                self.stdout.write(self.style.ERROR(f'{linha}  REGRESSÃO ({", ".join(problemas)})'))
+            else:
+                self.stdout.write(linha)
+        if regressoes:
+            raise CommandError(f'{regressoes} caso(s) com regressão.')
+        self.stdout.write(self.style.SUCCESS('Sem regressões.'))
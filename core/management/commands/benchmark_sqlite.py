@@ -0,0 +1,203 @@
+"""
+Benchmark de concorrência do SQLite: leituras do dashboard durante uma importação.
+
+Uso:
+
+    python manage.py benchmark_sqlite --linhas 20000 --leitores 4
+
+Para cada configuração (rollback journal padrão e os PRAGMAs de
+SQLITE_PRAGMAS) cria um banco temporário, grava um histórico de produção e
+mede a latência de `producao_dashboard` em vários processos leitores (como
+workers de um servidor de aplicação) enquanto o processo principal executa
+`gravar_producao_mensal` com um mês grande. Onde `fork` não está disponível
+(Windows) os leitores rodam em threads.
+"""
+import multiprocessing
+import queue
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client
+from django.test.utils import override_settings
+
+from core.models import ImportacaoProducao, ProducaoMensal, Usuario
+from core.views import gravar_producao_mensal
+
+
+CONFIGURACOES = {
+    'padrao': {'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+    'ajustado': None,  # settings.SQLITE_PRAGMAS
+}
+
+
+def _registros(quantidade):
+    return [
+        {
+            'especialidade': f'Especialidade {i:06d}',
+            'vagas_ofertadas': 100,
+            'total_agendamentos': 90,
+            'perc_agendamentos': '90.00',
+            'agendamentos_cota': 60,
+            'perc_cota': '60.00',
+            'vagas_bolsao': 20,
+            'perc_bolsao': '20.00',
+            'vagas_nao_distribuidas': 10,
+            'perc_nao_distribuidas': '10.00',
+            'vagas_extras': 5,
+            'perc_extras': '5.00',
+            'perc_desperdicadas': '3.00',
+        }
+        for i in range(quantidade)
+    ]
+
+
+def _importar(mes_ano, registros, usuario):
+    importacao = ImportacaoProducao.objects.create(mes_ano=mes_ano, enviado_por=usuario)
+    gravar_producao_mensal(importacao, registros, usuario)
+
+
+def _paralelismo():
+    """Retorna (classe de worker, Event, Queue): processos com fork ou threads."""
+    if 'fork' in multiprocessing.get_all_start_methods():
+        contexto = multiprocessing.get_context('fork')
+        return contexto.Process, contexto.Event, contexto.Queue
+    return threading.Thread, threading.Event, queue.Queue
+
+
+def _leitor(cliente, importando, fim, resultados):
+    latencias, erros = [], 0
+    importando.wait()
+    try:
+        while not fim.is_set():
+            inicio = time.perf_counter()
+            try:
+                # Mês do histórico: o mês importado só aparece após o commit e
+                # renderizá-lo mediria o template, não o banco.
+                ok = cliente.get('/producao/dashboard/', {'mes': '2000-01-01'}).status_code == 200
+            except Exception:
+                ok = False
+            if ok:
+                latencias.append((time.perf_counter() - inicio) * 1000)
+            else:
+                erros += 1
+    finally:
+        connections.close_all()
+        resultados.put((latencias, erros))
+
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+class Command(BaseCommand):
+    help = 'Mede a latência de leitura do dashboard durante uma importação grande no SQLite.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=20000, help='Registros do mês importado')
+        parser.add_argument('--historico', type=int, default=12, help='Meses de histórico pré-existente')
+        parser.add_argument('--leitores', type=int, default=4, help='Threads lendo o dashboard')
+
+    def handle(self, *args, **options):
+        if connections[DEFAULT_DB_ALIAS].vendor != 'sqlite':
+            raise CommandError('Este benchmark só se aplica ao SQLite.')
+
+        resultados = {}
+        with tempfile.TemporaryDirectory() as diretorio:
+            for nome, pragmas in CONFIGURACOES.items():
+                arquivo = Path(diretorio) / f'{nome}.sqlite3'
+                with override_settings(
+                    SQLITE_PRAGMAS=pragmas if pragmas is not None else settings.SQLITE_PRAGMAS,
+                    # Sem cache: toda leitura do dashboard vai ao banco
+                    CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+                    ALLOWED_HOSTS=['testserver'],
+                ):
+                    resultados[nome] = self._executar(arquivo, options)
+
+        self.stdout.write('')
+        self.stdout.write(
+            f'{"config":<10} {"leituras":>9} {"p50 ms":>8} {"p95 ms":>8} {"máx ms":>8} '
+            f'{"erros":>6} {"import s":>9}  importação'
+        )
+        for nome, r in resultados.items():
+            self.stdout.write(
+                f'{nome:<10} {r["leituras"]:>9} {r["p50"]:>8.1f} {r["p95"]:>8.1f} '
+                f'{r["max"]:>8.1f} {r["erros"]:>6} {r["importacao"]:>9.2f}  '
+                + ('ok' if r['importacao_ok'] else f'FALHOU ({r["falha"]})')
+            )
+
+    def _executar(self, arquivo, options):
+        nome_original = connections.settings[DEFAULT_DB_ALIAS]['NAME']
+        connections[DEFAULT_DB_ALIAS].close()
+        connections.settings[DEFAULT_DB_ALIAS]['NAME'] = str(arquivo)
+        try:
+            return self._medir(options)
+        finally:
+            connections[DEFAULT_DB_ALIAS].close()
+            connections.settings[DEFAULT_DB_ALIAS]['NAME'] = nome_original
+
+    def _medir(self, options):
+        call_command('migrate', verbosity=0, interactive=False)
+        usuario = Usuario.objects.create_user(
+            'benchmark', 'benchmark@farol.local', 'benchmark',
+            nome_completo='Benchmark', cpf='000.000.000-00', primeiro_acesso=False,
+        )
+        for i in range(options['historico']):
+            _importar(date(2000 + i // 12, i % 12 + 1, 1), _registros(200), usuario)
+        registros = _registros(options['linhas'])
+
+        Worker, Event, Queue = _paralelismo()
+        importando, fim, resultados = Event(), Event(), Queue()
+        clientes = [Client() for _ in range(options['leitores'])]
+        for cliente in clientes:
+            cliente.force_login(usuario)
+        # Processos filhos não podem herdar a conexão aberta do pai
+        connections.close_all()
+        leitores = [
+            Worker(target=_leitor, args=(cliente, importando, fim, resultados))
+            for cliente in clientes
+        ]
+        for leitor in leitores:
+            leitor.start()
+
+        falha_importacao = ''
+        importando.set()
+        inicio = time.perf_counter()
+        try:
+            _importar(date(2100, 1, 1), registros, usuario)
+        except Exception as e:
+            falha_importacao = str(e)
+        duracao_importacao = time.perf_counter() - inicio
+        # Mantém as leituras por mais um instante para capturar o pós-commit
+        time.sleep(0.5)
+        fim.set()
+
+        latencias, erros = [], 0
+        for _ in leitores:
+            parciais, erros_parciais = resultados.get()
+            latencias.extend(parciais)
+            erros += erros_parciais
+        for leitor in leitores:
+            leitor.join()
+
+        importados = ProducaoMensal.objects.filter(mes_ano=date(2100, 1, 1)).count()
+        return {
+            'leituras': len(latencias),
+            'p50': statistics.median(latencias) if latencias else 0.0,
+            'p95': _percentil(latencias, 0.95),
+            'max': max(latencias, default=0.0),
+            'erros': erros,
+            'importacao': duracao_importacao,
+            'importacao_ok': not falha_importacao and importados == options['linhas'],
+            'falha': falha_importacao,
+        }
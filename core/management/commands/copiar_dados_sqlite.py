@@ -0,0 +1,112 @@
+"""
+Copia todos os dados de um arquivo SQLite para o banco configurado.
+
+Uso (após `python manage.py migrate` no banco de destino):
+
+    python manage.py copiar_dados_sqlite db.sqlite3
+
+O banco de destino é esvaziado e recebe uma cópia exata da origem, em lotes
+com `bulk_create`, dentro de uma única transação.
+"""
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.core.management.sql import sql_flush
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.db.migrations.recorder import MigrationRecorder
+
+from core.cache import incrementar_versao
+from core.signals import MODELOS_CACHEAVEIS
+
+
+ALIAS_ORIGEM = 'sqlite_origem'
+
+
+def _lotes(iteravel, tamanho):
+    iterador = iter(iteravel)
+    while lote := list(islice(iterador, tamanho)):
+        yield lote
+
+
+@contextmanager
+def _sem_auto_now(modelos):
+    """Preserva as datas originais: auto_now/auto_now_add sobrescreveriam no bulk_create."""
+    campos = [
+        (campo, campo.auto_now, campo.auto_now_add)
+        for modelo in modelos
+        for campo in modelo._meta.local_fields
+        if isinstance(campo, models.DateField) and (campo.auto_now or campo.auto_now_add)
+    ]
+    for campo, _, _ in campos:
+        campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, auto_now, auto_now_add in campos:
+            campo.auto_now, campo.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = 'Copia os dados de um arquivo SQLite para o banco configurado (ex.: migração para PostgreSQL).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Caminho do arquivo SQLite de origem')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Alias do banco de destino')
+        parser.add_argument('--lote', type=int, default=2000, help='Registros por INSERT')
+
+    def handle(self, *args, **options):
+        arquivo = Path(options['arquivo'])
+        destino = options['database']
+        tamanho_lote = options['lote']
+
+        if not arquivo.exists():
+            raise CommandError(f'Arquivo não encontrado: {arquivo}')
+        if Path(str(connections[destino].settings_dict['NAME'])).resolve() == arquivo.resolve():
+            raise CommandError('A origem e o destino são o mesmo arquivo.')
+
+        connections.settings[ALIAS_ORIGEM] = connections.configure_settings({
+            **connections.settings,
+            ALIAS_ORIGEM: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(arquivo)},
+        })[ALIAS_ORIGEM]
+
+        aplicadas_origem = set(MigrationRecorder(connections[ALIAS_ORIGEM]).applied_migrations())
+        aplicadas_destino = set(MigrationRecorder(connections[destino]).applied_migrations())
+        if aplicadas_origem != aplicadas_destino:
+            faltando = sorted('.'.join(m) for m in aplicadas_origem ^ aplicadas_destino)
+            raise CommandError(
+                'Origem e destino não estão na mesma versão do esquema. '
+                f'Execute `migrate` em ambos. Divergências: {", ".join(faltando)}'
+            )
+
+        modelos = [
+            modelo for modelo in apps.get_models(include_auto_created=True)
+            if modelo._meta.managed and not modelo._meta.proxy
+        ]
+        conexao = connections[destino]
+
+        # As FKs são DEFERRABLE INITIALLY DEFERRED: a ordem das tabelas não importa
+        # dentro da transação, apenas no commit.
+        with transaction.atomic(using=destino), _sem_auto_now(modelos):
+            conexao.ops.execute_sql_flush(sql_flush(no_style(), conexao))
+
+            for modelo in modelos:
+                origem = modelo._base_manager.using(ALIAS_ORIGEM).order_by('pk')
+                total = 0
+                for lote in _lotes(origem.iterator(chunk_size=tamanho_lote), tamanho_lote):
+                    modelo._base_manager.using(destino).bulk_create(lote, batch_size=tamanho_lote)
+                    total += len(lote)
+                if total:
+                    self.stdout.write(f'  {modelo._meta.label}: {total} registro(s)')
+
+            with conexao.cursor() as cursor:
+                for sql in conexao.ops.sequence_reset_sql(no_style(), modelos):
+                    cursor.execute(sql)
+
+        for modelo in MODELOS_CACHEAVEIS:
+            incrementar_versao(modelo)
+
+        self.stdout.write(self.style.SUCCESS(f'Dados copiados de {arquivo} para o banco "{destino}".'))
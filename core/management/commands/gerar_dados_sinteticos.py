@@ -0,0 +1,139 @@
+"""
+Preenche o banco com dados sintéticos para testes de escala.
+
+Uso:
+
+    python manage.py gerar_dados_sinteticos [--usuarios 50] [--empresas 200] [--medicos 2000]
+        [--cirurgias 5000] [--exames 5000] [--servicos 2000]
+        [--especialidades 120] [--meses 36] [--ultimo-mes 2026-01]
+        [--planilhas DIR --linhas 500 --formatos xlsx,xls,csv] [--semente 42]
+
+Com os padrões grava cerca de 18 mil registros; para passar de um milhão,
+aumente a produção (ex.: `--especialidades 20000 --meses 60`) ou os cadastros.
+Os registros são gravados com `bulk_create` em lotes de `--lote`, os usuários
+com a senha `sintetico123`. Use `0` para pular um cadastro.
+
+`--planilhas DIR` escreve planilhas de produção de `--linhas` especialidades
+para o mês seguinte ao `--ultimo-mes`, nos formatos pedidos, prontas para o
+upload; com `--somente-planilhas` o banco não é alterado.
+
+Por segurança só roda com DEBUG=True, a não ser com `--forcar`.
+"""
+import random
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import sinteticos
+from core.anomalias import recalcular_anomalias
+from core.models import Usuario
+from core.previsao import previsao
+
+
+def _mes(valor):
+    try:
+        return datetime.strptime(valor, '%Y-%m').date()
+    except ValueError:
+        raise CommandError(f'Mês inválido: {valor!r}. Use AAAA-MM.')
+
+
+class Command(BaseCommand):
+    help = 'Gera cadastros, histórico de produção e planilhas sintéticas para testes de escala'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=50)
+        parser.add_argument('--empresas', type=int, default=200)
+        parser.add_argument('--medicos', type=int, default=2000)
+        parser.add_argument('--cirurgias', type=int, default=5000)
+        parser.add_argument('--exames', type=int, default=5000)
+        parser.add_argument('--servicos', type=int, default=2000)
+        parser.add_argument('--especialidades', type=int, default=120, help='Especialidades por mês de produção')
+        parser.add_argument('--meses', type=int, default=36, help='Meses de histórico de produção')
+        parser.add_argument(
+            '--ultimo-mes', type=_mes, default=None,
+            help='Último mês do histórico, AAAA-MM (padrão: mês anterior ao atual)',
+        )
+        parser.add_argument('--planilhas', type=Path, default=None, help='Diretório das planilhas geradas')
+        parser.add_argument('--linhas', type=int, default=None, help='Especialidades por planilha (padrão: --especialidades)')
+        parser.add_argument('--formatos', default='xlsx,xls,csv', help='Formatos das planilhas, separados por vírgula')
+        parser.add_argument('--somente-planilhas', action='store_true', help='Só escreve as planilhas')
+        parser.add_argument('--lote', type=int, default=5000, help='Registros por INSERT')
+        parser.add_argument('--semente', type=int, default=42)
+        parser.add_argument('--forcar', action='store_true', help='Permite rodar com DEBUG=False')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['forcar']:
+            raise CommandError('DEBUG=False: use --forcar para gerar dados sintéticos neste banco.')
+        if options['lote'] < 1:
+            raise CommandError('--lote deve ser positivo.')
+        formatos = [f.strip().lower() for f in options['formatos'].split(',') if f.strip()]
+        invalidos = set(formatos) - set(sinteticos.ESCRITORES)
+        if invalidos:
+            raise CommandError(f'Formatos desconhecidos: {", ".join(sorted(invalidos))}.')
+        if options['somente_planilhas'] and not options['planilhas']:
+            raise CommandError('--somente-planilhas exige --planilhas.')
+
+        rng = random.Random(options['semente'])
+        lote = options['lote']
+        hoje = date.today()
+        ultimo = options['ultimo_mes'] or sinteticos.meses_ate(hoje.replace(day=1), 2)[0]
+        especialidades = [sinteticos.nome_especialidade(i) for i in range(options['especialidades'])]
+        inicio = time.perf_counter()
+
+        if not options['somente_planilhas']:
+            self._gerar_banco(options, rng, lote, ultimo, especialidades)
+
+        if options['planilhas']:
+            self._gerar_planilhas(options, rng, ultimo, formatos)
+
+        self.stdout.write(self.style.SUCCESS(f'Concluído em {time.perf_counter() - inicio:.1f} s.'))
+
+    def _etapa(self, nome, gerar, *args):
+        inicio = time.perf_counter()
+        total = gerar(*args)
+        decorrido = time.perf_counter() - inicio
+        taxa = total / decorrido if decorrido else 0
+        self.stdout.write(f'  {nome:<16} {total:>10} registros  {decorrido:8.1f} s  ({taxa:,.0f}/s)')
+        return total
+
+    def _gerar_banco(self, options, rng, lote, ultimo, especialidades):
+        self.stdout.write('Gravando no banco:')
+        self._etapa('usuários', sinteticos.gerar_usuarios, options['usuarios'], rng, lote)
+        # Os cadastros e a produção ficam no nome dos usuários sintéticos (ou de ninguém)
+        usuarios = list(Usuario.objects.filter(username__startswith='sintetico').values_list('pk', flat=True))
+        nomes_cadastro = especialidades or sinteticos.ESPECIALIDADES
+        self._etapa('empresas', sinteticos.gerar_empresas, options['empresas'], rng, lote, usuarios)
+        self._etapa('médicos', sinteticos.gerar_medicos, options['medicos'], rng, lote, usuarios, nomes_cadastro)
+        self._etapa('cirurgias', sinteticos.gerar_cirurgias, options['cirurgias'], rng, lote, usuarios, nomes_cadastro)
+        self._etapa('exames', sinteticos.gerar_exames, options['exames'], rng, lote, usuarios)
+        self._etapa('serviços', sinteticos.gerar_servicos, options['servicos'], rng, lote, usuarios, nomes_cadastro)
+
+        if options['meses'] > 0 and especialidades:
+            meses = sinteticos.meses_ate(ultimo, options['meses'])
+            usuario = rng.choice(usuarios) if usuarios else None
+            self._etapa('produção', sinteticos.gerar_producao, meses, especialidades, rng, lote, usuario)
+            inicio = time.perf_counter()
+            recalcular_anomalias()
+            previsao()
+            self.stdout.write(f'  anomalias e previsão recalculadas em {time.perf_counter() - inicio:.1f} s')
+
+    def _gerar_planilhas(self, options, rng, ultimo, formatos):
+        diretorio = options['planilhas']
+        diretorio.mkdir(parents=True, exist_ok=True)
+        linhas = options['linhas'] if options['linhas'] is not None else options['especialidades']
+        indice = ultimo.year * 12 + ultimo.month  # mês seguinte ao último do histórico
+        mes_ano = date(indice // 12, indice % 12 + 1, 1)
+        registros = sinteticos.registros_producao(
+            mes_ano, [sinteticos.nome_especialidade(i) for i in range(linhas)], rng
+        )
+        self.stdout.write(f'Planilhas de {mes_ano:%m/%Y} com {linhas} linhas:')
+        for formato in formatos:
+            caminho = diretorio / f'producao_{mes_ano:%Y_%m}_{linhas}.{formato}'
+            inicio = time.perf_counter()
+            sinteticos.ESCRITORES[formato](caminho, mes_ano, registros)
+            self.stdout.write(
+                f'  {caminho}  {caminho.stat().st_size / 1024:,.0f} KiB  {time.perf_counter() - inicio:.1f} s'
+            )
@@ -0,0 +1,89 @@
+"""
+Remove importações de produção que não serão mais usadas.
+
+Uso:
+
+    python manage.py limpar_importacoes [--manter 3] [--simular]
+
+Para cada mês, mantém a importação ativa e as `--manter` importações
+anteriores mais recentes (padrão: PRODUCAO_IMPORTACOES_RETIDAS), que podem
+ser reativadas na página de importações. As demais são excluídas com os seus
+registros de produção, assim como importações nunca confirmadas cuja sessão
+já expirou. Pode ser agendado (cron) sem afetar o que é exibido.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import ProtectedError
+from django.utils import timezone
+
+from core.cache import invalidar
+from core.models import ImportacaoProducao, ProducaoMensal
+
+
+class Command(BaseCommand):
+    help = 'Exclui importações de produção inativas além da retenção e pendentes expiradas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--manter', type=int, default=settings.PRODUCAO_IMPORTACOES_RETIDAS,
+            help='Importações anteriores (inativas) mantidas por mês',
+        )
+        parser.add_argument('--simular', action='store_true', help='Apenas informa o que seria excluído')
+
+    def handle(self, *args, **options):
+        manter = options['manter']
+        if manter < 0:
+            raise CommandError('--manter não pode ser negativo.')
+
+        inativas = (
+            ImportacaoProducao.objects.filter(confirmado_em__isnull=False, mes_ativo__isnull=True)
+            .order_by('mes_ano', '-criado_em')
+            .values_list('pk', 'mes_ano')
+        )
+        excluir, retidas_por_mes = [], {}
+        for pk, mes_ano in inativas:
+            retidas_por_mes[mes_ano] = retidas_por_mes.get(mes_ano, 0) + 1
+            if retidas_por_mes[mes_ano] > manter:
+                excluir.append(pk)
+
+        limite = timezone.now() - timedelta(seconds=settings.SESSION_COOKIE_AGE)
+        pendentes = ImportacaoProducao.objects.filter(confirmado_em__isnull=True, criado_em__lt=limite)
+
+        registros = ProducaoMensal.todas.filter(importacao__in=excluir).count()
+        self.stdout.write(
+            f'{len(excluir)} importação(ões) inativa(s) ({registros} registro(s) de produção) '
+            f'e {pendentes.count()} pendente(s) expirada(s).'
+        )
+        if options['simular']:
+            return
+
+        try:
+            with transaction.atomic():
+                # Sem as reativadas desde a contagem
+                lotes = list(
+                    ImportacaoProducao.objects.filter(pk__in=excluir, mes_ativo__isnull=True)
+                    .values_list('pk', flat=True)
+                )
+                # Um DELETE só para os registros de produção: em cascata, o Django
+                # carregaria cada registro para emitir post_delete (core/signals.py)
+                if lotes:
+                    tabela = connection.ops.quote_name(ProducaoMensal._meta.db_table)
+                    coluna = connection.ops.quote_name(ProducaoMensal._meta.get_field('importacao').column)
+                    with connection.cursor() as cursor:
+                        cursor.execute(
+                            f'DELETE FROM {tabela} WHERE {coluna} IN ({", ".join(["%s"] * len(lotes))})', lotes
+                        )
+                # Uma importação reativada entre a consulta acima e esta exclusão é
+                # protegida por MesProducao.importacao_ativa (PROTECT) e desfaz tudo
+                ImportacaoProducao.objects.filter(pk__in=lotes).delete()
+                pendentes.delete()
+                if lotes:
+                    invalidar(ProducaoMensal)
+        except ProtectedError:
+            raise CommandError(
+                'Uma importação foi reativada durante a limpeza; nada foi excluído. Execute o comando novamente.'
+            )
+        self.stdout.write(self.style.SUCCESS('Importações excluídas.'))
@@ -0,0 +1,21 @@
+"""
+Recalcula a tabela de anomalias da produção.
+
+Uso:
+
+    python manage.py recalcular_anomalias
+
+A tabela já é recalculada após cada importação; use o comando depois de
+alterar PRODUCAO_ANOMALIA_* ou de unificar especialidades.
+"""
+from django.core.management.base import BaseCommand
+
+from core.anomalias import recalcular_anomalias
+
+
+class Command(BaseCommand):
+    help = 'Recalcula as anomalias do histórico de produção'
+
+    def handle(self, *args, **options):
+        total = recalcular_anomalias()
+        self.stdout.write(self.style.SUCCESS(f'{total} anomalia(s) encontrada(s).'))
@@ -0,0 +1,197 @@
+"""
+Teste de carga com usuários simultâneos contra um servidor local.
+
+Uso:
+
+    python manage.py teste_carga --url http://127.0.0.1:8000 --usuarios-sinteticos
+        [--usuarios 20] [--rampa 2] [--duracao 60] [--pausa 1]
+        [--mix dashboard=35,listas=30,producao=25,login=5,upload=5] [--rajada 30]
+        [--saida resultado.json]
+
+    python manage.py teste_carga --usuario admin --senha ... --mix dashboard=50,listas=30,producao=20
+
+Sobe `--usuarios` usuários virtuais (threads), `--rampa` por segundo, cada um
+com a própria sessão, executando as ações do mix (veja `core/carga.py`) por
+`--duracao` segundos. `--usuarios-sinteticos` usa as contas criadas por
+`gerar_dados_sinteticos` (uma por usuário virtual) em vez de `--usuario`.
+`--rajada N` faz todos os usuários virtuais enviarem e confirmarem uma
+planilha ao mesmo tempo, N segundos após o início (fechamento do mês).
+
+Com uploads (`upload` no mix ou `--rajada`), cada usuário virtual precisa de
+uma conta só dele: o upload descarta a importação pendente anterior da mesma
+conta, e usuários virtuais dividindo `--usuario` excluiriam as importações uns
+dos outros antes da confirmação. Nesse caso o comando exige
+`--usuarios-sinteticos` com ao menos `--usuarios` contas.
+
+O relatório traz, por endpoint, requisições, taxa de erro e latências p50,
+p95 e p99. `--saida` grava o mesmo relatório em JSON, com os parâmetros, para
+comparar configurações (workers, banco, PRAGMAs do SQLite...).
+
+Os uploads gravam produção de meses a partir de 2090 no banco do servidor:
+use uma instância de teste.
+"""
+import json
+import platform
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core import carga
+from core.models import Usuario
+from core.sinteticos import SENHA_PADRAO
+
+
+def _mix(valor):
+    mix = {}
+    for parte in valor.split(','):
+        if not parte.strip():
+            continue
+        nome, _, peso = parte.partition('=')
+        nome = nome.strip()
+        if nome not in carga.ACOES:
+            raise CommandError(f'Ação desconhecida no mix: {nome!r} (use {", ".join(carga.ACOES)}).')
+        try:
+            mix[nome] = float(peso)
+        except ValueError:
+            raise CommandError(f'Peso inválido para {nome!r}: {peso!r}.')
+    if not mix or sum(mix.values()) <= 0:
+        raise CommandError('O mix precisa de ao menos uma ação com peso positivo.')
+    return mix
+
+
+class Command(BaseCommand):
+    help = 'Simula usuários simultâneos contra um servidor e mede latência e erros por endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Endereço do servidor')
+        parser.add_argument('--usuario', help='Conta usada por todos os usuários virtuais')
+        parser.add_argument('--senha')
+        parser.add_argument('--usuarios-sinteticos', action='store_true',
+                            help='Uma conta de gerar_dados_sinteticos por usuário virtual')
+        parser.add_argument('--usuarios', type=int, default=20, help='Usuários virtuais')
+        parser.add_argument('--rampa', type=float, default=2.0, help='Usuários virtuais iniciados por segundo')
+        parser.add_argument('--duracao', type=float, default=60.0, help='Duração do teste, em segundos')
+        parser.add_argument('--pausa', type=float, default=1.0, help='Pausa média entre ações, em segundos')
+        parser.add_argument('--mix', type=_mix, default=dict(carga.MIX_PADRAO), help='Pesos das ações')
+        parser.add_argument('--rajada', type=float, help='Segundos até todos enviarem uma planilha ao mesmo tempo')
+        parser.add_argument('--linhas-upload', type=int, default=carga.LINHAS_UPLOAD)
+        parser.add_argument('--timeout', type=float, default=30.0, help='Tempo máximo por requisição')
+        parser.add_argument('--saida', type=Path, help='Arquivo JSON com o relatório')
+
+    def handle(self, *args, **options):
+        if options['usuarios'] < 1 or options['rampa'] <= 0 or options['duracao'] <= 0:
+            raise CommandError('--usuarios, --rampa e --duracao devem ser positivos.')
+        precisa_planilha = options['mix'].get('upload', 0) > 0 or options['rajada'] is not None
+        credenciais = self._credenciais(options, precisa_planilha)
+
+        estatisticas = carga.Estatisticas()
+        rajada = threading.Event() if options['rajada'] is not None else None
+        inicio = time.monotonic()
+        fim = inicio + options['duracao']
+        usuarios = []
+        with tempfile.TemporaryDirectory() as diretorio:
+            self.stdout.write(
+                f'{options["usuarios"]} usuários virtuais contra {options["url"]}, '
+                f'{options["rampa"]:g}/s, por {options["duracao"]:g} s...'
+            )
+            for indice in range(options['usuarios']):
+                # Rampa: o usuário `indice` começa em indice / rampa segundos
+                espera = inicio + indice / options['rampa'] - time.monotonic()
+                if espera > 0:
+                    time.sleep(espera)
+                if time.monotonic() >= fim:
+                    break
+                planilha = (
+                    carga.planilha_upload(indice, Path(diretorio), options['linhas_upload'])
+                    if precisa_planilha else None
+                )
+                usuario = carga.UsuarioVirtual(
+                    indice, options['url'], credenciais[indice % len(credenciais)], options['mix'],
+                    options['pausa'], fim, estatisticas, options['timeout'], planilha, rajada,
+                )
+                usuario.start()
+                usuarios.append(usuario)
+
+            if rajada is not None:
+                espera = inicio + options['rajada'] - time.monotonic()
+                if espera > 0:
+                    time.sleep(espera)
+                rajada.set()
+            for usuario in usuarios:
+                usuario.join(max(fim - time.monotonic(), 0) + options['timeout'])
+        decorrido = time.monotonic() - inicio
+
+        resumo = estatisticas.resumo()
+        self._imprimir(resumo, decorrido, len(usuarios))
+        if options['saida']:
+            relatorio = {
+                'gerado_em': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'parametros': {
+                    'url': options['url'],
+                    'usuarios': options['usuarios'],
+                    'rampa': options['rampa'],
+                    'duracao': options['duracao'],
+                    'pausa': options['pausa'],
+                    'mix': options['mix'],
+                    'rajada': options['rajada'],
+                    'linhas_upload': options['linhas_upload'],
+                },
+                'segundos': decorrido,
+                'endpoints': resumo,
+            }
+            options['saida'].write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding='utf-8')
+            self.stdout.write(f'Relatório gravado em {options["saida"]}.')
+
+    def _credenciais(self, options, uploads):
+        """(usuário, senha) de cada conta; com `uploads`, uma conta por usuário virtual."""
+        if options['usuarios_sinteticos']:
+            nomes = list(
+                Usuario.objects.filter(username__startswith='sintetico', is_active=True)
+                .order_by('pk').values_list('username', flat=True)[:options['usuarios']]
+            )
+            if not nomes:
+                raise CommandError('Nenhum usuário sintético no banco: rode gerar_dados_sinteticos antes.')
+            if uploads and len(nomes) < options['usuarios']:
+                raise CommandError(
+                    f'Só há {len(nomes)} usuário(s) sintético(s) para {options["usuarios"]} usuários virtuais; '
+                    'com uploads, cada um precisa de uma conta própria. Gere mais com '
+                    f'gerar_dados_sinteticos --usuarios {options["usuarios"]} ou reduza --usuarios.'
+                )
+            return [(nome, SENHA_PADRAO) for nome in nomes]
+        if uploads:
+            raise CommandError(
+                'Com upload no mix ou --rajada, use --usuarios-sinteticos: usuários virtuais na mesma conta '
+                'excluiriam as importações pendentes uns dos outros. Sem uploads, tire `upload` do --mix.'
+            )
+        if not options['usuario'] or options['senha'] is None:
+            raise CommandError('Informe --usuario e --senha ou use --usuarios-sinteticos.')
+        return [(options['usuario'], options['senha'])]
+
+    def _imprimir(self, resumo, decorrido, usuarios):
+        total = sum(linha['requisicoes'] for linha in resumo)
+        erros = sum(linha['erros'] for linha in resumo)
+        self.stdout.write('')
+        self.stdout.write(
+            f'{"endpoint":<28} {"req":>6} {"erros":>6} {"% erro":>7} {"p50 ms":>8} {"p95 ms":>8} '
+            f'{"p99 ms":>8} {"máx ms":>8}'
+        )
+        for linha in resumo:
+            texto = (
+                f'{linha["endpoint"]:<28} {linha["requisicoes"]:>6} {linha["erros"]:>6} '
+                f'{linha["taxa_erro"]:>7.1f} {linha["p50"]:>8.1f} {linha["p95"]:>8.1f} '
+                f'{linha["p99"]:>8.1f} {linha["maximo"]:>8.1f}'
+            )
+            if linha['erros']:
+                self.stdout.write(self.style.WARNING(f'{texto}  ({linha["exemplo_erro"]})'))
+            else:
+                self.stdout.write(texto)
+        self.stdout.write('')
+        self.stdout.write(
+            f'{total} requisições de {usuarios} usuários virtuais em {decorrido:.1f} s '
+            f'({total / decorrido:.1f}/s), {erros} erro(s) ({erros / total * 100 if total else 0:.1f}%).'
+        )
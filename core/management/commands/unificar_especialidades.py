@@ -0,0 +1,76 @@
+"""
+Unifica grafias diferentes de uma mesma especialidade.
+
+Uso:
+
+    python manage.py unificar_especialidades "Ortopedia" "Ortopedia e Traumatologia" "Traumato"
+
+O primeiro nome é a especialidade de destino; os demais passam a ser aliases
+dela. Médicos, procedimentos e produção que apontavam para as especialidades
+de origem são transferidos com um UPDATE por modelo, e importações futuras com
+essas grafias já são resolvidas para o destino. As anomalias da produção são
+recalculadas ao final.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.anomalias import recalcular_anomalias
+from core.cache import invalidar
+from core.especialidades import normalizar_especialidade, resolver_especialidade
+from core.models import (
+    AliasEspecialidade, Cirurgia, Especialidade, Medico, ProducaoMensal, ServicoMedico,
+)
+
+
+MODELOS_COM_ESPECIALIDADE = (Medico, Cirurgia, ServicoMedico, ProducaoMensal)
+
+
+class Command(BaseCommand):
+    help = 'Unifica especialidades de origem em uma especialidade de destino'
+
+    def add_arguments(self, parser):
+        parser.add_argument('destino')
+        parser.add_argument('origens', nargs='+')
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        destino_id = resolver_especialidade(options['destino'])
+        if destino_id is None:
+            raise CommandError('Informe um nome de destino válido.')
+        destino = Especialidade.objects.get(pk=destino_id)
+
+        for nome in options['origens']:
+            chave = normalizar_especialidade(nome)
+            if not chave:
+                continue
+            origem = Especialidade.objects.filter(nome_normalizado=chave).first()
+            if origem is None:
+                alias = AliasEspecialidade.objects.filter(nome_normalizado=chave).first()
+                origem = alias.especialidade if alias else None
+            if origem == destino:
+                self.stdout.write(f'"{nome}" já corresponde a {destino}.')
+                continue
+
+            AliasEspecialidade.objects.update_or_create(
+                nome_normalizado=chave, defaults={'especialidade': destino}
+            )
+            if origem is None:
+                self.stdout.write(f'"{nome}" registrado como alias de {destino}.')
+                continue
+
+            AliasEspecialidade.objects.filter(especialidade=origem).update(especialidade=destino)
+            AliasEspecialidade.objects.update_or_create(
+                nome_normalizado=origem.nome_normalizado, defaults={'especialidade': destino}
+            )
+            movidos = sum(
+                modelo._base_manager.filter(especialidade_ref=origem).update(especialidade_ref=destino)
+                for modelo in MODELOS_COM_ESPECIALIDADE
+            )
+            origem.delete()
+            self.stdout.write(f'{origem} unificada em {destino} ({movidos} registro(s)).')
+
+        # update() não dispara post_save
+        for modelo in (*MODELOS_COM_ESPECIALIDADE, Especialidade):
+            invalidar(modelo)
+        # A série de cada especialidade mudou
+        transaction.on_commit(recalcular_anomalias)
@@ -0,0 +1,116 @@
+"""
+Verifica, via EXPLAIN, se as consultas mais frequentes usam índices.
+
+Uso:
+
+    python manage.py verificar_indices
+
+Executa as mesmas consultas das listas, dos dashboards, da exportação e do
+ETag (`core/condicional.py`), captura o SQL gerado e examina o plano de cada
+uma. Termina com erro se alguma consulta percorrer a tabela inteira ou
+precisar ordenar o resultado em memória, o que indica um índice ausente ou que
+deixou de corresponder à consulta (ex.: após mudar um `order_by`).
+
+No PostgreSQL o plano é obtido com `enable_seqscan` e `enable_sort`
+desligados: em tabelas pequenas o planejador prefere varredura sequencial
+mesmo havendo índice, e o que interessa aqui é se o índice pode ser usado.
+"""
+import re
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test.utils import CaptureQueriesContext
+
+from core.condicional import _assinatura_modelo
+from core.models import Cirurgia, Empresa, Exame, Medico, MesProducao, ProducaoMensal, ServicoMedico, Usuario
+from core.signals import MODELOS_CACHEAVEIS
+
+
+CONSULTAS = {
+    'lista de usuários': lambda: list(Usuario.objects.all().order_by('-data_cadastro')),
+    'lista de empresas': lambda: list(Empresa.objects.all().order_by('razao_social')),
+    'lista de médicos': lambda: list(Medico.objects.all().order_by('nome_completo')),
+    'lista de cirurgias': lambda: list(Cirurgia.objects.all().order_by('especialidade', 'descricao')),
+    'lista de exames': lambda: list(Exame.objects.all().order_by('tipo_exame', 'descricao')),
+    'lista de serviços': lambda: list(ServicoMedico.objects.all().order_by('especialidade', 'descricao')),
+    'contagens do dashboard': lambda: [
+        Usuario.objects.count(),
+        Empresa.objects.filter(ativa=True).count(),
+        Medico.objects.filter(ativo=True).count(),
+        Cirurgia.objects.filter(ativa=True).count(),
+        Exame.objects.filter(ativo=True).count(),
+        ServicoMedico.objects.filter(ativo=True).count(),
+    ],
+    'meses da produção': lambda: list(
+        MesProducao.objects.filter(importacao_ativa__isnull=False)
+        .values_list('mes_ano', flat=True).order_by('-mes_ano')
+    ),
+    'produção do mês': lambda: list(
+        ProducaoMensal.objects.filter(mes_ano=date(2000, 1, 1)).order_by('especialidade')
+    ),
+    'exportação da produção': lambda: list(
+        ProducaoMensal.objects.order_by('-mes_ano', 'especialidade').values_list('mes_ano', 'especialidade')
+    ),
+    'ETag': lambda: [_assinatura_modelo(modelo) for modelo in MODELOS_CACHEAVEIS],
+}
+
+# "SCAN tabela" sem "USING ... INDEX" é uma varredura completa da tabela
+_VARREDURA_SQLITE = re.compile(r'^SCAN \S+$')
+
+
+def _problemas_sqlite(cursor, sql):
+    cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+    problemas = []
+    for linha in cursor.fetchall():
+        detalhe = linha[-1]
+        if _VARREDURA_SQLITE.match(detalhe) or 'USE TEMP B-TREE' in detalhe:
+            problemas.append(detalhe)
+    return problemas
+
+
+def _problemas_postgresql(cursor, sql):
+    with transaction.atomic(using=cursor.db.alias):
+        cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute('SET LOCAL enable_sort = off')
+        cursor.execute('EXPLAIN ' + sql)
+        linhas = [linha[0] for linha in cursor.fetchall()]
+    return [
+        linha.strip() for linha in linhas
+        if 'Seq Scan' in linha or re.search(r'(^|->)\s*Sort\b', linha)
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Verifica com EXPLAIN se as consultas frequentes usam índices'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor == 'sqlite':
+            analisar = _problemas_sqlite
+        elif connection.vendor == 'postgresql':
+            analisar = _problemas_postgresql
+        else:
+            raise CommandError(f'Banco não suportado: {connection.vendor}')
+
+        falhas = 0
+        for nome, consulta in CONSULTAS.items():
+            with CaptureQueriesContext(connection) as capturadas:
+                consulta()
+            with connection.cursor() as cursor:
+                for query in capturadas.captured_queries:
+                    problemas = analisar(cursor, query['sql'])
+                    if problemas:
+                        falhas += 1
+                        self.stdout.write(self.style.ERROR(f'{nome}: {query["sql"]}'))
+                        for problema in problemas:
+                            self.stdout.write(f'    {problema}')
+            if options['verbosity'] >= 2:
+                self.stdout.write(f'{nome}: {len(capturadas)} consulta(s)')
+
+        if falhas:
+            raise CommandError(f'{falhas} consulta(s) sem índice adequado')
+        self.stdout.write(self.style.SUCCESS('Todas as consultas usam índices.'))
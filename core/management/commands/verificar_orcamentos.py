@@ -0,0 +1,397 @@
+"""
+Verifica o orçamento de consultas e o tempo de resposta de todas as URLs.
+
+Uso:
+
+    python manage.py verificar_orcamentos [--linhas 20] [--escala 10] [--teto-ms 500]
+
+Popula um banco com dados sintéticos (`core/sinteticos.py`) em dois volumes,
+`--linhas` e `--linhas × --escala` registros por cadastro, e executa cada caso
+de `ROTAS` com um usuário de cada tier (cache desligado, sessão nova a cada
+requisição): um GET de cada URL de `core/urls.py` (o login, sem estar logado)
+e os POSTs de gravação (login, upload e confirmação de planilha, reversão de
+importação). Termina com erro se algum caso:
+
+- responder diferente do esperado para o tier (200, ou redirecionar para a URL
+  prevista): uma view que passa a negar acesso faz menos consultas;
+- fizer mais consultas que o seu orçamento em `ORCAMENTOS`;
+- fizer mais consultas no volume maior que no menor (consultas por linha,
+  como um `{{ medico.cadastrado_por }}` dentro do laço de uma lista);
+- passar de `--teto-ms` (ou do teto próprio em `TETOS_MS`) no volume maior;
+- não estiver em `ROTAS` (toda URL nova precisa de um caso e de um orçamento).
+
+Com SQLite, roda em um banco temporário; nos demais bancos, dentro de uma
+transação desfeita ao final.
+"""
+import csv
+import io
+import random
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+from urllib.parse import urlparse
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core import sinteticos
+from core.anomalias import recalcular_anomalias
+from core.metricas import Medicao
+from core.models import (
+    Cirurgia, Empresa, Exame, ImportacaoCirurgia, ImportacaoProducao, Medico, PerfilRequisicao,
+    ServicoMedico, Usuario,
+)
+from core.previsao import previsao
+from core.urls import urlpatterns
+from core.views import _preparar_importacao
+
+
+# Casos medidos. Cada um acessa a URL `url` de `core/urls.py` (padrão: o nome do caso):
+# - `metodo`: 'GET' (padrão) ou 'POST', com o corpo montado por `_dados()`;
+# - `pk`: chave de `_objetos()` usada no <int:pk>;
+# - `pendente`: põe na sessão uma importação de produção nova, aguardando confirmação;
+# - `anonimo`: sem login (os tiers só mudam as credenciais do POST de login);
+# - `esperado`: resposta de cada tier (1 a 5), ou uma só para todos: 200, ou o nome
+#   da URL para a qual a resposta redireciona (302). Uma view que passa a negar
+#   acesso ou a redirecionar faz menos trabalho e caberia no orçamento sem isso.
+NEGADO_ATE_TIER4 = ('dashboard',) * 4 + (200,)  # tier5_required
+NEGADO_ATE_TIER2 = ('dashboard',) * 2 + (200,) * 3  # pode_cadastrar_usuarios (tier 3+)
+ROTAS = {
+    'login': {'anonimo': True, 'esperado': 200},
+    'logout': {'esperado': 'login'},
+    'trocar_senha': {'esperado': 200},
+    'dashboard': {'esperado': 200},
+    'cadastro_menu': {'esperado': 200},
+    'usuario_lista': {'esperado': NEGADO_ATE_TIER2},
+    'usuario_criar': {'esperado': NEGADO_ATE_TIER2},
+    'empresa_lista': {'esperado': 200},
+    'empresa_criar': {'esperado': 200},
+    'empresa_editar': {'pk': 'empresa', 'esperado': 200},
+    'medico_lista': {'esperado': 200},
+    'medico_criar': {'esperado': 200},
+    'medico_editar': {'pk': 'medico', 'esperado': 200},
+    'admin_menu': {'esperado': NEGADO_ATE_TIER4},
+    'cirurgia_lista': {'esperado': NEGADO_ATE_TIER4},
+    'cirurgia_criar': {'esperado': NEGADO_ATE_TIER4},
+    'cirurgia_editar': {'pk': 'cirurgia', 'esperado': NEGADO_ATE_TIER4},
+    'cirurgia_upload': {'esperado': NEGADO_ATE_TIER4},
+    'cirurgia_upload_resultado': {'pk': 'importacao_cirurgia', 'esperado': NEGADO_ATE_TIER4},
+    'exame_lista': {'esperado': NEGADO_ATE_TIER4},
+    'exame_criar': {'esperado': NEGADO_ATE_TIER4},
+    'exame_editar': {'pk': 'exame', 'esperado': NEGADO_ATE_TIER4},
+    'servico_lista': {'esperado': NEGADO_ATE_TIER4},
+    'servico_criar': {'esperado': NEGADO_ATE_TIER4},
+    'servico_editar': {'pk': 'servico', 'esperado': NEGADO_ATE_TIER4},
+    'consultas_lentas': {'esperado': NEGADO_ATE_TIER4},
+    'perfis': {'esperado': NEGADO_ATE_TIER4},
+    'perfil_detalhe': {'pk': 'perfil', 'esperado': NEGADO_ATE_TIER4},
+    'producao_menu': {'esperado': 200},
+    'producao_upload': {'esperado': 200},
+    'producao_confirmar': {'pendente': True, 'esperado': 200},
+    'producao_confirmar_linhas': {'pendente': True, 'esperado': 200},
+    'producao_dashboard': {'esperado': 200},
+    'producao_exportar': {'esperado': 200},
+    'producao_importacoes': {'esperado': 200},
+    'producao_anomalias': {'esperado': 200},
+    'producao_previsao': {'esperado': 200},
+    'producao_catalogo': {'esperado': NEGADO_ATE_TIER4},
+    'producao_valoracao': {'esperado': NEGADO_ATE_TIER4},
+    'metricas': {'esperado': NEGADO_ATE_TIER4},
+    # Gravações, depois das leituras: a confirmação grava produção do mês MES_UPLOAD
+    'login (POST)': {'url': 'login', 'metodo': 'POST', 'anonimo': True, 'esperado': 'dashboard'},
+    'producao_upload (POST)': {'url': 'producao_upload', 'metodo': 'POST', 'esperado': 'producao_confirmar'},
+    'producao_confirmar (POST)': {
+        'url': 'producao_confirmar', 'metodo': 'POST', 'pendente': True, 'esperado': 'producao_dashboard',
+    },
+    'producao_importacao_ativar (POST)': {
+        'url': 'producao_importacao_ativar', 'metodo': 'POST', 'pk': 'importacao_producao',
+        'esperado': 'producao_importacoes',
+    },
+}
+
+# Máximo de consultas por requisição (pior tier), incluindo sessão e autenticação.
+# Ao subir um número, confira se a consulta nova não depende da quantidade de linhas.
+ORCAMENTOS = {
+    'login': 0,
+    'logout': 4,
+    'trocar_senha': 2,
+    'dashboard': 14,
+    'cadastro_menu': 2,
+    'usuario_lista': 4,
+    'usuario_criar': 2,
+    'empresa_lista': 4,
+    'empresa_criar': 2,
+    'empresa_editar': 3,
+    'medico_lista': 4,
+    'medico_criar': 2,
+    'medico_editar': 3,
+    'admin_menu': 8,
+    'cirurgia_lista': 4,
+    'cirurgia_criar': 2,
+    'cirurgia_editar': 3,
+    'cirurgia_upload': 2,
+    'cirurgia_upload_resultado': 3,
+    'exame_lista': 4,
+    'exame_criar': 2,
+    'exame_editar': 3,
+    'servico_lista': 4,
+    'servico_criar': 2,
+    'servico_editar': 3,
+    'consultas_lentas': 2,
+    'perfis': 3,
+    'perfil_detalhe': 3,
+    'producao_menu': 2,
+    'producao_upload': 2,
+    'producao_confirmar': 4,
+    'producao_confirmar_linhas': 4,
+    'producao_dashboard': 9,
+    'producao_exportar': 3,
+    'producao_importacoes': 3,
+    'producao_anomalias': 4,
+    'producao_previsao': 7,
+    'producao_catalogo': 14,
+    'producao_valoracao': 11,
+    'metricas': 2,
+    'login (POST)': 7,
+    'producao_upload (POST)': 15,
+    # Um INSERT por lote da planilha, recálculo das anomalias e da previsão
+    'producao_confirmar (POST)': 31,
+    'producao_importacao_ativar (POST)': 17,
+}
+
+# Tetos de tempo, em ms, das views que agregam o histórico inteiro (as demais usam --teto-ms)
+TETOS_MS = {
+    'producao_dashboard': 2000,
+    'producao_previsao': 2000,
+    'producao_valoracao': 2000,
+    'producao_catalogo': 2000,
+    # O hash da senha (PBKDF2) é caro de propósito
+    'login (POST)': 2000,
+}
+
+MESES = 3
+LOTE = 1000
+# Mês das importações pendentes e confirmadas pelos casos de gravação
+MES_UPLOAD = date(2100, 1, 1)
+# Linhas da planilha enviada nos POSTs, fixas nos dois volumes: o volume mede o
+# banco, e o custo por linha da planilha (um INSERT por lote) é do benchmark_importacao
+LINHAS_UPLOAD = 50
+SENHA = 'orcamento123'
+
+
+class Command(BaseCommand):
+    help = 'Verifica consultas e tempo de resposta de cada URL, por tier, em dois volumes de dados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=20, help='Registros por cadastro no volume menor')
+        parser.add_argument('--escala', type=int, default=10, help='Multiplicador do volume maior')
+        parser.add_argument('--teto-ms', type=float, default=500.0, help='Tempo máximo de resposta, em ms')
+        parser.add_argument('--semente', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options['linhas'] < 1 or options['escala'] < 2:
+            raise CommandError('--linhas deve ser positivo e --escala maior que 1.')
+        cobertas = {rota.get('url', nome) for nome, rota in ROTAS.items()}
+        sem_rota = [p.name for p in urlpatterns if p.name not in cobertas]
+        sem_rota += [nome for nome in ROTAS if nome not in ORCAMENTOS]
+        if sem_rota:
+            raise CommandError(f'URLs sem caso em ROTAS ou sem orçamento: {", ".join(sem_rota)}.')
+
+        with override_settings(
+            # Sem cache: toda requisição faz o trabalho completo
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+            ALLOWED_HOSTS=['testserver'],
+        ):
+            if connections[DEFAULT_DB_ALIAS].vendor == 'sqlite':
+                with tempfile.TemporaryDirectory() as diretorio:
+                    medidas = self._em_banco_temporario(Path(diretorio) / 'orcamentos.sqlite3', options)
+            else:
+                with transaction.atomic():
+                    medidas = self._medir_volumes(options)
+                    transaction.set_rollback(True)
+
+        if self._relatorio(medidas, options):
+            raise CommandError('Há URLs fora do orçamento.')
+        self.stdout.write(self.style.SUCCESS('Todas as URLs dentro do orçamento.'))
+
+    def _em_banco_temporario(self, arquivo, options):
+        conexao = connections[DEFAULT_DB_ALIAS]
+        nome_original = connections.settings[DEFAULT_DB_ALIAS]['NAME']
+        conexao.close()
+        connections.settings[DEFAULT_DB_ALIAS]['NAME'] = str(arquivo)
+        try:
+            call_command('migrate', verbosity=0, interactive=False)
+            return self._medir_volumes(options)
+        finally:
+            conexao.close()
+            connections.settings[DEFAULT_DB_ALIAS]['NAME'] = nome_original
+
+    def _medir_volumes(self, options):
+        """{volume: {(caso, tier): (consultas, ms, status, destino)}} para os dois volumes."""
+        rng = random.Random(options['semente'])
+        senha = make_password(SENHA)
+        usuarios = {
+            tier: Usuario.objects.create(
+                username=f'orcamento_tier{tier}', email=f'orcamento_tier{tier}@farol.local',
+                nome_completo=f'Orçamento Tier {tier}', cpf=sinteticos.cpf(tier), tier=tier,
+                primeiro_acesso=False, password=senha,
+            )
+            for tier, _ in Usuario.TIER_CHOICES
+        }
+        medidas = {}
+        total = 0
+        for volume in (options['linhas'], options['linhas'] * options['escala']):
+            inicio = time.perf_counter()
+            self._popular(volume - total, volume, rng)
+            total = volume
+            objetos = self._objetos(usuarios, volume, rng)
+            self.stdout.write(f'Volume de {volume} registros populado em {time.perf_counter() - inicio:.1f} s.')
+            medidas[volume] = {
+                (nome, tier): self._acessar(nome, usuario, objetos)
+                for nome in ROTAS
+                for tier, usuario in usuarios.items()
+            }
+        return medidas
+
+    def _popular(self, quantidade, volume, rng):
+        """Acrescenta `quantidade` registros a cada cadastro e refaz a produção com `volume` especialidades."""
+        sinteticos.gerar_usuarios(quantidade, rng, LOTE)
+        autores = list(Usuario.objects.filter(username__startswith='sintetico').values_list('pk', flat=True))
+        especialidades = [sinteticos.nome_especialidade(i) for i in range(volume)]
+        sinteticos.gerar_empresas(quantidade, rng, LOTE, autores)
+        sinteticos.gerar_medicos(quantidade, rng, LOTE, autores, especialidades)
+        sinteticos.gerar_cirurgias(quantidade, rng, LOTE, autores, especialidades)
+        sinteticos.gerar_exames(quantidade, rng, LOTE, autores)
+        sinteticos.gerar_servicos(quantidade, rng, LOTE, autores, especialidades)
+        meses = sinteticos.meses_ate(date.today().replace(day=1), MESES + 1)[:-1]
+        sinteticos.gerar_producao(meses, especialidades, rng, LOTE, rng.choice(autores))
+        recalcular_anomalias()
+        previsao()
+        PerfilRequisicao.objects.bulk_create(
+            PerfilRequisicao(
+                usuario_id=rng.choice(autores), view='dashboard', metodo='GET', caminho='/dashboard/',
+                status=200, duracao=0.1,
+                funcoes=[{'funcao': f'f{i}', 'chamadas': 1, 'total': 0.0, 'acumulado': 0.0} for i in range(10)],
+            )
+            for _ in range(quantidade)
+        )
+
+    def _objetos(self, usuarios, volume, rng):
+        """Chaves usadas nas URLs com <int:pk>, os registros das importações pendentes e a planilha enviada."""
+        importacao_cirurgia = ImportacaoCirurgia.objects.create(
+            nome_arquivo='orcamento.csv', linhas_processadas=volume, sucesso=0, erro=volume,
+            erros=[f'Linha {i}: erro' for i in range(volume)], enviado_por=usuarios[5],
+        )
+        registros = sinteticos.registros_producao(
+            MES_UPLOAD, [sinteticos.nome_especialidade(i) for i in range(LINHAS_UPLOAD)], rng
+        )
+        planilha = io.StringIO()
+        csv.writer(planilha, delimiter=';').writerows(sinteticos.linhas_planilha(MES_UPLOAD, registros))
+        return {
+            'empresa': Empresa.objects.values_list('pk', flat=True).first(),
+            'medico': Medico.objects.values_list('pk', flat=True).first(),
+            'cirurgia': Cirurgia.objects.values_list('pk', flat=True).first(),
+            'exame': Exame.objects.values_list('pk', flat=True).first(),
+            'servico': ServicoMedico.objects.values_list('pk', flat=True).first(),
+            'importacao_cirurgia': importacao_cirurgia.pk,
+            'perfil': PerfilRequisicao.objects.values_list('pk', flat=True).first(),
+            'importacao_producao': (
+                ImportacaoProducao.objects.filter(confirmado_em__isnull=False).values_list('pk', flat=True).first()
+            ),
+            'registros': registros,
+            'planilha': planilha.getvalue().encode('utf-8'),
+        }
+
+    def _dados(self, url, usuario, objetos):
+        """Corpo do POST do caso que acessa `url`."""
+        if url == 'login':
+            return {'username': usuario.username, 'password': SENHA}
+        if url == 'producao_upload':
+            return {'arquivo': SimpleUploadedFile('orcamento.csv', objetos['planilha'])}
+        return {}
+
+    def _acessar(self, nome, usuario, objetos):
+        rota = ROTAS[nome]
+        url = rota.get('url', nome)
+        kwargs = {'pk': objetos[rota['pk']]} if 'pk' in rota else {}
+        cliente = Client()
+        if not rota.get('anonimo'):
+            cliente.force_login(usuario)
+        if rota.get('pendente'):
+            # Nova a cada acesso: o upload e a confirmação descartam a anterior do usuário
+            importacao = _preparar_importacao(MES_UPLOAD, objetos['registros'], 'orcamento.csv', usuario)
+            sessao = cliente.session
+            sessao['producao_importacao'] = importacao.pk
+            sessao.save()
+        dados = self._dados(url, usuario, objetos) if rota.get('metodo') == 'POST' else None
+
+        medicao = Medicao()
+        inicio = time.perf_counter()
+        with medicao.instalar():
+            if dados is None:
+                resposta = cliente.get(reverse(url, kwargs=kwargs))
+            else:
+                resposta = cliente.post(reverse(url, kwargs=kwargs), dados)
+            if resposta.streaming:
+                b''.join(resposta.streaming_content)
+        destino = urlparse(resposta['Location']).path if resposta.has_header('Location') else None
+        return medicao.consultas, (time.perf_counter() - inicio) * 1000, resposta.status_code, destino
+
+    def _divergencias(self, nome, tiers, medidas):
+        """Tiers cuja resposta não é a de `ROTAS[nome]['esperado']`, como 'tier 5: 302 → /x/'."""
+        esperado = ROTAS[nome]['esperado']
+        if not isinstance(esperado, tuple):
+            esperado = (esperado,) * len(tiers)
+        divergencias = []
+        for tier, previsto, (_, _, status, destino) in zip(tiers, esperado, medidas):
+            if previsto == 200:
+                certo = status == 200
+            else:
+                certo = status == 302 and destino == reverse(previsto)
+            if not certo:
+                obtido = f'{status} → {destino}' if destino else str(status)
+                divergencias.append(f'tier {tier}: {obtido}')
+        return divergencias
+
+    def _relatorio(self, medidas, options):
+        menor, maior = sorted(medidas)
+        tiers = [tier for tier, _ in Usuario.TIER_CHOICES]
+        self.stdout.write('')
+        self.stdout.write(
+            f'{"caso":<34} {"consultas":>9} {"→":>3} {"maior":>5} {"orçam.":>6} {"máx ms":>8}  status por tier'
+        )
+        falhas = 0
+        for nome in ROTAS:
+            antes = [medidas[menor][(nome, t)] for t in tiers]
+            depois = [medidas[maior][(nome, t)] for t in tiers]
+            consultas = max(medida[0] for medida in depois)
+            ms = max(medida[1] for medida in depois)
+            teto = TETOS_MS.get(nome, options['teto_ms'])
+            problemas = []
+            divergencias = self._divergencias(nome, tiers, antes) + self._divergencias(nome, tiers, depois)
+            if divergencias:
+                problemas.append('resposta inesperada (' + ', '.join(dict.fromkeys(divergencias)) + ')')
+            if consultas > ORCAMENTOS[nome]:
+                problemas.append('acima do orçamento')
+            cresceram = [t for t, a, d in zip(tiers, antes, depois) if d[0] > a[0]]
+            if cresceram:
+                problemas.append('consultas crescem com o volume (tier ' + ', '.join(map(str, cresceram)) + ')')
+            if ms > teto:
+                problemas.append(f'acima de {teto:.0f} ms')
+            linha = (
+                f'{nome:<34} {max(medida[0] for medida in antes):>9} {"→":>3} {consultas:>5} '
+                f'{ORCAMENTOS[nome]:>6} {ms:>8.1f}  ' + ' '.join(str(medida[2]) for medida in depois)
+            )
+            if problemas:
+                falhas += 1
+                self.stdout.write(self.style.ERROR(f'{linha}  {"; ".join(problemas)}'))
+            else:
+                self.stdout.write(linha)
+        return falhas
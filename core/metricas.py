@@ -0,0 +1,241 @@
+"""
+Métricas de desempenho por view, expostas no formato texto do Prometheus.
+
+`MetricasMiddleware` mede cada requisição (tempo de resposta, quantidade e
+tempo das consultas ao banco, tamanho da resposta) e acumula os valores em
+histogramas por nome de URL (`producao_dashboard`, `cirurgia_upload`...) e
+método. A view `metricas` (Tier 5) publica os histogramas em `/metrics`.
+
+As consultas são contadas com `connection.execute_wrapper`, que só envolve a
+conexão da thread da requisição. Respostas em streaming (exportação CSV) são
+medidas até o último bloco ser enviado, já que as consultas acontecem durante
+a iteração.
+
+Os valores ficam na memória do processo: com vários workers, cada um tem os
+seus, e `/metrics` mostra os do worker que atendeu a requisição. O custo por
+requisição fica na casa das dezenas de microssegundos (um `perf_counter` por
+consulta e uma atualização dos histogramas sob lock).
+
+Consultas de instrumentação feitas durante a requisição (o EXPLAIN das
+consultas lentas) rodam dentro de `sem_medicao()` e não entram na contagem nem
+no tempo de banco.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+LIMITES_DURACAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LIMITES_CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+LIMITES_BYTES = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+HISTOGRAMAS = {
+    'duracao': (
+        'farol_requisicao_duracao_segundos', 'Tempo de resposta da requisição', LIMITES_DURACAO,
+    ),
+    'consultas': (
+        'farol_requisicao_consultas', 'Consultas ao banco por requisição', LIMITES_CONSULTAS,
+    ),
+    'banco': (
+        'farol_requisicao_banco_segundos', 'Tempo gasto em consultas ao banco por requisição', LIMITES_DURACAO,
+    ),
+    'bytes': (
+        'farol_resposta_bytes', 'Tamanho do corpo da resposta', LIMITES_BYTES,
+    ),
+}
+
+
+class Histograma:
+    """Histograma cumulativo no estilo do Prometheus (contagens por limite superior)."""
+
+    __slots__ = ('limites', 'contagens', 'soma', 'total')
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)  # o último é +Inf
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.contagens[bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def acumulados(self):
+        acumulado = 0
+        for limite, contagem in zip((*self.limites, '+Inf'), self.contagens):
+            acumulado += contagem
+            yield limite, acumulado
+
+
+class Registro:
+    """Histogramas por (view, método) e contagem de respostas por status."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histogramas = {}
+        self._respostas = {}
+
+    def registrar(self, view, metodo, status, duracao, consultas, tempo_banco, tamanho):
+        chave = (view, metodo)
+        with self._lock:
+            histogramas = self._histogramas.get(chave)
+            if histogramas is None:
+                histogramas = self._histogramas[chave] = {
+                    nome: Histograma(limites) for nome, (_, _, limites) in HISTOGRAMAS.items()
+                }
+            histogramas['duracao'].observar(duracao)
+            histogramas['consultas'].observar(consultas)
+            histogramas['banco'].observar(tempo_banco)
+            histogramas['bytes'].observar(tamanho)
+            chave_status = (view, metodo, f'{status // 100}xx')
+            self._respostas[chave_status] = self._respostas.get(chave_status, 0) + 1
+
+    def limpar(self):
+        with self._lock:
+            self._histogramas.clear()
+            self._respostas.clear()
+
+    def exportar(self):
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)."""
+        with self._lock:
+            histogramas = {
+                chave: {nome: (list(h.acumulados()), h.soma, h.total) for nome, h in valores.items()}
+                for chave, valores in self._histogramas.items()
+            }
+            respostas = dict(self._respostas)
+
+        linhas = [
+            '# HELP farol_requisicoes_total Requisições atendidas',
+            '# TYPE farol_requisicoes_total counter',
+        ]
+        for (view, metodo, status), total in sorted(respostas.items()):
+            linhas.append(f'farol_requisicoes_total{_rotulos(view=view, metodo=metodo, status=status)} {total}')
+
+        for nome, (metrica, ajuda, _) in HISTOGRAMAS.items():
+            linhas.append(f'# HELP {metrica} {ajuda}')
+            linhas.append(f'# TYPE {metrica} histogram')
+            for (view, metodo), valores in sorted(histogramas.items()):
+                acumulados, soma, total = valores[nome]
+                for limite, acumulado in acumulados:
+                    rotulos = _rotulos(view=view, metodo=metodo, le=_numero(limite))
+                    linhas.append(f'{metrica}_bucket{rotulos} {acumulado}')
+                rotulos = _rotulos(view=view, metodo=metodo)
+                linhas.append(f'{metrica}_sum{rotulos} {_numero(soma)}')
+                linhas.append(f'{metrica}_count{rotulos} {total}')
+        return '\n'.join(linhas) + '\n'
+
+
+def _numero(valor):
+    return valor if isinstance(valor, str) else repr(float(valor))
+
+
+def _rotulos(**rotulos):
+    partes = []
+    for nome, valor in rotulos.items():
+        valor = str(valor).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+        partes.append(f'{nome}="{valor}"')
+    return '{' + ','.join(partes) + '}'
+
+
+registro = Registro()
+
+# Por thread, como as conexões: se a thread está em `sem_medicao()` e quanto tempo passou nele
+_instrumentacao = threading.local()
+
+
+@contextmanager
+def sem_medicao():
+    """Consultas do bloco ficam fora da `Medicao`, inclusive do tempo da consulta que o envolve."""
+    _instrumentacao.ativa = True
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        _instrumentacao.ativa = False
+        _instrumentacao.segundos = getattr(_instrumentacao, 'segundos', 0.0) + time.perf_counter() - inicio
+
+
+class Medicao:
+    """Consultas e tempo de banco de uma requisição, via execute_wrapper."""
+
+    __slots__ = ('consultas', 'tempo_banco')
+
+    def __init__(self):
+        self.consultas = 0
+        self.tempo_banco = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_instrumentacao, 'ativa', False):
+            return execute(sql, params, many, context)
+        descontar = getattr(_instrumentacao, 'segundos', 0.0)
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            descontar = getattr(_instrumentacao, 'segundos', 0.0) - descontar
+            self.tempo_banco += time.perf_counter() - inicio - descontar
+            self.consultas += 1
+
+    def instalar(self):
+        pilha = ExitStack()
+        for alias in connections:
+            pilha.enter_context(connections[alias].execute_wrapper(self))
+        return pilha
+
+
+def nome_view(request):
+    """Nome da URL atendida (`producao_dashboard`...), para agrupar medições."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'nao_resolvida'
+    return match.url_name or match.view_name or 'sem_nome'
+
+
+class MetricasMiddleware:
+    """Registra tempo, consultas e tamanho de cada resposta em `registro`."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICAS_ATIVAS', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        medicao = Medicao()
+        inicio = time.perf_counter()
+        with medicao.instalar():
+            response = self.get_response(request)
+
+        if response.streaming:
+            response.streaming_content = self._medir_streaming(
+                request, response, response.streaming_content, medicao, inicio
+            )
+        else:
+            self._registrar(request, response, medicao, inicio, len(response.content))
+        return response
+
+    def _medir_streaming(self, request, response, conteudo, medicao, inicio):
+        tamanho = 0
+        try:
+            with medicao.instalar():
+                for bloco in conteudo:
+                    tamanho += len(bloco)
+                    yield bloco
+        finally:
+            self._registrar(request, response, medicao, inicio, tamanho)
+
+    def _registrar(self, request, response, medicao, inicio, tamanho):
+        registro.registrar(
+            nome_view(request),
+            request.method,
+            response.status_code,
+            time.perf_counter() - inicio,
+            medicao.consultas,
+            medicao.tempo_banco,
+            tamanho,
+        )
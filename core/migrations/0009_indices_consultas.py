@@ -0,0 +1,89 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_producao_mensal'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cirurgia',
+            index=models.Index(fields=['especialidade', 'descricao'], name='cirurgia_espec_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cirurgia',
+            index=models.Index(fields=['data_atualizacao'], name='cirurgia_atualizacao_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cirurgia',
+            index=models.Index(condition=models.Q(('ativa', True)), fields=['ativa'], name='cirurgia_ativa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='empresa',
+            index=models.Index(fields=['razao_social'], name='empresa_razao_social_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='empresa',
+            index=models.Index(fields=['data_atualizacao'], name='empresa_atualizacao_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='empresa',
+            index=models.Index(condition=models.Q(('ativa', True)), fields=['ativa'], name='empresa_ativa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exame',
+            index=models.Index(fields=['tipo_exame', 'descricao'], name='exame_tipo_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exame',
+            index=models.Index(fields=['data_atualizacao'], name='exame_atualizacao_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exame',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['ativo'], name='exame_ativo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medico',
+            index=models.Index(fields=['nome_completo'], name='medico_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medico',
+            index=models.Index(fields=['data_atualizacao'], name='medico_atualizacao_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medico',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['ativo'], name='medico_ativo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producaomensal',
+            index=models.Index(fields=['-mes_ano', 'especialidade'], name='producao_mes_espec_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producaomensal',
+            index=models.Index(fields=['atualizado_em'], name='producao_atualizacao_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicomedico',
+            index=models.Index(fields=['especialidade', 'descricao'], name='servico_espec_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicomedico',
+            index=models.Index(fields=['data_atualizacao'], name='servico_atualizacao_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicomedico',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['ativo'], name='servico_ativo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['-data_cadastro'], name='usuario_cadastro_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['data_atualizacao'], name='usuario_atualizacao_idx'),
+        ),
+    ]
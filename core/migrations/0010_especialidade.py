@@ -0,0 +1,63 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Especialidade',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=255, verbose_name='Nome')),
+                ('nome_normalizado', models.CharField(max_length=255, unique=True, verbose_name='Nome Normalizado')),
+                ('data_cadastro', models.DateTimeField(auto_now_add=True, verbose_name='Data de Cadastro')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Última Atualização')),
+            ],
+            options={
+                'verbose_name': 'Especialidade',
+                'verbose_name_plural': 'Especialidades',
+                'ordering': ['nome'],
+                'indexes': [models.Index(fields=['data_atualizacao'], name='especialidade_atualizacao_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AliasEspecialidade',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome_normalizado', models.CharField(max_length=255, unique=True, verbose_name='Nome Normalizado')),
+                ('especialidade', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='core.especialidade', verbose_name='Especialidade')),
+            ],
+            options={
+                'verbose_name': 'Alias de Especialidade',
+                'verbose_name_plural': 'Aliases de Especialidade',
+                'ordering': ['nome_normalizado'],
+            },
+        ),
+        migrations.AddField(
+            model_name='cirurgia',
+            name='especialidade_ref',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cirurgias', to='core.especialidade', verbose_name='Especialidade (canônica)'),
+        ),
+        migrations.AddField(
+            model_name='medico',
+            name='especialidade_ref',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='medicos', to='core.especialidade', verbose_name='Especialidade (canônica)'),
+        ),
+        migrations.AddField(
+            model_name='producaomensal',
+            name='especialidade_ref',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='producoes', to='core.especialidade', verbose_name='Especialidade (canônica)'),
+        ),
+        migrations.AddField(
+            model_name='servicomedico',
+            name='especialidade_ref',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='servicos', to='core.especialidade', verbose_name='Especialidade (canônica)'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:08
+
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.db import migrations
+from django.db.models import Count
+
+
+MODELOS = ['Medico', 'Cirurgia', 'ServicoMedico', 'ProducaoMensal']
+
+
+def normalizar_especialidade(nome):
+    """Cópia de core.especialidades.normalizar_especialidade na data desta migração."""
+    if not nome:
+        return ''
+    decomposto = unicodedata.normalize('NFKD', str(nome))
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    sem_pontuacao = re.sub(r'[^\w\s]', ' ', sem_acentos)
+    return ' '.join(sem_pontuacao.casefold().split())
+
+
+def popular_especialidades(apps, schema_editor):
+    """Cria as especialidades a partir dos textos existentes e preenche as referências.
+
+    Cada forma normalizada vira uma especialidade, exibida com a grafia mais
+    frequente. As referências são preenchidas com um UPDATE por texto distinto,
+    não por registro.
+    """
+    Especialidade = apps.get_model('core', 'Especialidade')
+
+    textos = {}
+    variantes = defaultdict(Counter)
+    for nome_modelo in MODELOS:
+        modelo = apps.get_model('core', nome_modelo)
+        distintos = (
+            modelo.objects.exclude(especialidade='')
+            .values_list('especialidade')
+            .annotate(total=Count('id'))
+            .order_by()
+        )
+        textos[nome_modelo] = []
+        for texto, total in distintos:
+            chave = normalizar_especialidade(texto)
+            if chave:
+                textos[nome_modelo].append((texto, chave))
+                variantes[chave][' '.join(texto.split())] += total
+
+    Especialidade.objects.bulk_create([
+        Especialidade(nome=contagem.most_common(1)[0][0], nome_normalizado=chave)
+        for chave, contagem in variantes.items()
+    ])
+    ids = dict(Especialidade.objects.values_list('nome_normalizado', 'id'))
+
+    for nome_modelo, pares in textos.items():
+        modelo = apps.get_model('core', nome_modelo)
+        for texto, chave in pares:
+            modelo.objects.filter(especialidade=texto).update(especialidade_ref_id=ids[chave])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_especialidade'),
+    ]
+
+    operations = [
+        migrations.RunPython(popular_especialidades, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_popular_especialidades'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnomaliaProducao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes_ano', models.DateField(verbose_name='Mês/Ano de Referência')),
+                ('metrica', models.CharField(choices=[('perc_desperdicadas', '% Desperdiçadas'), ('vagas_nao_distribuidas', 'Vagas Não Distribuídas'), ('vagas_extras', 'Vagas Extras')], max_length=30, verbose_name='Métrica')),
+                ('valor', models.FloatField(verbose_name='Valor')),
+                ('media', models.FloatField(verbose_name='Média Histórica')),
+                ('desvio', models.FloatField(verbose_name='Desvio Padrão Histórico')),
+                ('zscore', models.FloatField(verbose_name='Z-score')),
+                ('meses_historico', models.PositiveSmallIntegerField(verbose_name='Meses no Histórico')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Calculado em')),
+                ('especialidade', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='anomalias', to='core.especialidade', verbose_name='Especialidade')),
+            ],
+            options={
+                'verbose_name': 'Anomalia de Produção',
+                'verbose_name_plural': 'Anomalias de Produção',
+                'ordering': ['-mes_ano', 'especialidade__nome', 'metrica'],
+                'indexes': [models.Index(fields=['-mes_ano'], name='anomalia_mes_idx'), models.Index(fields=['atualizado_em'], name='anomalia_atualizacao_idx')],
+                'unique_together': {('especialidade', 'mes_ano', 'metrica')},
+            },
+        ),
+    ]
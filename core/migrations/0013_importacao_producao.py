@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_anomalia_producao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportacaoProducao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes_ano', models.DateField(verbose_name='Mês/Ano de Referência')),
+                ('nome_arquivo', models.CharField(blank=True, max_length=255, verbose_name='Arquivo')),
+                ('registros', models.JSONField(default=list, verbose_name='Registros')),
+                ('resumo', models.JSONField(default=dict, verbose_name='Resumo')),
+                ('total_registros', models.PositiveIntegerField(default=0, verbose_name='Total de Registros')),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Enviado em')),
+                ('confirmado_em', models.DateTimeField(blank=True, null=True, verbose_name='Confirmado em')),
+                ('enviado_por', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='importacoes_producao', to=settings.AUTH_USER_MODEL, verbose_name='Enviado por')),
+            ],
+            options={
+                'verbose_name': 'Importação de Produção',
+                'verbose_name_plural': 'Importações de Produção',
+                'ordering': ['-criado_em'],
+            },
+        ),
+    ]
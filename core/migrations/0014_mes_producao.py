@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_importacao_producao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MesProducao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes_ano', models.DateField(unique=True, verbose_name='Mês/Ano de Referência')),
+                ('importando_desde', models.DateTimeField(blank=True, null=True, verbose_name='Importação em andamento desde')),
+                ('importando_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Importação em andamento por')),
+            ],
+            options={
+                'verbose_name': 'Mês de Produção',
+                'verbose_name_plural': 'Meses de Produção',
+                'ordering': ['-mes_ano'],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0014_mes_producao'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='importacaoproducao',
+            name='enviado_por',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='importacoes_producao', to=settings.AUTH_USER_MODEL, verbose_name='Enviado por'),
+        ),
+        migrations.AddIndex(
+            model_name='importacaoproducao',
+            index=models.Index(fields=['mes_ano', '-criado_em'], name='importacao_mes_idx'),
+        ),
+        migrations.AddField(
+            model_name='mesproducao',
+            name='importacao_ativa',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='mes_ativo', to='core.importacaoproducao', verbose_name='Importação ativa'),
+        ),
+        migrations.AddField(
+            model_name='mesproducao',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Atualizado em'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='mesproducao',
+            index=models.Index(fields=['atualizado_em'], name='mesproducao_atualizacao_idx'),
+        ),
+        migrations.AddField(
+            model_name='producaomensal',
+            name='importacao',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='producoes', to='core.importacaoproducao', verbose_name='Importação'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:05
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def criar_lotes(apps, schema_editor):
+    """Transforma a produção já gravada de cada mês em uma importação ativa."""
+    ProducaoMensal = apps.get_model('core', 'ProducaoMensal')
+    ImportacaoProducao = apps.get_model('core', 'ImportacaoProducao')
+    MesProducao = apps.get_model('core', 'MesProducao')
+
+    meses = (
+        ProducaoMensal.objects.values('mes_ano')
+        .annotate(total=Count('id'), importado_em=Min('criado_em'), usuario=Min('importado_por'))
+        .order_by()
+    )
+    for mes in meses:
+        importacao = ImportacaoProducao.objects.create(
+            mes_ano=mes['mes_ano'],
+            nome_arquivo='Importação anterior ao histórico',
+            total_registros=mes['total'],
+            enviado_por_id=mes['usuario'],
+            confirmado_em=mes['importado_em'],
+        )
+        ProducaoMensal.objects.filter(mes_ano=mes['mes_ano']).update(importacao=importacao)
+        MesProducao.objects.update_or_create(
+            mes_ano=mes['mes_ano'], defaults={'importacao_ativa': importacao}
+        )
+
+
+class Migration(migrations.Migration):
+    # Sozinha: no PostgreSQL, o UPDATE da FK deixa eventos de trigger pendentes até o
+    # fim da transação, e o ALTER TABLE da 0017 na mesma transação falharia
+
+    dependencies = [
+        ('core', '0015_lotes_importacao'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_lotes, migrations.RunPython.noop),
+    ]
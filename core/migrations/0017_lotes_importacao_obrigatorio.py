@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_popular_lotes_importacao'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='producaomensal',
+            name='importacao',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='producoes', to='core.importacaoproducao', verbose_name='Importação'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='producaomensal',
+            unique_together={('importacao', 'especialidade')},
+        ),
+        migrations.AlterModelOptions(
+            name='producaomensal',
+            options={'default_manager_name': 'todas', 'ordering': ['-mes_ano', 'especialidade'], 'verbose_name': 'Produção Mensal', 'verbose_name_plural': 'Produções Mensais'},
+        ),
+        migrations.AlterModelManagers(
+            name='producaomensal',
+            managers=[
+                ('todas', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
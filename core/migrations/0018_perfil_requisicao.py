@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_lotes_importacao_obrigatorio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerfilRequisicao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('view', models.CharField(max_length=100, verbose_name='View')),
+                ('metodo', models.CharField(max_length=10, verbose_name='Método')),
+                ('caminho', models.CharField(max_length=500, verbose_name='Caminho')),
+                ('status', models.PositiveSmallIntegerField(verbose_name='Status')),
+                ('duracao', models.FloatField(verbose_name='Duração (s)')),
+                ('consultas', models.PositiveIntegerField(default=0, verbose_name='Consultas ao banco')),
+                ('tempo_banco', models.FloatField(default=0, verbose_name='Tempo no banco (s)')),
+                ('total_chamadas', models.PositiveIntegerField(default=0, verbose_name='Chamadas de função')),
+                ('funcoes', models.JSONField(default=list, verbose_name='Funções')),
+                ('memoria_pico', models.PositiveBigIntegerField(blank=True, null=True, verbose_name='Pico de memória (bytes)')),
+                ('alocacoes', models.JSONField(default=list, verbose_name='Alocações')),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('usuario', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='perfis_requisicao', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Perfil de Requisição',
+                'verbose_name_plural': 'Perfis de Requisição',
+                'ordering': ['-criado_em'],
+                'indexes': [models.Index(fields=['-criado_em'], name='perfil_criacao_idx')],
+            },
+        ),
+    ]
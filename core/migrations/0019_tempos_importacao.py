@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_perfil_requisicao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importacaoproducao',
+            name='tempos',
+            field=models.JSONField(default=dict, verbose_name='Tempos por etapa'),
+        ),
+        migrations.CreateModel(
+            name='ImportacaoCirurgia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome_arquivo', models.CharField(blank=True, max_length=255, verbose_name='Arquivo')),
+                ('linhas_processadas', models.PositiveIntegerField(default=0, verbose_name='Linhas processadas')),
+                ('sucesso', models.PositiveIntegerField(default=0, verbose_name='Importadas')),
+                ('erro', models.PositiveIntegerField(default=0, verbose_name='Com erro')),
+                ('erros', models.JSONField(default=list, verbose_name='Erros')),
+                ('tempos', models.JSONField(default=dict, verbose_name='Tempos por etapa')),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Enviado em')),
+                ('enviado_por', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='importacoes_cirurgia', to=settings.AUTH_USER_MODEL, verbose_name='Enviado por')),
+            ],
+            options={
+                'verbose_name': 'Importação de Cirurgias',
+                'verbose_name_plural': 'Importações de Cirurgias',
+                'ordering': ['-criado_em'],
+            },
+        ),
+    ]
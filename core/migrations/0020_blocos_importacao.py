@@ -0,0 +1,61 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+REGISTROS_POR_BLOCO = 500
+
+
+def dividir_registros(apps, schema_editor):
+    """Move os registros das importações pendentes para blocos."""
+    ImportacaoProducao = apps.get_model('core', 'ImportacaoProducao')
+    BlocoImportacao = apps.get_model('core', 'BlocoImportacao')
+    pendentes = ImportacaoProducao.objects.filter(confirmado_em__isnull=True).values_list('pk', 'registros')
+    for pk, registros in pendentes.iterator():
+        blocos = []
+        for violacoes, sequencia in (
+            (False, registros), (True, [reg for reg in registros if reg.get('violacoes')]),
+        ):
+            for inicio in range(0, len(sequencia), REGISTROS_POR_BLOCO):
+                trecho = sequencia[inicio:inicio + REGISTROS_POR_BLOCO]
+                blocos.append(BlocoImportacao(
+                    importacao_id=pk, violacoes=violacoes, inicio=inicio, fim=inicio + len(trecho),
+                    registros=trecho,
+                ))
+        BlocoImportacao.objects.bulk_create(blocos)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_tempos_importacao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlocoImportacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('violacoes', models.BooleanField(default=False, verbose_name='Só registros com violações')),
+                ('inicio', models.PositiveIntegerField(verbose_name='Primeiro registro')),
+                ('fim', models.PositiveIntegerField(verbose_name='Registro seguinte ao último')),
+                ('registros', models.JSONField(default=list, verbose_name='Registros')),
+                ('importacao', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blocos', to='core.importacaoproducao', verbose_name='Importação')),
+            ],
+            options={
+                'verbose_name': 'Bloco de Importação',
+                'verbose_name_plural': 'Blocos de Importação',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='blocoimportacao',
+            constraint=models.UniqueConstraint(fields=('importacao', 'violacoes', 'inicio'), name='bloco_importacao_unico'),
+        ),
+        # Sem volta: importações pendentes são descartáveis (expiram com a sessão)
+        migrations.RunPython(dividir_registros, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='importacaoproducao',
+            name='registros',
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.core.validators import EmailValidator, RegexValidator
 
@@ -88,6 +89,10 @@ class Usuario(AbstractUser):
         verbose_name = 'Usuário'
         verbose_name_plural = 'Usuários'
         ordering = ['-data_cadastro']
+        indexes = [
+            models.Index(fields=['-data_cadastro'], name='usuario_cadastro_idx'),
+            models.Index(fields=['data_atualizacao'], name='usuario_atualizacao_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nome_completo} ({self.get_tier_display()})"
@@ -165,6 +170,11 @@ class Empresa(models.Model):
         verbose_name = 'Empresa'
         verbose_name_plural = 'Empresas'
         ordering = ['razao_social']
+        indexes = [
+            models.Index(fields=['razao_social'], name='empresa_razao_social_idx'),
+            models.Index(fields=['data_atualizacao'], name='empresa_atualizacao_idx'),
+            models.Index(fields=['ativa'], condition=Q(ativa=True), name='empresa_ativa_idx'),
+        ]
     
     def __str__(self):
         return self.nome_fantasia or self.razao_social
@@ -188,7 +198,98 @@ class Empresa(models.Model):
         return ' '.join(partes) if partes else 'Endereço não informado'
 
 
-class Medico(models.Model):
+# ===== ESPECIALIDADES =====
+
+class Especialidade(models.Model):
+    """Especialidade canônica, referenciada por médicos, procedimentos e produção.
+
+    O texto digitado ou importado continua nos campos `especialidade` de cada
+    modelo; a chave `especialidade_ref` aponta para a forma canônica, usada em
+    junções e agrupamentos (veja `core/especialidades.py`).
+    """
+
+    nome = models.CharField('Nome', max_length=255)
+    nome_normalizado = models.CharField('Nome Normalizado', max_length=255, unique=True)
+
+    data_cadastro = models.DateTimeField('Data de Cadastro', auto_now_add=True)
+    data_atualizacao = models.DateTimeField('Última Atualização', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Especialidade'
+        verbose_name_plural = 'Especialidades'
+        ordering = ['nome']
+        indexes = [
+            models.Index(fields=['data_atualizacao'], name='especialidade_atualizacao_idx'),
+        ]
+
+    def __str__(self):
+        return self.nome
+
+    def save(self, *args, **kwargs):
+        from .especialidades import normalizar_especialidade
+        self.nome_normalizado = normalizar_especialidade(self.nome_normalizado or self.nome)
+        super().save(*args, **kwargs)
+
+
+class AliasEspecialidade(models.Model):
+    """Grafia alternativa (já normalizada) que deve ser lida como outra especialidade."""
+
+    nome_normalizado = models.CharField('Nome Normalizado', max_length=255, unique=True)
+    especialidade = models.ForeignKey(
+        Especialidade,
+        on_delete=models.CASCADE,
+        related_name='aliases',
+        verbose_name='Especialidade'
+    )
+
+    class Meta:
+        verbose_name = 'Alias de Especialidade'
+        verbose_name_plural = 'Aliases de Especialidade'
+        ordering = ['nome_normalizado']
+
+    def __str__(self):
+        return f"{self.nome_normalizado} → {self.especialidade}"
+
+    def save(self, *args, **kwargs):
+        from .especialidades import normalizar_especialidade
+        self.nome_normalizado = normalizar_especialidade(self.nome_normalizado)
+        super().save(*args, **kwargs)
+
+
+class EspecialidadeMixin:
+    """Mantém `especialidade_ref` de acordo com o texto de `especialidade`.
+
+    A especialidade só é resolvida quando o texto muda (ou a referência está
+    vazia), então salvar um registro sem alterar a especialidade não consulta
+    as tabelas de especialidade. Quem grava em lote pode informar
+    `especialidade_ref_id` já resolvido por `mapa_especialidades`.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._especialidade_carregada = instance.__dict__.get('especialidade')
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            resolver = self.especialidade_ref_id is None
+        else:
+            resolver = (
+                self.especialidade_ref_id is None
+                or self.especialidade != getattr(self, '_especialidade_carregada', None)
+            )
+        if resolver:
+            from .especialidades import resolver_especialidade
+            self.especialidade_ref_id = resolver_especialidade(self.especialidade)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'especialidade' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'especialidade_ref'}
+        super().save(*args, **kwargs)
+        self._especialidade_carregada = self.especialidade
+
+
+class Medico(EspecialidadeMixin, models.Model):
     """Modelo para cadastro de médicos."""
     
     nome_completo = models.CharField('Nome Completo', max_length=255)
@@ -211,6 +312,15 @@ class Medico(models.Model):
     )
     
     especialidade = models.CharField('Especialidade', max_length=100, blank=True)
+    especialidade_ref = models.ForeignKey(
+        Especialidade,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='medicos',
+        verbose_name='Especialidade (canônica)'
+    )
     telefone = models.CharField('Telefone', max_length=20, blank=True)
     email = models.EmailField('E-mail', blank=True)
     
@@ -230,6 +340,11 @@ class Medico(models.Model):
         verbose_name = 'Médico'
         verbose_name_plural = 'Médicos'
         ordering = ['nome_completo']
+        indexes = [
+            models.Index(fields=['nome_completo'], name='medico_nome_idx'),
+            models.Index(fields=['data_atualizacao'], name='medico_atualizacao_idx'),
+            models.Index(fields=['ativo'], condition=Q(ativo=True), name='medico_ativo_idx'),
+        ]
     
     def __str__(self):
         return f"Dr(a). {self.nome_completo} - {self.crm}"
@@ -237,7 +352,7 @@ class Medico(models.Model):
 
 # ===== MODELOS DA ÁREA ADMINISTRATIVA =====
 
-class Cirurgia(models.Model):
+class Cirurgia(EspecialidadeMixin, models.Model):
     """Modelo para cadastro de cirurgias."""
     
     TIPO_CHOICES = [
@@ -274,6 +389,16 @@ class Cirurgia(models.Model):
         help_text='Ex: Ortopedia, Cardiologia, etc.'
     )
     
+    especialidade_ref = models.ForeignKey(
+        Especialidade,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='cirurgias',
+        verbose_name='Especialidade (canônica)'
+    )
+    
     ativa = models.BooleanField('Ativa', default=True)
     
     data_cadastro = models.DateTimeField('Data de Cadastro', auto_now_add=True)
@@ -290,6 +415,11 @@ class Cirurgia(models.Model):
         verbose_name = 'Cirurgia'
         verbose_name_plural = 'Cirurgias'
         ordering = ['especialidade', 'descricao']
+        indexes = [
+            models.Index(fields=['especialidade', 'descricao'], name='cirurgia_espec_desc_idx'),
+            models.Index(fields=['data_atualizacao'], name='cirurgia_atualizacao_idx'),
+            models.Index(fields=['ativa'], condition=Q(ativa=True), name='cirurgia_ativa_idx'),
+        ]
     
     def __str__(self):
         return f"{self.codigo_sigtap} - {self.descricao}"
@@ -350,12 +480,17 @@ class Exame(models.Model):
         verbose_name = 'Exame'
         verbose_name_plural = 'Exames'
         ordering = ['tipo_exame', 'descricao']
+        indexes = [
+            models.Index(fields=['tipo_exame', 'descricao'], name='exame_tipo_desc_idx'),
+            models.Index(fields=['data_atualizacao'], name='exame_atualizacao_idx'),
+            models.Index(fields=['ativo'], condition=Q(ativo=True), name='exame_ativo_idx'),
+        ]
     
     def __str__(self):
         return f"{self.codigo_sigtap} - {self.descricao}"
 
 
-class ServicoMedico(models.Model):
+class ServicoMedico(EspecialidadeMixin, models.Model):
     """Modelo para cadastro de serviços médicos."""
     
     codigo_sigtap = models.CharField(
@@ -387,6 +522,16 @@ class ServicoMedico(models.Model):
         help_text='Especialidade responsável pelo serviço'
     )
     
+    especialidade_ref = models.ForeignKey(
+        Especialidade,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='servicos',
+        verbose_name='Especialidade (canônica)'
+    )
+    
     duracao_estimada = models.IntegerField(
         'Duração Estimada (minutos)',
         blank=True,
@@ -410,6 +555,11 @@ class ServicoMedico(models.Model):
         verbose_name = 'Serviço Médico'
         verbose_name_plural = 'Serviços Médicos'
         ordering = ['especialidade', 'descricao']
+        indexes = [
+            models.Index(fields=['especialidade', 'descricao'], name='servico_espec_desc_idx'),
+            models.Index(fields=['data_atualizacao'], name='servico_atualizacao_idx'),
+            models.Index(fields=['ativo'], condition=Q(ativo=True), name='servico_ativo_idx'),
+        ]
     
     def __str__(self):
         if self.descricao:
@@ -421,11 +571,42 @@ class ServicoMedico(models.Model):
 
 # ===== MÓDULO DE PRODUÇÃO =====
 
-class ProducaoMensal(models.Model):
-    """Registro mensal de produção por especialidade, importado via planilha."""
+class ProducaoAtivaManager(models.Manager):
+    """Só os registros das importações ativas de cada mês (`MesProducao.importacao_ativa`)."""
+
+    def get_queryset(self):
+        # EXISTS correlacionado (e não IN): o SQLite continua percorrendo os
+        # índices de ordenação de ProducaoMensal e só confere o lote por registro
+        return super().get_queryset().filter(
+            models.Exists(MesProducao.objects.filter(importacao_ativa=models.OuterRef('importacao')))
+        )
 
+
+class ProducaoMensal(EspecialidadeMixin, models.Model):
+    """Registro mensal de produção por especialidade, importado via planilha.
+
+    Cada importação grava um lote novo de registros; o mês passa a exibi-lo
+    quando `MesProducao.importacao_ativa` aponta para ele. `objects` enxerga
+    só os lotes ativos; `todas` inclui os lotes anteriores ainda retidos.
+    """
+
+    importacao = models.ForeignKey(
+        'ImportacaoProducao',
+        on_delete=models.CASCADE,
+        related_name='producoes',
+        verbose_name='Importação'
+    )
     mes_ano = models.DateField('Mês/Ano de Referência')
     especialidade = models.CharField('Especialidade', max_length=255)
+    especialidade_ref = models.ForeignKey(
+        Especialidade,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='producoes',
+        verbose_name='Especialidade (canônica)'
+    )
 
     vagas_ofertadas = models.IntegerField('Vagas Ofertadas', null=True, blank=True)
 
@@ -456,11 +637,245 @@ class ProducaoMensal(models.Model):
     criado_em = models.DateTimeField('Importado em', auto_now_add=True)
     atualizado_em = models.DateTimeField('Atualizado em', auto_now=True)
 
+    todas = models.Manager()
+    objects = ProducaoAtivaManager()
+
     class Meta:
         verbose_name = 'Produção Mensal'
         verbose_name_plural = 'Produções Mensais'
-        unique_together = [['mes_ano', 'especialidade']]
+        default_manager_name = 'todas'
+        unique_together = [['importacao', 'especialidade']]
         ordering = ['-mes_ano', 'especialidade']
+        indexes = [
+            models.Index(fields=['-mes_ano', 'especialidade'], name='producao_mes_espec_idx'),
+            models.Index(fields=['atualizado_em'], name='producao_atualizacao_idx'),
+        ]
 
     def __str__(self):
         return f"{self.especialidade} - {self.mes_ano.strftime('%m/%Y')}"
+
+
+class AnomaliaProducao(models.Model):
+    """Valor fora do padrão histórico de uma especialidade, gerado por `core/anomalias.py`.
+
+    A tabela é recalculada por inteiro a cada importação; não deve ser editada.
+    """
+
+    METRICA_CHOICES = [
+        ('perc_desperdicadas', '% Desperdiçadas'),
+        ('vagas_nao_distribuidas', 'Vagas Não Distribuídas'),
+        ('vagas_extras', 'Vagas Extras'),
+    ]
+
+    especialidade = models.ForeignKey(
+        Especialidade,
+        on_delete=models.CASCADE,
+        related_name='anomalias',
+        verbose_name='Especialidade'
+    )
+    mes_ano = models.DateField('Mês/Ano de Referência')
+    metrica = models.CharField('Métrica', max_length=30, choices=METRICA_CHOICES)
+
+    valor = models.FloatField('Valor')
+    media = models.FloatField('Média Histórica')
+    desvio = models.FloatField('Desvio Padrão Histórico')
+    zscore = models.FloatField('Z-score')
+    meses_historico = models.PositiveSmallIntegerField('Meses no Histórico')
+
+    atualizado_em = models.DateTimeField('Calculado em', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Anomalia de Produção'
+        verbose_name_plural = 'Anomalias de Produção'
+        unique_together = [['especialidade', 'mes_ano', 'metrica']]
+        ordering = ['-mes_ano', 'especialidade__nome', 'metrica']
+        indexes = [
+            models.Index(fields=['-mes_ano'], name='anomalia_mes_idx'),
+            models.Index(fields=['atualizado_em'], name='anomalia_atualizacao_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.especialidade} - {self.mes_ano.strftime('%m/%Y')} - {self.get_metrica_display()}"
+
+    @property
+    def acima_da_media(self):
+        return self.zscore > 0
+
+
+class MesProducao(models.Model):
+    """Registro de cada mês de produção: importação ativa e reserva para gravação.
+
+    `importacao_ativa` aponta para o lote exibido do mês; trocar de lote
+    (nova importação ou reversão) é uma única atualização desta linha.
+    Enquanto uma importação grava o mês, `importando_por`/`importando_desde`
+    ficam preenchidos (veja `core/importacao.py`); importações de meses
+    diferentes não disputam a mesma linha.
+    """
+
+    mes_ano = models.DateField('Mês/Ano de Referência', unique=True)
+    importacao_ativa = models.OneToOneField(
+        'ImportacaoProducao',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='mes_ativo',
+        verbose_name='Importação ativa'
+    )
+    atualizado_em = models.DateTimeField('Atualizado em', auto_now=True)
+    importando_por = models.ForeignKey(
+        Usuario,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Importação em andamento por'
+    )
+    importando_desde = models.DateTimeField('Importação em andamento desde', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Mês de Produção'
+        verbose_name_plural = 'Meses de Produção'
+        ordering = ['-mes_ano']
+        indexes = [
+            models.Index(fields=['atualizado_em'], name='mesproducao_atualizacao_idx'),
+        ]
+
+    def __str__(self):
+        return self.mes_ano.strftime('%m/%Y')
+
+
+class ImportacaoProducao(models.Model):
+    """Planilha de produção carregada e aguardando confirmação.
+
+    Os registros lidos ficam no banco (`BlocoImportacao`), e não na sessão: a
+    tela de confirmação só lê o `resumo` e pagina os registros por um endpoint
+    JSON, e a gravação os lê do banco sem que precisem ser reenviados. Depois
+    de confirmada, a importação é o lote dos registros de ProducaoMensal
+    gravados a partir dela.
+    """
+
+    mes_ano = models.DateField('Mês/Ano de Referência')
+    nome_arquivo = models.CharField('Arquivo', max_length=255, blank=True)
+    resumo = models.JSONField('Resumo', default=dict)
+    total_registros = models.PositiveIntegerField('Total de Registros', default=0)
+    tempos = models.JSONField('Tempos por etapa', default=dict)
+
+    enviado_por = models.ForeignKey(
+        Usuario,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='importacoes_producao',
+        verbose_name='Enviado por'
+    )
+    criado_em = models.DateTimeField('Enviado em', auto_now_add=True)
+    confirmado_em = models.DateTimeField('Confirmado em', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Importação de Produção'
+        verbose_name_plural = 'Importações de Produção'
+        ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['mes_ano', '-criado_em'], name='importacao_mes_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.nome_arquivo or 'Importação'} - {self.mes_ano.strftime('%m/%Y')}"
+
+
+class BlocoImportacao(models.Model):
+    """Registros `inicio` a `fim - 1` de uma ImportacaoProducao pendente.
+
+    Em blocos, e não em um único JSON, para que cada página da tela de
+    confirmação leia só os blocos que a contêm. Os registros com violações
+    também ficam em uma sequência própria de blocos (`violacoes=True`),
+    numerada entre eles, para o filtro "só inconsistências".
+    """
+
+    importacao = models.ForeignKey(
+        ImportacaoProducao,
+        on_delete=models.CASCADE,
+        related_name='blocos',
+        verbose_name='Importação'
+    )
+    violacoes = models.BooleanField('Só registros com violações', default=False)
+    inicio = models.PositiveIntegerField('Primeiro registro')
+    fim = models.PositiveIntegerField('Registro seguinte ao último')
+    registros = models.JSONField('Registros', default=list)
+
+    class Meta:
+        verbose_name = 'Bloco de Importação'
+        verbose_name_plural = 'Blocos de Importação'
+        constraints = [
+            models.UniqueConstraint(fields=['importacao', 'violacoes', 'inicio'], name='bloco_importacao_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.importacao} [{self.inicio}:{self.fim}]"
+
+
+class ImportacaoCirurgia(models.Model):
+    """Resultado de um upload do CSV de cirurgias, com os tempos por etapa."""
+
+    nome_arquivo = models.CharField('Arquivo', max_length=255, blank=True)
+    linhas_processadas = models.PositiveIntegerField('Linhas processadas', default=0)
+    sucesso = models.PositiveIntegerField('Importadas', default=0)
+    erro = models.PositiveIntegerField('Com erro', default=0)
+    erros = models.JSONField('Erros', default=list)
+    tempos = models.JSONField('Tempos por etapa', default=dict)
+
+    enviado_por = models.ForeignKey(
+        Usuario,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='importacoes_cirurgia',
+        verbose_name='Enviado por'
+    )
+    criado_em = models.DateTimeField('Enviado em', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Importação de Cirurgias'
+        verbose_name_plural = 'Importações de Cirurgias'
+        ordering = ['-criado_em']
+
+    def __str__(self):
+        return f"{self.nome_arquivo or 'Importação'} - {self.criado_em:%d/%m/%Y %H:%M}"
+
+
+class PerfilRequisicao(models.Model):
+    """Perfil de uma requisição pedido por um usuário Tier 5 (veja `core/perfis.py`).
+
+    Guarda as funções com maior tempo acumulado segundo o cProfile e, quando
+    pedido, o pico de memória e as linhas que mais alocaram segundo o
+    tracemalloc.
+    """
+
+    usuario = models.ForeignKey(
+        Usuario,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='perfis_requisicao',
+        verbose_name='Usuário'
+    )
+    view = models.CharField('View', max_length=100)
+    metodo = models.CharField('Método', max_length=10)
+    caminho = models.CharField('Caminho', max_length=500)
+    status = models.PositiveSmallIntegerField('Status')
+    duracao = models.FloatField('Duração (s)')
+    consultas = models.PositiveIntegerField('Consultas ao banco', default=0)
+    tempo_banco = models.FloatField('Tempo no banco (s)', default=0)
+    total_chamadas = models.PositiveIntegerField('Chamadas de função', default=0)
+    funcoes = models.JSONField('Funções', default=list)
+    memoria_pico = models.PositiveBigIntegerField('Pico de memória (bytes)', null=True, blank=True)
+    alocacoes = models.JSONField('Alocações', default=list)
+    criado_em = models.DateTimeField('Criado em', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Perfil de Requisição'
+        verbose_name_plural = 'Perfis de Requisição'
+        ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['-criado_em'], name='perfil_criacao_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.metodo} {self.caminho} - {self.criado_em:%d/%m/%Y %H:%M:%S}"
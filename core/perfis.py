@@ -0,0 +1,200 @@
+"""
+Perfil sob demanda de uma requisição, para usuários Tier 5.
+
+Com `?perfil=1` na URL (ou o cabeçalho `X-Perfil: 1`), `PerfilMiddleware`
+executa a requisição sob o cProfile; com `perfil=memoria`, também sob o
+tracemalloc. O resultado vai para PerfilRequisicao, o id volta no cabeçalho
+`X-Perfil-Id` e a página de perfis (Configurações → Perfis de requisição)
+lista e detalha os perfis gravados. Só os `PERFIS_RETIDOS` mais recentes são
+mantidos.
+
+Requisições sem o parâmetro e sem o cabeçalho seguem direto para a view. Pedidos
+de quem não é Tier 5 são ignorados.
+
+O tracemalloc acompanha as alocações do processo inteiro, então só um perfil de
+memória roda por vez; um segundo pedido simultâneo é perfilado só com o
+cProfile. Em respostas em streaming (exportação CSV) o cProfile segue até o
+último bloco, e o tracemalloc cobre só a montagem da resposta.
+"""
+import cProfile
+import logging
+import pstats
+import sysconfig
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError
+
+from .metricas import Medicao, nome_view
+from .models import PerfilRequisicao
+
+
+logger = logging.getLogger(__name__)
+
+MODO_MEMORIA = 'memoria'
+FUNCOES_GRAVADAS = 60
+ALOCACOES_GRAVADAS = 30
+
+_memoria_em_uso = threading.Lock()
+
+
+def _pedido(request):
+    """Modo pedido pela requisição (`'1'`, `'memoria'`...) ou None."""
+    return request.GET.get('perfil') or request.headers.get('X-Perfil')
+
+
+def _local(arquivo, linha):
+    """Caminho curto: a partir do pacote instalado, do projeto ou da biblioteca padrão."""
+    if arquivo.startswith('<') or arquivo == '~':
+        return arquivo
+    caminho = Path(arquivo)
+    partes = caminho.parts
+    if 'site-packages' in partes:
+        caminho = Path(*partes[partes.index('site-packages') + 1:])
+    else:
+        for base in (settings.BASE_DIR, sysconfig.get_paths()['stdlib']):
+            if caminho.is_relative_to(base):
+                caminho = caminho.relative_to(base)
+                break
+    return f'{caminho}:{linha}'
+
+
+def _funcoes(perfil):
+    """Total de chamadas e as funções com maior tempo acumulado."""
+    estatisticas = pstats.Stats(perfil)
+    maiores = sorted(estatisticas.stats.items(), key=lambda item: item[1][3], reverse=True)
+    funcoes = [
+        {
+            'funcao': nome,
+            'local': _local(arquivo, linha),
+            'chamadas': chamadas,
+            'primitivas': primitivas,
+            'tempo_proprio': tempo_proprio,
+            'tempo_acumulado': tempo_acumulado,
+        }
+        for (arquivo, linha, nome), (primitivas, chamadas, tempo_proprio, tempo_acumulado, _)
+        in maiores[:FUNCOES_GRAVADAS]
+    ]
+    return estatisticas.total_calls, funcoes
+
+
+def _alocacoes(snapshot):
+    """Linhas com mais memória ainda alocada no fim da requisição."""
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+    ))
+    return [
+        {
+            'local': _local(stat.traceback[0].filename, stat.traceback[0].lineno),
+            'tamanho': stat.size,
+            'quantidade': stat.count,
+        }
+        for stat in snapshot.statistics('lineno')[:ALOCACOES_GRAVADAS]
+    ]
+
+
+class _Coleta:
+    """cProfile, tracemalloc e contagem de consultas de uma requisição."""
+
+    def __init__(self, memoria):
+        self.perfil = cProfile.Profile()
+        self.medicao = Medicao()
+        # Sem disputar o tracemalloc com outro perfil (ou ferramenta) em andamento
+        self.memoria = memoria and not tracemalloc.is_tracing() and _memoria_em_uso.acquire(blocking=False)
+        self.memoria_pico = None
+        self.alocacoes = []
+        self.inicio = time.perf_counter()
+
+    def iniciar(self):
+        if self.memoria:
+            tracemalloc.start()
+        self.inicio = time.perf_counter()
+        self.perfil.enable()
+
+    def encerrar_memoria(self):
+        if not self.memoria:
+            return
+        try:
+            self.memoria_pico = tracemalloc.get_traced_memory()[1]
+            self.alocacoes = _alocacoes(tracemalloc.take_snapshot())
+        finally:
+            tracemalloc.stop()
+            _memoria_em_uso.release()
+            self.memoria = False
+
+    def gravar(self, request, status):
+        duracao = time.perf_counter() - self.inicio
+        total_chamadas, funcoes = _funcoes(self.perfil)
+        try:
+            perfil = PerfilRequisicao.objects.create(
+                usuario=request.user,
+                view=nome_view(request),
+                metodo=request.method,
+                caminho=request.get_full_path()[:500],
+                status=status,
+                duracao=duracao,
+                consultas=self.medicao.consultas,
+                tempo_banco=self.medicao.tempo_banco,
+                total_chamadas=total_chamadas,
+                funcoes=funcoes,
+                memoria_pico=self.memoria_pico,
+                alocacoes=self.alocacoes,
+            )
+            antigos = list(
+                PerfilRequisicao.objects.values_list('pk', flat=True)[settings.PERFIS_RETIDOS:]
+            )
+            if antigos:
+                PerfilRequisicao.objects.filter(pk__in=antigos).delete()
+        except DatabaseError:
+            logger.exception('Não foi possível gravar o perfil de %s', request.path)
+            return None
+        return perfil
+
+
+class PerfilMiddleware:
+    """Perfila a requisição quando um usuário Tier 5 pede (`?perfil=1` ou `X-Perfil`)."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERFIS_ATIVOS', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        modo = _pedido(request)
+        if not modo or not (request.user.is_authenticated and request.user.is_admin()):
+            return self.get_response(request)
+
+        coleta = _Coleta(memoria=modo == MODO_MEMORIA)
+        coleta.iniciar()
+        try:
+            with coleta.medicao.instalar():
+                response = self.get_response(request)
+        finally:
+            coleta.perfil.disable()
+            coleta.encerrar_memoria()
+
+        if response.streaming:
+            response.streaming_content = self._perfilar_streaming(
+                request, response, response.streaming_content, coleta
+            )
+        else:
+            perfil = coleta.gravar(request, response.status_code)
+            if perfil is not None:
+                response['X-Perfil-Id'] = str(perfil.pk)
+        return response
+
+    def _perfilar_streaming(self, request, response, conteudo, coleta):
+        try:
+            with coleta.medicao.instalar():
+                coleta.perfil.enable()
+                try:
+                    yield from conteudo
+                finally:
+                    coleta.perfil.disable()
+        finally:
+            coleta.gravar(request, response.status_code)
@@ -0,0 +1,136 @@
+"""
+Previsão de vagas ofertadas e agendamentos por especialidade.
+
+Cada série (especialidade × métrica) recebe o modelo mais rico que o seu
+histórico comporta:
+
+- 24 meses ou mais: tendência linear + sazonalidade mensal (mês do ano);
+- de 3 a 23 meses: tendência linear;
+- menos de 3 meses: média dos meses observados.
+
+Os ajustes são mínimos quadrados ponderados resolvidos em lote para todas as
+séries ao mesmo tempo (a ponderação zera os meses sem valor), então o custo
+praticamente não cresce com o número de especialidades. O resultado fica no
+cache sob a versão da produção e é recalculado logo após cada importação.
+"""
+from datetime import date
+
+import numpy as np
+
+from .cache import em_cache
+from .models import Especialidade, ProducaoMensal
+from .series import matriz_producao, para_lista
+
+
+METRICAS = ('vagas_ofertadas', 'total_agendamentos')
+HORIZONTE_MAXIMO = 12
+MINIMO_TENDENCIA = 3
+MINIMO_SAZONAL = 24
+
+# Regularização mínima para que meses do ano nunca observados (ou séries
+# curtas) não tornem o sistema singular; o coeficiente correspondente fica ~0.
+_RIDGE = 1e-6
+
+
+def _desenho(t, sazonal):
+    """Matriz de desenho (len(t), p): intercepto, tendência e, se pedido, 11 dummies de mês.
+
+    `t` conta meses a partir do início da série; como a sazonalidade tem
+    período 12, basta que histórico e projeção usem a mesma origem.
+    """
+    colunas = [np.ones(len(t)), t.astype(float)]
+    if sazonal:
+        colunas.extend((t % 12 == k).astype(float) for k in range(1, 12))
+    return np.column_stack(colunas)
+
+
+def ajustar_em_lote(valores, desenho):
+    """Mínimos quadrados de várias séries com a mesma matriz de desenho.
+
+    `valores` tem forma (séries, meses) e NaN onde não há observação;
+    `desenho` tem forma (meses, p). Retorna os coeficientes (séries, p).
+    """
+    pesos = (~np.isnan(valores)).astype(float)
+    y = np.nan_to_num(valores)
+    xtwx = np.einsum('st,tp,tq->spq', pesos, desenho, desenho) + _RIDGE * np.eye(desenho.shape[1])
+    xtwy = np.einsum('st,tp,st->sp', pesos, desenho, y)
+    return np.linalg.solve(xtwx, xtwy[..., np.newaxis])[..., 0]
+
+
+def projetar(valores, horizonte):
+    """Projeta `horizonte` meses de cada série de `valores` (séries, meses consecutivos).
+
+    Retorna `(projecao, metodo)`: projeção (séries, horizonte), arredondada e
+    sem valores negativos, e o modelo usado em cada série.
+    """
+    total_meses = valores.shape[1]
+    t_historico = np.arange(total_meses)
+    t_futuro = total_meses + np.arange(horizonte)
+    observados = (~np.isnan(valores)).sum(axis=1)
+
+    previsoes = {}
+    for nome, sazonal in (('tendencia', False), ('sazonal', True)):
+        coeficientes = ajustar_em_lote(valores, _desenho(t_historico, sazonal))
+        previsoes[nome] = coeficientes @ _desenho(t_futuro, sazonal).T
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = np.nansum(valores, axis=1) / observados
+    previsoes['media'] = np.broadcast_to(media[:, np.newaxis], (len(valores), horizonte))
+
+    metodo = np.where(
+        observados >= MINIMO_SAZONAL, 'sazonal',
+        np.where(observados >= MINIMO_TENDENCIA, 'tendencia', 'media'),
+    )
+    escolha = metodo[:, np.newaxis]
+    projecao = np.where(
+        escolha == 'sazonal', previsoes['sazonal'],
+        np.where(escolha == 'tendencia', previsoes['tendencia'], previsoes['media']),
+    )
+    return np.clip(np.round(projecao), 0, None), metodo
+
+
+def calcular_previsao():
+    """Projeta as métricas de todas as especialidades para os próximos HORIZONTE_MAXIMO meses."""
+    especialidades, meses, matrizes = matriz_producao(*METRICAS)
+    if not especialidades:
+        return {'meses': [], 'ultimo_mes': None, 'linhas': []}
+
+    # Colunas por mês do calendário, inclusive meses sem importação
+    indices = np.array([m.year * 12 + m.month - 1 for m in meses])
+    inicio = int(indices[0])
+    total_meses = int(indices[-1]) - inicio + 1
+    valores = np.full((len(METRICAS), len(especialidades), total_meses), np.nan)
+    for k, metrica in enumerate(METRICAS):
+        valores[k][:, indices - inicio] = matrizes[metrica]
+
+    series = valores.reshape(-1, total_meses)
+    projecao, metodo = projetar(series, HORIZONTE_MAXIMO)
+    projecao = projecao.reshape(len(METRICAS), len(especialidades), HORIZONTE_MAXIMO)
+    metodo = metodo.reshape(len(METRICAS), len(especialidades))
+
+    proximo = inicio + total_meses
+    meses_futuros = [date((proximo + h) // 12, (proximo + h) % 12 + 1, 1) for h in range(HORIZONTE_MAXIMO)]
+
+    nomes = dict(Especialidade.objects.filter(pk__in=especialidades).values_list('pk', 'nome'))
+    ultimo = valores[..., -1]
+    linhas = [
+        {
+            'especialidade': nomes[pk],
+            'metricas': [
+                {
+                    'metrica': metrica,
+                    'metodo': str(metodo[k, e]),
+                    'ultimo': None if np.isnan(ultimo[k, e]) else float(ultimo[k, e]),
+                    'projecao': para_lista(projecao[k, e]),
+                }
+                for k, metrica in enumerate(METRICAS)
+            ],
+        }
+        for e, pk in enumerate(especialidades)
+    ]
+    linhas.sort(key=lambda linha: linha['especialidade'].casefold())
+    return {'meses': meses_futuros, 'ultimo_mes': meses[-1], 'linhas': linhas}
+
+
+def previsao():
+    """Previsão cacheada até a próxima importação (ou mudança de especialidades)."""
+    return em_cache('previsao', (ProducaoMensal, Especialidade), calcular_previsao)
@@ -0,0 +1,95 @@
+"""
+Roteamento de leituras para a réplica do banco.
+
+Só as views marcadas com `@leitura_replica` (dashboards, listas e exportações)
+leem da réplica, e apenas em GET/HEAD. Gravações e todo o resto continuam no
+primário. Depois de qualquer requisição de escrita o usuário recebe um cookie
+que o mantém no primário por `DB_REPLICA_ATRASO_MAX` segundos, de modo que o
+redirecionamento após gravar (ex.: `producao_confirmar` → `producao_dashboard`)
+já enxerga os dados novos.
+"""
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+ALIAS_REPLICA = 'replica'
+COOKIE_PRIMARIO = 'farol_primario'
+
+_usar_replica = ContextVar('farol_usar_replica', default=False)
+
+
+def replica_configurada():
+    return ALIAS_REPLICA in settings.DATABASES
+
+
+def lendo_da_replica():
+    """Indica se a requisição atual está lendo da réplica."""
+    return _usar_replica.get()
+
+
+def banco_leitura():
+    """Alias a usar em consultas avaliadas fora da view (ex.: respostas em streaming)."""
+    return ALIAS_REPLICA if _usar_replica.get() else DEFAULT_DB_ALIAS
+
+
+class RoteadorReplica:
+    """Envia as leituras dos modelos do core para a réplica quando permitido."""
+
+    def db_for_read(self, model, **hints):
+        if _usar_replica.get() and model._meta.app_label == 'core':
+            return ALIAS_REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bancos = {DEFAULT_DB_ALIAS, ALIAS_REPLICA}
+        if obj1._state.db in bancos and obj2._state.db in bancos:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # A réplica recebe o esquema por replicação (ou cópia do arquivo)
+        if db == ALIAS_REPLICA:
+            return False
+        return None
+
+
+def leitura_replica(view_func):
+    """Decorator que executa a view lendo da réplica, se houver uma configurada."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if (
+            not replica_configurada()
+            or request.method not in ('GET', 'HEAD')
+            or COOKIE_PRIMARIO in request.COOKIES
+        ):
+            return view_func(request, *args, **kwargs)
+        token = _usar_replica.set(True)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _usar_replica.reset(token)
+    return wrapper
+
+
+class FixarPrimarioMiddleware:
+    """Após uma requisição de escrita, mantém o usuário no primário por alguns segundos."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if replica_configurada() and request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            response.set_cookie(
+                COOKIE_PRIMARIO, '1',
+                max_age=settings.DB_REPLICA_ATRASO_MAX,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
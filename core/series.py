@@ -0,0 +1,68 @@
+"""
+Produção mensal em forma de matriz (especialidade × mês).
+
+Os cálculos sobre a produção (valoração, anomalias, previsão) operam sobre
+todas as especialidades e meses de uma vez. `matriz_producao` carrega os
+campos pedidos em uma única consulta e os organiza em arrays numpy indexados
+pela especialidade canônica (`especialidade_ref`) e pelo mês.
+"""
+import numpy as np
+
+from .models import ProducaoMensal
+
+
+def _coluna(valores):
+    return np.fromiter((np.nan if v is None else float(v) for v in valores), dtype=float, count=len(valores))
+
+
+def matriz_producao(*campos, agregacao='soma', queryset=None):
+    """Carrega `campos` de ProducaoMensal em matrizes especialidade × mês.
+
+    Retorna `(especialidades, meses, matrizes)`: ids de Especialidade em
+    ordem crescente, meses (date) em ordem cronológica e um dict
+    campo → ndarray (len(especialidades), len(meses)) com NaN onde não há
+    valor. Registros sem `especialidade_ref` ficam de fora. Quando um mês tem
+    mais de uma linha da mesma especialidade canônica (grafias diferentes na
+    planilha), os valores são combinados por `agregacao`: 'soma' ou 'media',
+    para todos os campos, ou um dict campo → agregação.
+    """
+    if not isinstance(agregacao, dict):
+        agregacao = dict.fromkeys(campos, agregacao)
+    for modo in agregacao.values():
+        if modo not in ('soma', 'media'):
+            raise ValueError(f'Agregação inválida: {modo}')
+    qs = ProducaoMensal.objects.all() if queryset is None else queryset
+    linhas = list(
+        qs.filter(especialidade_ref__isnull=False)
+        .values_list('especialidade_ref', 'mes_ano', *campos)
+        .order_by()
+    )
+    if not linhas:
+        return [], [], {campo: np.empty((0, 0)) for campo in campos}
+
+    colunas = list(zip(*linhas))
+    especialidades, linha_idx = np.unique(np.array(colunas[0]), return_inverse=True)
+    meses, coluna_idx = np.unique(np.array(colunas[1], dtype='datetime64[D]'), return_inverse=True)
+    forma = (len(especialidades), len(meses))
+
+    matrizes = {}
+    for campo, valores in zip(campos, colunas[2:]):
+        valores = _coluna(valores)
+        presentes = ~np.isnan(valores)
+        soma = np.zeros(forma)
+        quantidade = np.zeros(forma)
+        np.add.at(soma, (linha_idx[presentes], coluna_idx[presentes]), valores[presentes])
+        np.add.at(quantidade, (linha_idx[presentes], coluna_idx[presentes]), 1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            matriz = soma / quantidade if agregacao[campo] == 'media' else soma
+        matriz[quantidade == 0] = np.nan
+        matrizes[campo] = matriz
+
+    return especialidades.tolist(), meses.astype(object).tolist(), matrizes
+
+
+def para_lista(array):
+    """Converte um ndarray em listas aninhadas de float, com None no lugar de NaN."""
+    if array.ndim > 1:
+        return [para_lista(linha) for linha in array]
+    return [None if np.isnan(v) else float(v) for v in array]
@@ -0,0 +1,42 @@
+"""
+Backend de sessão com leitura via cache e gravação espaçada da expiração.
+
+Com `SESSION_SAVE_EVERY_REQUEST = True` o backend padrão grava em
+`django_session` a cada requisição só para renovar a expiração. Aqui a
+sessão é lida do cache (com fallback para o banco) e, se nada mudou, a
+expiração só é regravada depois que a fração `SESSION_GRAVACAO_FRACAO` de
+`SESSION_COOKIE_AGE` tiver passado desde a última gravação.
+
+Consequência: o tempo de inatividade até a sessão expirar fica entre
+`SESSION_COOKIE_AGE * (1 - SESSION_GRAVACAO_FRACAO)` e `SESSION_COOKIE_AGE`.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBSessionStore
+
+
+# Guardado dentro dos dados da sessão para não exigir consulta extra
+CHAVE_GRAVADA_EM = '_farol_gravada_em'
+
+
+class SessionStore(CachedDBSessionStore):
+
+    def _gravacao_recente(self):
+        gravada_em = self._get_session().get(CHAVE_GRAVADA_EM)
+        if gravada_em is None:
+            return False
+        intervalo = self.get_expiry_age() * getattr(settings, 'SESSION_GRAVACAO_FRACAO', 0.25)
+        return time.time() - gravada_em < intervalo
+
+    def save(self, must_create=False):
+        if (
+            not must_create
+            and self.session_key is not None
+            and not self.modified
+            and self._gravacao_recente()
+        ):
+            return
+        # Atribuição direta para não marcar a sessão como modificada
+        self._get_session(no_load=must_create)[CHAVE_GRAVADA_EM] = int(time.time())
+        super().save(must_create=must_create)
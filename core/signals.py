@@ -0,0 +1,37 @@
+"""Sinais do app core."""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidar
+from .models import (
+    Usuario, Empresa, Medico, Cirurgia, Exame, ServicoMedico, ProducaoMensal, MesProducao, Especialidade,
+)
+
+
+# Modelos cujas listas, contagens e dashboards são servidos a partir do cache
+MODELOS_CACHEAVEIS = (
+    Usuario, Empresa, Medico, Cirurgia, Exame, ServicoMedico, ProducaoMensal, MesProducao, Especialidade,
+)
+
+
+def invalidar_cache_modelo(sender, using=None, **kwargs):
+    """Incrementa a versão de cache do modelo gravado ou excluído."""
+    invalidar(sender, using=using)
+
+
+# Conectado só aos modelos cacheáveis: um receiver sem `sender` faria todo
+# QuerySet.delete() carregar os registros para emitir post_delete um a um.
+for _modelo in MODELOS_CACHEAVEIS:
+    post_save.connect(invalidar_cache_modelo, sender=_modelo)
+    post_delete.connect(invalidar_cache_modelo, sender=_modelo)
+
+
+@receiver(connection_created)
+def configurar_sqlite(sender, connection, **kwargs):
+    """Aplica os PRAGMAs de SQLITE_PRAGMAS a cada nova conexão SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    for pragma, valor in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+        connection.connection.execute(f'PRAGMA {pragma} = {valor}')
@@ -0,0 +1,461 @@
+"""
+Dados sintéticos para testes de escala.
+
+Gera cadastros (usuários, empresas, médicos, cirurgias, exames, serviços) e
+histórico de produção com documentos em formato válido (CPF e CNPJ com
+dígitos verificadores, códigos no padrão SIGTAP `GG.SS.FF.PPP-D`) e valores
+coerentes com as regras de `core/validacao.py`. Os registros são gravados com
+`bulk_create` em lotes; a senha dos usuários é calculada uma única vez.
+
+Também escreve planilhas de produção no layout aceito pelo upload (mês em
+F3, dados a partir da linha 8, colunas A a M) em XLSX, XLS (HTML) e CSV.
+
+Os identificadores derivam de um número sequencial, então execuções
+seguidas não repetem CPF, CNPJ, e-mail ou código. O gerador é determinístico
+para a mesma semente e o mesmo ponto de partida.
+"""
+import csv
+import html
+import math
+import random
+from datetime import date
+from decimal import Decimal
+from functools import lru_cache
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .cache import invalidar
+from .especialidades import mapa_especialidades
+from .models import (
+    Cirurgia, Empresa, Exame, ImportacaoProducao, Medico, MesProducao, ProducaoMensal,
+    ServicoMedico, Usuario,
+)
+
+
+SENHA_PADRAO = 'sintetico123'
+
+NOMES = [
+    'Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela', 'João',
+    'Karina', 'Lucas', 'Mariana', 'Nicolas', 'Olívia', 'Paulo', 'Rafaela', 'Samuel', 'Tatiana', 'Vitor',
+]
+SOBRENOMES = [
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima', 'Gomes',
+    'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes', 'Soares', 'Fernandes', 'Vieira', 'Barbosa',
+]
+ESPECIALIDADES = [
+    'Cardiologia', 'Ortopedia', 'Oftalmologia', 'Otorrinolaringologia', 'Urologia', 'Dermatologia',
+    'Endocrinologia', 'Gastroenterologia', 'Neurologia', 'Pneumologia', 'Reumatologia', 'Nefrologia',
+    'Cirurgia Geral', 'Cirurgia Vascular', 'Cirurgia Plástica', 'Ginecologia', 'Mastologia',
+    'Proctologia', 'Hematologia', 'Oncologia', 'Infectologia', 'Geriatria', 'Alergologia',
+    'Cirurgia Pediátrica', 'Neurocirurgia', 'Cirurgia de Cabeça e Pescoço', 'Fisiatria', 'Psiquiatria',
+]
+PROCEDIMENTOS = [
+    'Exérese de lesão', 'Correção de hérnia', 'Artroscopia', 'Facectomia', 'Septoplastia',
+    'Colecistectomia', 'Biópsia', 'Ressecção', 'Drenagem', 'Reconstrução', 'Tenorrafia',
+    'Varicectomia', 'Postectomia', 'Amigdalectomia', 'Sutura',
+]
+REGIOES = ['simples', 'múltipla', 'bilateral', 'unilateral', 'com enxerto', 'por videolaparoscopia']
+EXAMES = [
+    'Hemograma completo', 'Glicemia de jejum', 'Ultrassonografia', 'Tomografia computadorizada',
+    'Ressonância magnética', 'Eletrocardiograma', 'Ecocardiograma', 'Espirometria', 'Endoscopia',
+    'Colonoscopia', 'Mamografia', 'Densitometria óssea', 'Anatomopatológico', 'Citopatológico',
+]
+SERVICOS = [
+    'Consulta médica em atenção especializada', 'Retorno', 'Teleconsulta', 'Procedimento ambulatorial',
+    'Avaliação pré-operatória', 'Curativo', 'Infiltração', 'Aplicação de medicamento',
+]
+CIDADES = [('São Paulo', 'SP'), ('Campinas', 'SP'), ('Santos', 'SP'), ('Sorocaba', 'SP'), ('Jundiaí', 'SP')]
+
+# Grupos da tabela SIGTAP usados por cada cadastro
+GRUPO_CIRURGIA = 4
+GRUPO_EXAME = 2
+GRUPO_SERVICO = 3
+
+# Multiplicador coprimo com 10: espalha os números sequenciais sem repeti-los
+_ESPALHAMENTO = 387_420_489
+
+
+def _digito_mod11(digitos, pesos):
+    resto = sum(d * p for d, p in zip(digitos, pesos)) % 11
+    return 0 if resto < 2 else 11 - resto
+
+
+def cpf(sequencia):
+    """CPF formatado e com dígitos verificadores válidos, único por `sequencia`."""
+    base = [int(c) for c in f'{sequencia * _ESPALHAMENTO % 10 ** 9:09d}']
+    base.append(_digito_mod11(base, range(10, 1, -1)))
+    base.append(_digito_mod11(base, range(11, 1, -1)))
+    d = ''.join(map(str, base))
+    return f'{d[:3]}.{d[3:6]}.{d[6:9]}-{d[9:]}'
+
+
+def cnpj(sequencia):
+    """CNPJ (matriz 0001) formatado e com dígitos verificadores válidos, único por `sequencia`."""
+    base = [int(c) for c in f'{sequencia * _ESPALHAMENTO % 10 ** 8:08d}0001']
+    base.append(_digito_mod11(base, [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]))
+    base.append(_digito_mod11(base, [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]))
+    d = ''.join(map(str, base))
+    return f'{d[:2]}.{d[2:5]}.{d[5:8]}/{d[8:12]}-{d[12:]}'
+
+
+def codigo_sigtap(grupo, sequencia):
+    """Código no formato SIGTAP (GG.SS.FF.PPP-D) do grupo, único por `sequencia` no grupo."""
+    resto = f'{sequencia * _ESPALHAMENTO % 10 ** 7:07d}'
+    digitos = [int(c) for c in f'{grupo:02d}{resto}']
+    dv = _digito_mod11(digitos, range(10, 1, -1)) % 10
+    return f'{grupo:02d}.{resto[:2]}.{resto[2:4]}.{resto[4:]}-{dv}'
+
+
+def nome_especialidade(indice):
+    """Nomes reais primeiro; depois variações numeradas ("Cardiologia 2"...)."""
+    nome = ESPECIALIDADES[indice % len(ESPECIALIDADES)]
+    rodada = indice // len(ESPECIALIDADES)
+    return nome if rodada == 0 else f'{nome} {rodada + 1}'
+
+
+def _nome_pessoa(rng):
+    return f'{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}'
+
+
+def _proxima_sequencia(modelo):
+    return (modelo._base_manager.aggregate(m=Max('pk'))['m'] or 0) + 1
+
+
+def _gravar(modelo, objetos, lote):
+    """bulk_create de um iterável em blocos de `lote`, sem materializar tudo.
+
+    bulk_create não dispara post_save: a versão de cache do modelo é
+    incrementada aqui, uma vez por chamada.
+    """
+    total = 0
+    bloco = []
+    for objeto in objetos:
+        bloco.append(objeto)
+        if len(bloco) >= lote:
+            modelo._base_manager.bulk_create(bloco)
+            total += len(bloco)
+            bloco = []
+    if bloco:
+        modelo._base_manager.bulk_create(bloco)
+        total += len(bloco)
+    invalidar(modelo)
+    return total
+
+
+def _valor(rng, minimo, maximo):
+    return Decimal(rng.randint(minimo * 100, maximo * 100)).scaleb(-2)
+
+
+def gerar_usuarios(quantidade, rng, lote):
+    inicio = _proxima_sequencia(Usuario)
+    senha = make_password(SENHA_PADRAO)
+
+    def _usuarios():
+        for seq in range(inicio, inicio + quantidade):
+            nome = _nome_pessoa(rng)
+            yield Usuario(
+                username=f'sintetico{seq}',
+                email=f'sintetico{seq}@exemplo.com.br',
+                nome_completo=nome,
+                first_name=nome.split()[0],
+                cpf=cpf(seq),
+                drt=str(100000 + seq),
+                tier=rng.choice((1, 1, 1, 2, 2, 3, 4, 5)),
+                primeiro_acesso=False,
+                password=senha,
+            )
+    return _gravar(Usuario, _usuarios(), lote)
+
+
+def gerar_empresas(quantidade, rng, lote, usuarios):
+    inicio = _proxima_sequencia(Empresa)
+
+    def _empresas():
+        for seq in range(inicio, inicio + quantidade):
+            sobrenome = rng.choice(SOBRENOMES)
+            cidade, estado = rng.choice(CIDADES)
+            yield Empresa(
+                razao_social=f'{sobrenome} Serviços Médicos {seq} Ltda',
+                nome_fantasia=f'Clínica {sobrenome} {seq}',
+                cnpj=cnpj(seq),
+                cep=f'{rng.randint(1000, 19999):05d}-{rng.randint(0, 999):03d}',
+                logradouro=f'Rua {rng.choice(SOBRENOMES)}',
+                numero=str(rng.randint(1, 3000)),
+                bairro='Centro',
+                cidade=cidade,
+                estado=estado,
+                telefone=f'(11) 3{rng.randint(0, 9999999):07d}',
+                email=f'contato{seq}@empresa-sintetica.com.br',
+                ativa=rng.random() > 0.05,
+                cadastrado_por_id=rng.choice(usuarios) if usuarios else None,
+            )
+    return _gravar(Empresa, _empresas(), lote)
+
+
+def gerar_medicos(quantidade, rng, lote, usuarios, especialidades):
+    inicio = _proxima_sequencia(Medico)
+    ids = mapa_especialidades(especialidades)
+
+    def _medicos():
+        for seq in range(inicio, inicio + quantidade):
+            especialidade = rng.choice(especialidades)
+            yield Medico(
+                nome_completo=_nome_pessoa(rng),
+                crm=f'CRM/SP {seq:06d}',
+                # Faixa diferente da dos usuários, para não repetir CPFs entre cadastros
+                cpf=cpf(10 ** 8 + seq),
+                especialidade=especialidade[:100],
+                especialidade_ref_id=ids.get(especialidade),
+                telefone=f'(11) 9{rng.randint(0, 99999999):08d}',
+                email=f'medico{seq}@exemplo.com.br',
+                ativo=rng.random() > 0.05,
+                cadastrado_por_id=rng.choice(usuarios) if usuarios else None,
+            )
+    return _gravar(Medico, _medicos(), lote)
+
+
+def gerar_cirurgias(quantidade, rng, lote, usuarios, especialidades):
+    inicio = _proxima_sequencia(Cirurgia)
+    ids = mapa_especialidades(especialidades)
+
+    def _cirurgias():
+        for seq in range(inicio, inicio + quantidade):
+            especialidade = rng.choice(especialidades)
+            yield Cirurgia(
+                codigo_sigtap=codigo_sigtap(GRUPO_CIRURGIA, seq),
+                descricao=f'{rng.choice(PROCEDIMENTOS)} {rng.choice(REGIOES)}',
+                valor=_valor(rng, 50, 5000),
+                tipo_cirurgia=rng.choice(('CMA', 'cma')),
+                especialidade=especialidade[:100],
+                especialidade_ref_id=ids.get(especialidade),
+                ativa=rng.random() > 0.05,
+                cadastrado_por_id=rng.choice(usuarios) if usuarios else None,
+            )
+    return _gravar(Cirurgia, _cirurgias(), lote)
+
+
+def gerar_exames(quantidade, rng, lote, usuarios):
+    inicio = _proxima_sequencia(Exame)
+    tipos = [tipo for tipo, _ in Exame.TIPO_CHOICES]
+
+    def _exames():
+        for seq in range(inicio, inicio + quantidade):
+            yield Exame(
+                codigo_sigtap=codigo_sigtap(GRUPO_EXAME, seq),
+                descricao=f'{rng.choice(EXAMES)} {rng.choice(REGIOES)}',
+                valor=_valor(rng, 2, 1500),
+                tipo_exame=rng.choice(tipos),
+                preparo='Jejum de 8 horas.' if rng.random() < 0.3 else '',
+                ativo=rng.random() > 0.05,
+                cadastrado_por_id=rng.choice(usuarios) if usuarios else None,
+            )
+    return _gravar(Exame, _exames(), lote)
+
+
+def gerar_servicos(quantidade, rng, lote, usuarios, especialidades):
+    inicio = _proxima_sequencia(ServicoMedico)
+    ids = mapa_especialidades(especialidades)
+
+    def _servicos():
+        for seq in range(inicio, inicio + quantidade):
+            especialidade = rng.choice(especialidades)
+            yield ServicoMedico(
+                codigo_sigtap=codigo_sigtap(GRUPO_SERVICO, seq),
+                descricao=f'{rng.choice(SERVICOS)} - {especialidade}'[:500],
+                valor=_valor(rng, 10, 300),
+                especialidade=especialidade[:100],
+                especialidade_ref_id=ids.get(especialidade),
+                duracao_estimada=rng.choice((15, 20, 30, 45, 60)),
+                ativo=rng.random() > 0.05,
+                cadastrado_por_id=rng.choice(usuarios) if usuarios else None,
+            )
+    return _gravar(ServicoMedico, _servicos(), lote)
+
+
+def _percentual(parte, total):
+    return f'{parte / total * 100:.2f}' if total else None
+
+
+@lru_cache(maxsize=None)
+def _oferta_base(especialidade):
+    """Oferta mensal típica da especialidade, estável entre meses e execuções."""
+    return 40 + random.Random(especialidade).randint(0, 760)
+
+
+def registros_producao(mes_ano, especialidades, rng, anomalias=0.01):
+    """Registros de um mês no formato dos parsers do upload (percentuais em texto).
+
+    A oferta de cada especialidade segue uma base estável (derivada do nome),
+    sazonalidade anual e ruído; uma fração `anomalias` dos valores sai bem
+    fora do padrão, para exercitar `core/anomalias.py`.
+    """
+    sazonalidade = 1 + 0.12 * math.cos(2 * math.pi * (mes_ano.month - 1) / 12)
+    registros = []
+    for linha, especialidade in enumerate(especialidades, start=8):
+        base = _oferta_base(especialidade)
+        fator = sazonalidade * rng.gauss(1, 0.06)
+        if rng.random() < anomalias:
+            fator *= rng.choice((0.3, 1.9))
+        vagas = max(int(base * fator), 0)
+        cota = int(vagas * rng.uniform(0.5, 0.7))
+        bolsao = int(vagas * rng.uniform(0.1, 0.2))
+        nao_distribuidas = min(int(vagas * rng.uniform(0, 0.1)), vagas - cota - bolsao)
+        extras = int(vagas * rng.uniform(0, 0.08))
+        agendamentos = min(cota + bolsao + int(extras * rng.uniform(0.5, 1)), vagas + extras)
+        registros.append({
+            'linha': linha,
+            'especialidade': especialidade,
+            'vagas_ofertadas': vagas,
+            'total_agendamentos': agendamentos,
+            'perc_agendamentos': _percentual(agendamentos, vagas),
+            'agendamentos_cota': cota,
+            'perc_cota': _percentual(cota, vagas),
+            'vagas_bolsao': bolsao,
+            'perc_bolsao': _percentual(bolsao, vagas),
+            'vagas_nao_distribuidas': nao_distribuidas,
+            'perc_nao_distribuidas': _percentual(nao_distribuidas, vagas),
+            'vagas_extras': extras,
+            'perc_extras': _percentual(extras, vagas),
+            'perc_desperdicadas': _percentual(max(vagas - agendamentos, 0), vagas),
+        })
+    return registros
+
+
+def _decimal(valor):
+    return Decimal(valor) if valor is not None else None
+
+
+def gerar_producao(meses, especialidades, rng, lote, usuario_id=None):
+    """Grava um lote ativo de produção por mês, como importações já confirmadas.
+
+    Retorna a quantidade de registros de ProducaoMensal gravados. Meses que já
+    tinham produção passam a exibir o lote sintético (o anterior fica inativo).
+    """
+    ids = mapa_especialidades(especialidades)
+    total = 0
+    agora = timezone.now()
+    for mes_ano in meses:
+        with transaction.atomic():
+            registros = registros_producao(mes_ano, especialidades, rng)
+            importacao = ImportacaoProducao.objects.create(
+                mes_ano=mes_ano,
+                nome_arquivo='dados sintéticos',
+                total_registros=len(registros),
+                enviado_por_id=usuario_id,
+                confirmado_em=agora,
+            )
+            total += _gravar(ProducaoMensal, (
+                ProducaoMensal(
+                    importacao=importacao,
+                    mes_ano=mes_ano,
+                    especialidade=reg['especialidade'],
+                    especialidade_ref_id=ids.get(reg['especialidade']),
+                    vagas_ofertadas=reg['vagas_ofertadas'],
+                    total_agendamentos=reg['total_agendamentos'],
+                    perc_agendamentos=_decimal(reg['perc_agendamentos']),
+                    agendamentos_cota=reg['agendamentos_cota'],
+                    perc_cota=_decimal(reg['perc_cota']),
+                    vagas_bolsao=reg['vagas_bolsao'],
+                    perc_bolsao=_decimal(reg['perc_bolsao']),
+                    vagas_nao_distribuidas=reg['vagas_nao_distribuidas'],
+                    perc_nao_distribuidas=_decimal(reg['perc_nao_distribuidas']),
+                    vagas_extras=reg['vagas_extras'],
+                    perc_extras=_decimal(reg['perc_extras']),
+                    perc_desperdicadas=_decimal(reg['perc_desperdicadas']),
+                    importado_por_id=usuario_id,
+                )
+                for reg in registros
+            ), lote)
+            # Sem ativar_importacao: anomalias e previsão são recalculadas uma vez no fim
+            MesProducao.objects.update_or_create(mes_ano=mes_ano, defaults={'importacao_ativa': importacao})
+    return total
+
+
+def meses_ate(ultimo, quantidade):
+    """Os `quantidade` meses terminados em `ultimo`, do mais antigo ao mais recente."""
+    indice = ultimo.year * 12 + ultimo.month - 1
+    return [date((i // 12), i % 12 + 1, 1) for i in range(indice - quantidade + 1, indice + 1)]
+
+
+# ===== PLANILHAS =====
+
+CABECALHO_COLUNAS = [
+    'Especialidade', 'Vagas Ofertadas', 'Total de Agendamentos', '% Agendamentos',
+    'Agendamentos da Cota', '% da Cota', 'Vagas de Bolsão', '% de Bolsão',
+    'Vagas Não Distribuídas', '% Não Distribuídas', 'Vagas Extras', '% Extras', '% Desperdiçadas',
+]
+CAMPOS_PLANILHA = [
+    'vagas_ofertadas', 'total_agendamentos', 'perc_agendamentos', 'agendamentos_cota', 'perc_cota',
+    'vagas_bolsao', 'perc_bolsao', 'vagas_nao_distribuidas', 'perc_nao_distribuidas',
+    'vagas_extras', 'perc_extras', 'perc_desperdicadas',
+]
+
+
+def linhas_planilha(mes_ano, registros, texto=True):
+    """Linhas A a M da planilha: título, mês em F3, cabeçalho na linha 7 e dados a partir da 8.
+
+    Com `texto`, números saem como no Excel em português ("90,00"); sem, como
+    números (para o XLSX).
+    """
+    vazia = [''] * 13
+    linhas = [list(vazia) for _ in range(7)]
+    linhas[0][0] = 'Relatório de Produção - Agendamento de Consultas'
+    linhas[2][4] = 'Mês de referência:'
+    linhas[2][5] = mes_ano.strftime('%m/%Y')
+    linhas[6] = list(CABECALHO_COLUNAS)
+    for reg in registros:
+        valores = [reg[campo] for campo in CAMPOS_PLANILHA]
+        if texto:
+            valores = ['' if v is None else str(v).replace('.', ',') for v in valores]
+        else:
+            valores = [None if v is None else (float(v) if isinstance(v, str) else v) for v in valores]
+        linhas.append([reg['especialidade'], *valores])
+    return linhas
+
+
+def escrever_csv(caminho, mes_ano, registros):
+    with open(caminho, 'w', newline='', encoding='utf-8') as arquivo:
+        csv.writer(arquivo, delimiter=';').writerows(linhas_planilha(mes_ano, registros))
+
+
+def escrever_xls_html(caminho, mes_ano, registros):
+    """Tabela HTML com extensão .xls, como a exportada pelos sistemas web de agendamento."""
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        arquivo.write('<html><head><meta charset="utf-8"></head><body><table>\n')
+        for linha in linhas_planilha(mes_ano, registros):
+            arquivo.write('<tr>' + ''.join(f'<td>{html.escape(c)}</td>' for c in linha) + '</tr>\n')
+        arquivo.write('</table></body></html>\n')
+
+
+def escrever_xlsx(caminho, mes_ano, registros):
+    import openpyxl
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet('Produção')
+    for linha in linhas_planilha(mes_ano, registros, texto=False):
+        ws.append([None if c == '' else c for c in linha])
+    wb.save(caminho)
+
+
+ESCRITORES = {
+    'xlsx': escrever_xlsx,
+    'xls': escrever_xls_html,
+    'csv': escrever_csv,
+}
+
+
+def escrever_csv_cirurgias(caminho, quantidade, rng, inicio=1):
+    """CSV no formato do upload de cirurgias (cabeçalho + `quantidade` procedimentos)."""
+    with open(caminho, 'w', newline='', encoding='utf-8') as arquivo:
+        escritor = csv.writer(arquivo, delimiter=';')
+        escritor.writerow(['Codigo SIGTAP', 'Descricao', 'Valor', 'Tipo Cirurgia', 'Especialidade'])
+        for seq in range(inicio, inicio + quantidade):
+            escritor.writerow([
+                codigo_sigtap(GRUPO_CIRURGIA, seq),
+                f'{rng.choice(PROCEDIMENTOS)} {rng.choice(REGIOES)}',
+                str(_valor(rng, 50, 5000)).replace('.', ','),
+                rng.choice(('CMA', 'cma')),
+                rng.choice(ESPECIALIDADES),
+            ])
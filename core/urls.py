@@ -37,6 +37,7 @@ urlpatterns = [
     path('config/cirurgias/nova/', views.cirurgia_criar_view, name='cirurgia_criar'),
     path('config/cirurgias/<int:pk>/editar/', views.cirurgia_editar_view, name='cirurgia_editar'),
     path('config/cirurgias/upload/', views.cirurgia_upload_view, name='cirurgia_upload'),
+    path('config/cirurgias/upload/<int:pk>/', views.cirurgia_upload_resultado_view, name='cirurgia_upload_resultado'),
     
     # Exames
     path('config/exames/', views.exame_lista_view, name='exame_lista'),
@@ -47,10 +48,26 @@ urlpatterns = [
     path('config/servicos/', views.servico_lista_view, name='servico_lista'),
     path('config/servicos/novo/', views.servico_criar_view, name='servico_criar'),
     path('config/servicos/<int:pk>/editar/', views.servico_editar_view, name='servico_editar'),
+    
+    # Diagnóstico
+    path('config/consultas-lentas/', views.consultas_lentas_view, name='consultas_lentas'),
+    path('config/perfis/', views.perfis_view, name='perfis'),
+    path('config/perfis/<int:pk>/', views.perfil_detalhe_view, name='perfil_detalhe'),
 
     # ========== MÓDULO DE PRODUÇÃO ==========
     path('producao/', views.producao_menu_view, name='producao_menu'),
     path('producao/upload/', views.producao_upload_view, name='producao_upload'),
     path('producao/confirmar/', views.producao_confirmar_view, name='producao_confirmar'),
+    path('producao/confirmar/linhas/', views.producao_confirmar_linhas_view, name='producao_confirmar_linhas'),
     path('producao/dashboard/', views.producao_dashboard_view, name='producao_dashboard'),
+    path('producao/exportar/', views.producao_exportar_view, name='producao_exportar'),
+    path('producao/importacoes/', views.producao_importacoes_view, name='producao_importacoes'),
+    path('producao/importacoes/<int:pk>/ativar/', views.producao_importacao_ativar_view, name='producao_importacao_ativar'),
+    path('producao/anomalias/', views.producao_anomalias_view, name='producao_anomalias'),
+    path('producao/previsao/', views.producao_previsao_view, name='producao_previsao'),
+    path('producao/catalogo/', views.producao_catalogo_view, name='producao_catalogo'),
+    path('producao/valoracao/', views.producao_valoracao_view, name='producao_valoracao'),
+
+    # Métricas (Tier 5)
+    path('metrics', views.metricas_view, name='metricas'),
 ]
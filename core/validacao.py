@@ -0,0 +1,148 @@
+"""
+Regras de consistência das linhas de produção importadas.
+
+As regras são declaradas em `REGRAS` e avaliadas coluna a coluna sobre o lote
+inteiro (arrays numpy), antes da confirmação da importação. Campos em branco
+não violam nenhuma regra: uma comparação com valor ausente é sempre falsa.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+
+Regra = namedtuple('Regra', ['codigo', 'descricao', 'teste'])
+
+CAMPOS_QUANTIDADE = [
+    'vagas_ofertadas', 'total_agendamentos', 'agendamentos_cota', 'vagas_bolsao',
+    'vagas_nao_distribuidas', 'vagas_extras',
+]
+CAMPOS_PERCENTUAL = [
+    'perc_agendamentos', 'perc_cota', 'perc_bolsao', 'perc_nao_distribuidas',
+    'perc_extras', 'perc_desperdicadas',
+]
+
+# Diferença aceita entre o percentual informado e o calculado (pontos percentuais)
+TOLERANCIA_PERCENTUAL = 1.0
+
+# Linhas da planilha guardadas por regra violada (o resumo vai para o JSON da importação)
+LIMITE_LINHAS = 30
+
+
+def _soma(c, *campos):
+    """Soma por linha ignorando campos em branco (NaN só se todos estiverem em branco)."""
+    valores = np.stack([c[campo] for campo in campos])
+    return np.where(np.isnan(valores).all(axis=0), np.nan, np.nansum(valores, axis=0))
+
+
+def _percentual_confere(parte, percentual):
+    def teste(c):
+        calculado = c[parte] / c['vagas_ofertadas'] * 100
+        return np.abs(calculado - c[percentual]) > TOLERANCIA_PERCENTUAL
+    return teste
+
+
+REGRAS = [
+    Regra(
+        'celula_invalida',
+        'Célula com valor não numérico (será gravada em branco)',
+        lambda c: c['celulas_invalidas'] > 0,
+    ),
+    Regra(
+        'negativo',
+        'Quantidade ou percentual negativo',
+        lambda c: np.any([c[campo] < 0 for campo in CAMPOS_QUANTIDADE + CAMPOS_PERCENTUAL], axis=0),
+    ),
+    Regra(
+        'percentual_acima_100',
+        'Percentual acima de 100%',
+        lambda c: np.any([c[campo] > 100 for campo in CAMPOS_PERCENTUAL if campo != 'perc_extras'], axis=0),
+    ),
+    Regra(
+        'distribuicao_excede_oferta',
+        'Cota + bolsão + não distribuídas maior que as vagas ofertadas',
+        lambda c: _soma(c, 'agendamentos_cota', 'vagas_bolsao', 'vagas_nao_distribuidas') > c['vagas_ofertadas'],
+    ),
+    Regra(
+        'agendamentos_excedem_oferta',
+        'Total de agendamentos maior que vagas ofertadas + vagas extras',
+        lambda c: c['total_agendamentos'] > _soma(c, 'vagas_ofertadas', 'vagas_extras'),
+    ),
+    Regra(
+        'perc_agendamentos_inconsistente',
+        '% Agendamentos não confere com total de agendamentos / vagas ofertadas',
+        _percentual_confere('total_agendamentos', 'perc_agendamentos'),
+    ),
+    Regra(
+        'perc_cota_inconsistente',
+        '% da Cota não confere com agendamentos da cota / vagas ofertadas',
+        _percentual_confere('agendamentos_cota', 'perc_cota'),
+    ),
+    Regra(
+        'perc_bolsao_inconsistente',
+        '% de Bolsão não confere com vagas de bolsão / vagas ofertadas',
+        _percentual_confere('vagas_bolsao', 'perc_bolsao'),
+    ),
+    Regra(
+        'perc_nao_distribuidas_inconsistente',
+        '% Não Distribuídas não confere com vagas não distribuídas / vagas ofertadas',
+        _percentual_confere('vagas_nao_distribuidas', 'perc_nao_distribuidas'),
+    ),
+    Regra(
+        'perc_extras_inconsistente',
+        '% Extras não confere com vagas extras / vagas ofertadas',
+        _percentual_confere('vagas_extras', 'perc_extras'),
+    ),
+]
+
+
+def _colunas(registros):
+    """Converte a lista de registros em um dict campo → array float (NaN para em branco)."""
+    total = len(registros)
+    colunas = {
+        campo: np.fromiter(
+            (np.nan if r[campo] is None else float(r[campo]) for r in registros),
+            dtype=float, count=total,
+        )
+        for campo in CAMPOS_QUANTIDADE + CAMPOS_PERCENTUAL
+    }
+    colunas['celulas_invalidas'] = np.fromiter(
+        (len(r.get('celulas_invalidas', ())) for r in registros), dtype=int, count=total
+    )
+    return colunas
+
+
+def validar(registros, regras=REGRAS):
+    """Avalia as regras sobre o lote.
+
+    Retorna um dict com `regras` (regras violadas, com o total e as primeiras
+    `LIMITE_LINHAS` linhas da planilha), `por_registro` (descrições das violações de cada registro, na
+    ordem de `registros`) e `registros_com_violacao`.
+    """
+    if not registros:
+        return {'regras': [], 'por_registro': [], 'registros_com_violacao': 0}
+
+    colunas = _colunas(registros)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        violacoes = np.stack([np.asarray(regra.teste(colunas), dtype=bool) for regra in regras])
+
+    linhas = [r.get('linha') for r in registros]
+    resumo = []
+    for regra, mascara in zip(regras, violacoes):
+        indices = np.flatnonzero(mascara)
+        if len(indices):
+            resumo.append({
+                'codigo': regra.codigo,
+                'descricao': regra.descricao,
+                'total': len(indices),
+                'linhas': [linhas[i] for i in indices[:LIMITE_LINHAS]],
+            })
+
+    por_registro = [[] for _ in registros]
+    for k, i in zip(*np.nonzero(violacoes)):
+        por_registro[i].append(regras[k].descricao)
+
+    return {
+        'regras': resumo,
+        'por_registro': por_registro,
+        'registros_com_violacao': int(violacoes.any(axis=0).sum()),
+    }
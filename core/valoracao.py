@@ -0,0 +1,73 @@
+"""
+Valoração da produção: receita estimada por especialidade e mês.
+
+A receita estimada é o volume de agendamentos do mês multiplicado pelo preço
+médio dos procedimentos ativos da especialidade (cirurgias e serviços
+médicos, cada procedimento com o mesmo peso). O cálculo é feito de uma vez
+para a matriz especialidade × mês inteira e fica no cache sob a versão dos
+modelos de entrada, sendo refeito só quando a produção, o catálogo ou as
+especialidades mudam.
+"""
+import numpy as np
+from django.db.models import Count, Sum
+
+from .cache import em_cache
+from .models import Cirurgia, Especialidade, MesProducao, ProducaoMensal, ServicoMedico
+from .series import matriz_producao, para_lista
+
+
+ENTRADAS = (ProducaoMensal, MesProducao, Cirurgia, ServicoMedico, Especialidade)
+
+
+def precos_por_especialidade(especialidades):
+    """Preço médio dos procedimentos ativos de cada especialidade (NaN se não houver)."""
+    posicao = {pk: i for i, pk in enumerate(especialidades)}
+    somas = np.zeros(len(especialidades))
+    quantidades = np.zeros(len(especialidades))
+    for modelo, filtros in ((Cirurgia, {'ativa': True}), (ServicoMedico, {'ativo': True})):
+        agregados = (
+            modelo.objects
+            .filter(especialidade_ref__isnull=False, **filtros)
+            .values_list('especialidade_ref')
+            .annotate(soma=Sum('valor'), total=Count('id'))
+            .order_by()
+        )
+        for ref, soma, total in agregados:
+            if ref in posicao:
+                somas[posicao[ref]] += float(soma)
+                quantidades[posicao[ref]] += total
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return somas / quantidades
+
+
+def calcular_valoracao():
+    """Calcula a receita estimada de todas as especialidades em todos os meses."""
+    especialidades, meses, matrizes = matriz_producao('total_agendamentos')
+    if not especialidades:
+        return {
+            'meses': [], 'especialidades': [], 'precos': [], 'receita': [],
+            'total_mes': [], 'total_especialidade': [], 'sem_preco': [],
+        }
+    volumes = matrizes['total_agendamentos']
+    precos = precos_por_especialidade(especialidades)
+    receita = volumes * precos[:, np.newaxis]
+
+    nomes_por_id = dict(Especialidade.objects.filter(pk__in=especialidades).values_list('pk', 'nome'))
+    nomes = [nomes_por_id[pk] for pk in especialidades]
+    ordem = sorted(range(len(nomes)), key=lambda i: nomes[i].casefold())
+
+    sem_preco = np.isnan(precos)
+    return {
+        'meses': meses,
+        'especialidades': [nomes[i] for i in ordem],
+        'precos': para_lista(precos[ordem]),
+        'receita': para_lista(receita[ordem]),
+        'total_mes': para_lista(np.nansum(receita, axis=0)),
+        'total_especialidade': para_lista(np.nansum(receita, axis=1)[ordem]),
+        'sem_preco': [nomes[i] for i in ordem if sem_preco[i]],
+    }
+
+
+def valoracao():
+    """Valoração cacheada sob a versão atual da produção, do catálogo e das especialidades."""
+    return em_cache('valoracao', ENTRADAS, calcular_valoracao)
@@ -1,22 +1,42 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth import authenticate, login, logout, update_session_auth_hash
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db import transaction
-from django.db.models import Q
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Abs
 from functools import wraps
 import csv
 import io
 import re
-from datetime import date
+from datetime import date, timedelta
 from decimal import Decimal, InvalidOperation
+from time import perf_counter
 
+from .cache import em_cache, versao
+from .condicional import get_condicional
+from .consultas_lentas import buffer as consultas_lentas
+from .cronometro import Cronometro
+from .especialidades import mapa_especialidades
 from .forms import (
     LoginForm, TrocaSenhaForm, UsuarioForm, EmpresaForm, MedicoForm,
     CirurgiaForm, CirurgiaUploadForm, ExameForm, ServicoMedicoForm,
     ProducaoUploadForm,
 )
-from .models import Usuario, Empresa, Medico, Cirurgia, Exame, ServicoMedico, ProducaoMensal
+from .importacao import ImportacaoEmAndamento, ativar_importacao, importacao_em_andamento, reservar_mes
+from .metricas import registro as registro_metricas
+from .models import (
+    Usuario, Empresa, Medico, Cirurgia, Exame, ServicoMedico, ProducaoMensal, Especialidade,
+    AnomaliaProducao, ImportacaoProducao, ImportacaoCirurgia, MesProducao, PerfilRequisicao, BlocoImportacao,
+)
+from .previsao import HORIZONTE_MAXIMO, previsao
+from .roteadores import banco_leitura, leitura_replica
+from .validacao import validar
+from .valoracao import ENTRADAS as ENTRADAS_VALORACAO, valoracao
 
 
 # DECORATOR PARA TIER 5
@@ -35,6 +55,21 @@ def tier5_required(view_func):
     return wrapper
 
 
+def cadastro_usuarios_required(view_func):
+    """Decorator que restringe acesso a quem pode cadastrar usuários.
+
+    Deve ficar acima de `get_condicional`: sem permissão, o usuário não pode
+    nem descobrir pelo 304 se a tabela mudou.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.pode_cadastrar_usuarios():
+            messages.error(request, 'Você não tem permissão para acessar esta página.')
+            return redirect('dashboard')
+        return view_func(request, *args, **kwargs)
+    return wrapper
+
+
 def login_view(request):
     """View de login."""
     if request.user.is_authenticated:
@@ -91,19 +126,25 @@ def trocar_senha_view(request):
 
 
 @login_required
+@leitura_replica
+@get_condicional(Usuario, Empresa, Medico, Cirurgia, Exame, ServicoMedico)
 def dashboard_view(request):
     """Landing page após login."""
     if request.user.primeiro_acesso:
         return redirect('trocar_senha')
     
-    context = {
-        'total_usuarios': Usuario.objects.count(),
-        'total_empresas': Empresa.objects.filter(ativa=True).count(),
-        'total_medicos': Medico.objects.filter(ativo=True).count(),
-        'total_cirurgias': Cirurgia.objects.filter(ativa=True).count(),
-        'total_exames': Exame.objects.filter(ativo=True).count(),
-        'total_servicos': ServicoMedico.objects.filter(ativo=True).count(),
-    }
+    context = em_cache(
+        'dashboard',
+        (Usuario, Empresa, Medico, Cirurgia, Exame, ServicoMedico),
+        lambda: {
+            'total_usuarios': Usuario.objects.count(),
+            'total_empresas': Empresa.objects.filter(ativa=True).count(),
+            'total_medicos': Medico.objects.filter(ativo=True).count(),
+            'total_cirurgias': Cirurgia.objects.filter(ativa=True).count(),
+            'total_exames': Exame.objects.filter(ativo=True).count(),
+            'total_servicos': ServicoMedico.objects.filter(ativo=True).count(),
+        },
+    )
     return render(request, 'core/dashboard.html', context)
 
 
@@ -120,14 +161,13 @@ def cadastro_menu_view(request):
 # USUARIOS
 
 @login_required
+@cadastro_usuarios_required
+@leitura_replica
+@get_condicional(Usuario)
 def usuario_lista_view(request):
     """Lista todos os usuários."""
-    if not request.user.pode_cadastrar_usuarios():
-        messages.error(request, 'Você não tem permissão para acessar esta página.')
-        return redirect('dashboard')
-    
     usuarios = Usuario.objects.all().order_by('-data_cadastro')
-    return render(request, 'core/usuario_lista.html', {'usuarios': usuarios})
+    return render(request, 'core/usuario_lista.html', {'usuarios': usuarios, 'versao_cache': versao(Usuario)})
 
 
 @login_required
@@ -152,10 +192,12 @@ def usuario_criar_view(request):
 # EMPRESAS
 
 @login_required
+@leitura_replica
+@get_condicional(Empresa)
 def empresa_lista_view(request):
     """Lista todas as empresas."""
     empresas = Empresa.objects.all().order_by('razao_social')
-    return render(request, 'core/empresa_lista.html', {'empresas': empresas})
+    return render(request, 'core/empresa_lista.html', {'empresas': empresas, 'versao_cache': versao(Empresa)})
 
 
 @login_required
@@ -195,10 +237,12 @@ def empresa_editar_view(request, pk):
 # MEDICOS
 
 @login_required
+@leitura_replica
+@get_condicional(Medico)
 def medico_lista_view(request):
     """Lista todos os médicos."""
     medicos = Medico.objects.all().order_by('nome_completo')
-    return render(request, 'core/medico_lista.html', {'medicos': medicos})
+    return render(request, 'core/medico_lista.html', {'medicos': medicos, 'versao_cache': versao(Medico)})
 
 
 @login_required
@@ -238,23 +282,31 @@ def medico_editar_view(request, pk):
 # ===== ÁREA ADMINISTRATIVA (TIER 5) =====
 
 @tier5_required
+@leitura_replica
+@get_condicional(Cirurgia, Exame, ServicoMedico)
 def admin_menu_view(request):
     """Menu da área administrativa."""
-    context = {
-        'total_cirurgias': Cirurgia.objects.count(),
-        'total_exames': Exame.objects.count(),
-        'total_servicos': ServicoMedico.objects.count(),
-    }
+    context = em_cache(
+        'admin_menu',
+        (Cirurgia, Exame, ServicoMedico),
+        lambda: {
+            'total_cirurgias': Cirurgia.objects.count(),
+            'total_exames': Exame.objects.count(),
+            'total_servicos': ServicoMedico.objects.count(),
+        },
+    )
     return render(request, 'core/admin/menu.html', context)
 
 
 # CIRURGIAS
 
 @tier5_required
+@leitura_replica
+@get_condicional(Cirurgia)
 def cirurgia_lista_view(request):
     """Lista todas as cirurgias."""
     cirurgias = Cirurgia.objects.all().order_by('especialidade', 'descricao')
-    return render(request, 'core/admin/cirurgia_lista.html', {'cirurgias': cirurgias})
+    return render(request, 'core/admin/cirurgia_lista.html', {'cirurgias': cirurgias, 'versao_cache': versao(Cirurgia)})
 
 
 @tier5_required
@@ -298,20 +350,27 @@ def cirurgia_upload_view(request):
         form = CirurgiaUploadForm(request.POST, request.FILES)
         if form.is_valid():
             arquivo = request.FILES['arquivo_csv']
+            cronometro = Cronometro()
             
             # Lê o arquivo CSV
-            arquivo.seek(0)
-            decoded_file = arquivo.read().decode('utf-8-sig')  # utf-8-sig remove BOM automaticamente
+            with cronometro.etapa('leitura_arquivo'):
+                arquivo.seek(0)
+                conteudo = arquivo.read()
+            cronometro.contar('bytes', len(conteudo))
+            with cronometro.etapa('decodificacao'):
+                decoded_file = conteudo.decode('utf-8-sig')  # utf-8-sig remove BOM automaticamente
             csv_file = io.StringIO(decoded_file)
             
             # Detecta automaticamente o delimitador (vírgula ou ponto e vírgula)
-            sample = csv_file.read(1024)
-            csv_file.seek(0)
-            sniffer = csv.Sniffer()
-            try:
-                delimiter = sniffer.sniff(sample).delimiter
-            except:
-                delimiter = ';'  # Default para ponto e vírgula se não detectar
+            with cronometro.etapa('deteccao_delimitador'):
+                sample = csv_file.read(1024)
+                csv_file.seek(0)
+                sniffer = csv.Sniffer()
+                try:
+                    delimiter = sniffer.sniff(sample).delimiter
+                except:
+                    delimiter = ';'  # Default para ponto e vírgula se não detectar
+            cronometro.anotar('delimitador', delimiter)
             
             reader = csv.DictReader(csv_file, delimiter=delimiter)
             
@@ -341,84 +400,119 @@ def cirurgia_upload_view(request):
             erros_detalhados = []
             linhas_processadas = 0
             
-            for i, row in enumerate(reader, start=2):  # Começa do 2 (header é linha 1)
-                try:
-                    # Pula linhas vazias
-                    if not any(row.values()):
-                        continue
+            # Conversão e gravação acumuladas em locais e somadas ao final, como em
+            # _montar_registros: uma etapa do cronômetro por linha pesaria no laço
+            conversao = gravacao = 0.0
+            criadas = atualizadas = 0
+            with cronometro.etapa('leitura_celulas'):
+                for i, row in enumerate(reader, start=2):  # Começa do 2 (header é linha 1)
+                    try:
+                        # Pula linhas vazias
+                        if not any(row.values()):
+                            continue
                     
-                    linhas_processadas += 1
+                        linhas_processadas += 1
                     
-                    codigo = get_column(row, ['Codigo SIGTAP', 'codigo_sigtap', 'codigo'])
-                    descricao = get_column(row, ['Descricao', 'descricao'])
-                    valor_str = get_column(row, ['Valor', 'valor'])
-                    tipo = get_column(row, ['Tipo Cirurgia', 'tipo_cirurgia', 'tipo'])
-                    especialidade = get_column(row, ['Especialidade', 'especialidade'])
+                        codigo = get_column(row, ['Codigo SIGTAP', 'codigo_sigtap', 'codigo'])
+                        descricao = get_column(row, ['Descricao', 'descricao'])
+                        valor_str = get_column(row, ['Valor', 'valor'])
+                        tipo = get_column(row, ['Tipo Cirurgia', 'tipo_cirurgia', 'tipo'])
+                        especialidade = get_column(row, ['Especialidade', 'especialidade'])
                     
-                    # Valida dados obrigatórios
-                    if not codigo:
-                        erros_detalhados.append(f"Linha {i}: Código SIGTAP ausente")
-                        erro += 1
-                        continue
+                        inicio = perf_counter()
+                        try:
+                            # Valida dados obrigatórios
+                            if not codigo:
+                                erros_detalhados.append(f"Linha {i}: Código SIGTAP ausente")
+                                erro += 1
+                                continue
                     
-                    if not descricao:
-                        erros_detalhados.append(f"Linha {i}: Descrição ausente")
-                        erro += 1
-                        continue
+                            if not descricao:
+                                erros_detalhados.append(f"Linha {i}: Descrição ausente")
+                                erro += 1
+                                continue
                     
-                    if not tipo:
-                        erros_detalhados.append(f"Linha {i}: Tipo cirurgia ausente")
-                        erro += 1
-                        continue
+                            if not tipo:
+                                erros_detalhados.append(f"Linha {i}: Tipo cirurgia ausente")
+                                erro += 1
+                                continue
                     
-                    # Valor padrão 0 se não informado
-                    if not valor_str:
-                        valor = Decimal('0.00')
-                    else:
-                        try:
-                            valor = Decimal(valor_str.replace(',', '.'))
-                        except:
-                            erros_detalhados.append(f"Linha {i}: Valor inválido '{valor_str}'")
-                            erro += 1
-                            continue
+                            # Valor padrão 0 se não informado
+                            if not valor_str:
+                                valor = Decimal('0.00')
+                            else:
+                                try:
+                                    valor = Decimal(valor_str.replace(',', '.'))
+                                except:
+                                    erros_detalhados.append(f"Linha {i}: Valor inválido '{valor_str}'")
+                                    erro += 1
+                                    continue
                     
-                    # Especialidade padrão se não informada
-                    if not especialidade:
-                        especialidade = 'Não especificada'
+                            # Especialidade padrão se não informada
+                            if not especialidade:
+                                especialidade = 'Não especificada'
                     
-                    # Mapeia tipo de cirurgia
-                    tipo_stripped = tipo.strip()
-                    if tipo_stripped.upper() == 'CMA':
-                        tipo_cirurgia = 'CMA'
-                    elif tipo_stripped.lower() == 'cma':
-                        tipo_cirurgia = 'cma'
-                    else:
-                        tipo_upper = tipo_stripped.upper()
-                        if 'MAIOR' in tipo_upper or tipo_upper == 'CMA':
-                            tipo_cirurgia = 'CMA'
-                        elif 'MENOR' in tipo_upper:
-                            tipo_cirurgia = 'cma'
-                        else:
-                            erros_detalhados.append(f"Linha {i}: Tipo inválido '{tipo}'. Use 'CMA' ou 'cma'")
-                            erro += 1
-                            continue
+                            # Mapeia tipo de cirurgia
+                            tipo_stripped = tipo.strip()
+                            if tipo_stripped.upper() == 'CMA':
+                                tipo_cirurgia = 'CMA'
+                            elif tipo_stripped.lower() == 'cma':
+                                tipo_cirurgia = 'cma'
+                            else:
+                                tipo_upper = tipo_stripped.upper()
+                                if 'MAIOR' in tipo_upper or tipo_upper == 'CMA':
+                                    tipo_cirurgia = 'CMA'
+                                elif 'MENOR' in tipo_upper:
+                                    tipo_cirurgia = 'cma'
+                                else:
+                                    erros_detalhados.append(f"Linha {i}: Tipo inválido '{tipo}'. Use 'CMA' ou 'cma'")
+                                    erro += 1
+                                    continue
+                        finally:
+                            conversao += perf_counter() - inicio
                     
-                    # Cria ou atualiza cirurgia
-                    cirurgia, created = Cirurgia.objects.update_or_create(
-                        codigo_sigtap=codigo.strip(),
-                        defaults={
-                            'descricao': descricao.strip(),
-                            'valor': valor,
-                            'tipo_cirurgia': tipo_cirurgia,
-                            'especialidade': especialidade.strip(),
-                            'cadastrado_por': request.user,
-                        }
-                    )
-                    sucesso += 1
+                        # Cria ou atualiza cirurgia
+                        inicio = perf_counter()
+                        try:
+                            cirurgia, created = Cirurgia.objects.update_or_create(
+                                codigo_sigtap=codigo.strip(),
+                                defaults={
+                                    'descricao': descricao.strip(),
+                                    'valor': valor,
+                                    'tipo_cirurgia': tipo_cirurgia,
+                                    'especialidade': especialidade.strip(),
+                                    'cadastrado_por': request.user,
+                                }
+                            )
+                        finally:
+                            gravacao += perf_counter() - inicio
+                        if created:
+                            criadas += 1
+                        else:
+                            atualizadas += 1
+                        sucesso += 1
                     
-                except Exception as e:
-                    erros_detalhados.append(f"Linha {i}: {str(e)}")
-                    erro += 1
+                    except Exception as e:
+                        erros_detalhados.append(f"Linha {i}: {str(e)}")
+                        erro += 1
+                cronometro.somar('conversao', conversao)
+                cronometro.somar('gravacao', gravacao)
+            
+            if criadas:
+                cronometro.contar('criadas', criadas)
+            if atualizadas:
+                cronometro.contar('atualizadas', atualizadas)
+            cronometro.contar('linhas_lidas', linhas_processadas)
+            cronometro.contar('erros', erro)
+            importacao = ImportacaoCirurgia.objects.create(
+                nome_arquivo=arquivo.name[:255],
+                linhas_processadas=linhas_processadas,
+                sucesso=sucesso,
+                erro=erro,
+                erros=erros_detalhados[:_ERROS_CIRURGIA_GRAVADOS],
+                tempos={'upload': cronometro.resultado()},
+                enviado_por=request.user,
+            )
             
             # Mensagens de resultado
             if linhas_processadas == 0:
@@ -432,20 +526,36 @@ def cirurgia_upload_view(request):
                     mensagem_erros += f' Primeiros erros: {"; ".join(erros_detalhados[:5])}'
                 messages.warning(request, mensagem_erros)
             
-            return redirect('cirurgia_lista')
+            return redirect('cirurgia_upload_resultado', pk=importacao.pk)
     else:
         form = CirurgiaUploadForm()
     
     return render(request, 'core/admin/cirurgia_upload.html', {'form': form})
 
 
+# Erros de linha guardados com cada importação de cirurgias
+_ERROS_CIRURGIA_GRAVADOS = 200
+
+
+@tier5_required
+def cirurgia_upload_resultado_view(request, pk):
+    """Resultado de um upload de cirurgias: contagens, erros e tempo por etapa."""
+    importacao = get_object_or_404(ImportacaoCirurgia.objects.select_related('enviado_por'), pk=pk)
+    return render(request, 'core/admin/cirurgia_upload_resultado.html', {
+        'importacao': importacao,
+        'tempos': importacao.tempos.get('upload'),
+    })
+
+
 # EXAMES
 
 @tier5_required
+@leitura_replica
+@get_condicional(Exame)
 def exame_lista_view(request):
     """Lista todos os exames."""
     exames = Exame.objects.all().order_by('tipo_exame', 'descricao')
-    return render(request, 'core/admin/exame_lista.html', {'exames': exames})
+    return render(request, 'core/admin/exame_lista.html', {'exames': exames, 'versao_cache': versao(Exame)})
 
 
 @tier5_required
@@ -485,10 +595,12 @@ def exame_editar_view(request, pk):
 # SERVIÇOS MÉDICOS
 
 @tier5_required
+@leitura_replica
+@get_condicional(ServicoMedico)
 def servico_lista_view(request):
     """Lista todos os serviços médicos."""
     servicos = ServicoMedico.objects.all().order_by('especialidade', 'descricao')
-    return render(request, 'core/admin/servico_lista.html', {'servicos': servicos})
+    return render(request, 'core/admin/servico_lista.html', {'servicos': servicos, 'versao_cache': versao(ServicoMedico)})
 
 
 @tier5_required
@@ -606,38 +718,104 @@ def _to_decimal_str(v):
         return None
 
 
-def _parse_xlsx(arquivo):
+# Colunas B a M da planilha de produção (a coluna A é a especialidade)
+_COLUNAS_PRODUCAO = [
+    ('vagas_ofertadas', _to_int),
+    ('total_agendamentos', _to_int),
+    ('perc_agendamentos', _to_decimal_str),
+    ('agendamentos_cota', _to_int),
+    ('perc_cota', _to_decimal_str),
+    ('vagas_bolsao', _to_int),
+    ('perc_bolsao', _to_decimal_str),
+    ('vagas_nao_distribuidas', _to_int),
+    ('perc_nao_distribuidas', _to_decimal_str),
+    ('vagas_extras', _to_int),
+    ('perc_extras', _to_decimal_str),
+    ('perc_desperdicadas', _to_decimal_str),
+]
+
+
+def _celula_vazia(v):
+    return v is None or str(v).strip() == ''
+
+
+def _montar_registro(vals, linha):
+    """Converte as células A a M de uma linha de dados em registro.
+
+    Retorna None para linhas vazias ou sem especialidade. Células preenchidas
+    que não puderam ser convertidas ficam em branco no registro e são listadas
+    em `celulas_invalidas`, para a validação antes da confirmação.
+    """
+    if _celula_vazia(vals[0]):
+        return None
+    registro = {'linha': linha, 'especialidade': str(vals[0]).strip()}
+    invalidas = []
+    for (campo, converter), valor in zip(_COLUNAS_PRODUCAO, vals[1:13]):
+        registro[campo] = converter(valor)
+        if registro[campo] is None and not _celula_vazia(valor):
+            invalidas.append(campo)
+    registro['celulas_invalidas'] = invalidas
+    return registro
+
+
+def _montar_registros(linhas, cronometro):
+    """Monta os registros de um iterável de (número da linha, células A a M).
+
+    A leitura das células (o consumo de `linhas`) e a conversão de cada linha
+    são medidas como etapas separadas de `cronometro`, acumuladas em variáveis
+    locais e somadas ao final: uma etapa por linha pesaria no próprio laço.
+    """
+    registros = []
+    leitura = conversao = 0.0
+    lidas = ignoradas = invalidas = 0
+    marca = perf_counter()
+    for linha, vals in linhas:
+        agora = perf_counter()
+        leitura += agora - marca
+        registro = _montar_registro(vals, linha)
+        marca = perf_counter()
+        conversao += marca - agora
+        lidas += 1
+        if registro:
+            registros.append(registro)
+            invalidas += len(registro['celulas_invalidas'])
+        else:
+            ignoradas += 1
+    leitura += perf_counter() - marca
+    cronometro.somar('leitura_celulas', leitura)
+    cronometro.somar('conversao', conversao)
+    cronometro.contar('linhas_lidas', lidas)
+    if registros:
+        cronometro.contar('celulas_invalidas', invalidas)
+    if ignoradas:
+        cronometro.contar('linhas_ignoradas', ignoradas)
+    cronometro.contar('registros', len(registros))
+    return registros
+
+
+def _linhas_texto(rows):
+    """Linhas de dados (a partir da 8) de uma planilha lida como texto, completadas até a coluna M."""
+    return ((linha, row + [''] * (13 - len(row))) for linha, row in enumerate(rows[7:], start=8))
+
+
+def _parse_xlsx(arquivo, cronometro=None):
     """Lê arquivo .xlsx e retorna (mes_ano, lista_de_registros)."""
     import openpyxl
-    wb = openpyxl.load_workbook(arquivo, data_only=True)
-    ws = wb.active
+    cronometro = cronometro or Cronometro()
+    with cronometro.etapa('abertura_planilha'):
+        wb = openpyxl.load_workbook(arquivo, data_only=True)
+        ws = wb.active
 
     cell_f3 = ws.cell(row=3, column=6).value
     mes_ano = _parse_mes_ano(cell_f3)
 
-    registros = []
-    for row_idx in range(8, ws.max_row + 1):
-        vals = [ws.cell(row=row_idx, column=c).value for c in range(1, 14)]
-        if all(v is None or str(v).strip() == '' for v in vals):
-            continue
-        especialidade = vals[0]
-        if especialidade is None or str(especialidade).strip() == '':
-            continue
-        registros.append({
-            'especialidade': str(especialidade).strip(),
-            'vagas_ofertadas': _to_int(vals[1]),
-            'total_agendamentos': _to_int(vals[2]),
-            'perc_agendamentos': _to_decimal_str(vals[3]),
-            'agendamentos_cota': _to_int(vals[4]),
-            'perc_cota': _to_decimal_str(vals[5]),
-            'vagas_bolsao': _to_int(vals[6]),
-            'perc_bolsao': _to_decimal_str(vals[7]),
-            'vagas_nao_distribuidas': _to_int(vals[8]),
-            'perc_nao_distribuidas': _to_decimal_str(vals[9]),
-            'vagas_extras': _to_int(vals[10]),
-            'perc_extras': _to_decimal_str(vals[11]),
-            'perc_desperdicadas': _to_decimal_str(vals[12]),
-        })
+    registros = _montar_registros(
+        (
+            (row_idx, [ws.cell(row=row_idx, column=c).value for c in range(1, 14)])
+            for row_idx in range(8, ws.max_row + 1)
+        ),
+        cronometro,
+    )
     return mes_ano, registros
 
 
@@ -683,10 +861,12 @@ class _HTMLTableParser:
         _Inner().feed(html)
 
 
-def _parse_html_as_sheet(html_content):
+def _parse_html_as_sheet(html_content, cronometro=None):
     """Extrai (mes_ano, registros) de planilha exportada como HTML."""
+    cronometro = cronometro or Cronometro()
     parser = _HTMLTableParser()
-    parser.feed(html_content)
+    with cronometro.etapa('leitura_html'):
+        parser.feed(html_content)
     rows = parser.rows
 
     if not rows:
@@ -701,57 +881,48 @@ def _parse_html_as_sheet(html_content):
 
     mes_ano = _parse_mes_ano(cell_f3)
 
-    registros = []
-    for row in rows[7:]:  # dados a partir da linha 8 (índice 7)
-        while len(row) < 13:
-            row.append('')
-        if all(not v.strip() for v in row):
-            continue
-        especialidade = row[0].strip()
-        if not especialidade:
-            continue
-        registros.append({
-            'especialidade': especialidade,
-            'vagas_ofertadas': _to_int(row[1]),
-            'total_agendamentos': _to_int(row[2]),
-            'perc_agendamentos': _to_decimal_str(row[3]),
-            'agendamentos_cota': _to_int(row[4]),
-            'perc_cota': _to_decimal_str(row[5]),
-            'vagas_bolsao': _to_int(row[6]),
-            'perc_bolsao': _to_decimal_str(row[7]),
-            'vagas_nao_distribuidas': _to_int(row[8]),
-            'perc_nao_distribuidas': _to_decimal_str(row[9]),
-            'vagas_extras': _to_int(row[10]),
-            'perc_extras': _to_decimal_str(row[11]),
-            'perc_desperdicadas': _to_decimal_str(row[12]),
-        })
+    registros = _montar_registros(_linhas_texto(rows), cronometro)
     return mes_ano, registros
 
 
-def _parse_csv(arquivo):
+def _decodificar(content, codificacoes, cronometro):
+    """Primeira decodificação de `content` que funcionar, ou None."""
+    with cronometro.etapa('decodificacao'):
+        for enc in codificacoes:
+            cronometro.contar('tentativas_decodificacao')
+            try:
+                text = content.decode(enc)
+            except UnicodeDecodeError:
+                continue
+            cronometro.anotar('codificacao', enc)
+            return text
+    return None
+
+
+def _parse_csv(arquivo, cronometro=None):
     """Lê arquivo .csv UTF-8 e retorna (mes_ano, lista_de_registros)."""
-    content = arquivo.read()
+    cronometro = cronometro or Cronometro()
+    with cronometro.etapa('leitura_arquivo'):
+        content = arquivo.read()
+    cronometro.contar('bytes', len(content))
 
     # Tenta decodificar em UTF-8 (com ou sem BOM), latin-1 e cp1252
-    text = None
-    for enc in ('utf-8-sig', 'utf-8', 'latin-1', 'cp1252'):
-        try:
-            text = content.decode(enc)
-            break
-        except UnicodeDecodeError:
-            continue
+    text = _decodificar(content, ('utf-8-sig', 'utf-8', 'latin-1', 'cp1252'), cronometro)
     if text is None:
         raise ValueError("Não foi possível decodificar o arquivo CSV. Salve em formato UTF-8 e tente novamente.")
 
     # Detecta delimitador
-    sample = text[:2048]
-    try:
-        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
-        delimiter = dialect.delimiter
-    except csv.Error:
-        delimiter = ';' if text.count(';') >= text.count(',') else ','
+    with cronometro.etapa('deteccao_delimitador'):
+        sample = text[:2048]
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+            delimiter = dialect.delimiter
+        except csv.Error:
+            delimiter = ';' if text.count(';') >= text.count(',') else ','
+    cronometro.anotar('delimitador', delimiter)
 
-    rows = list(csv.reader(io.StringIO(text), delimiter=delimiter))
+    with cronometro.etapa('leitura_celulas'):
+        rows = list(csv.reader(io.StringIO(text), delimiter=delimiter))
 
     if not rows:
         raise ValueError("Arquivo CSV vazio.")
@@ -768,41 +939,22 @@ def _parse_csv(arquivo):
 
     mes_ano = _parse_mes_ano(cell_f3)
 
-    registros = []
-    for row in rows[7:]:  # dados a partir da linha 8 (índice 7)
-        while len(row) < 13:
-            row.append('')
-        if all(not v.strip() for v in row):
-            continue
-        especialidade = row[0].strip()
-        if not especialidade:
-            continue
-        registros.append({
-            'especialidade': especialidade,
-            'vagas_ofertadas': _to_int(row[1]),
-            'total_agendamentos': _to_int(row[2]),
-            'perc_agendamentos': _to_decimal_str(row[3]),
-            'agendamentos_cota': _to_int(row[4]),
-            'perc_cota': _to_decimal_str(row[5]),
-            'vagas_bolsao': _to_int(row[6]),
-            'perc_bolsao': _to_decimal_str(row[7]),
-            'vagas_nao_distribuidas': _to_int(row[8]),
-            'perc_nao_distribuidas': _to_decimal_str(row[9]),
-            'vagas_extras': _to_int(row[10]),
-            'perc_extras': _to_decimal_str(row[11]),
-            'perc_desperdicadas': _to_decimal_str(row[12]),
-        })
+    registros = _montar_registros(_linhas_texto(rows), cronometro)
     return mes_ano, registros
 
 
-def _parse_xls(arquivo):
+def _parse_xls(arquivo, cronometro=None):
     """Lê arquivo .xls (ou HTML disfarçado de XLS) e retorna (mes_ano, lista_de_registros)."""
     import xlrd
-    content = arquivo.read()
+    cronometro = cronometro or Cronometro()
+    with cronometro.etapa('leitura_arquivo'):
+        content = arquivo.read()
+    cronometro.contar('bytes', len(content))
 
     try:
-        wb = xlrd.open_workbook(file_contents=content)
-        ws = wb.sheet_by_index(0)
+        with cronometro.etapa('abertura_planilha'):
+            wb = xlrd.open_workbook(file_contents=content)
+            ws = wb.sheet_by_index(0)
 
         cell_f3_raw = ws.cell(2, 5)
         if cell_f3_raw.ctype == xlrd.XL_CELL_DATE:
@@ -811,40 +963,16 @@ def _parse_xls(arquivo):
         else:
             mes_ano = _parse_mes_ano(cell_f3_raw.value)
 
-        registros = []
-        for row_idx in range(7, ws.nrows):
-            vals = [ws.cell(row_idx, c).value for c in range(13)]
-            if all(v == '' or v is None for v in vals):
-                continue
-            especialidade = vals[0]
-            if not especialidade or str(especialidade).strip() == '':
-                continue
-            registros.append({
-                'especialidade': str(especialidade).strip(),
-                'vagas_ofertadas': _to_int(vals[1]),
-                'total_agendamentos': _to_int(vals[2]),
-                'perc_agendamentos': _to_decimal_str(vals[3]),
-                'agendamentos_cota': _to_int(vals[4]),
-                'perc_cota': _to_decimal_str(vals[5]),
-                'vagas_bolsao': _to_int(vals[6]),
-                'perc_bolsao': _to_decimal_str(vals[7]),
-                'vagas_nao_distribuidas': _to_int(vals[8]),
-                'perc_nao_distribuidas': _to_decimal_str(vals[9]),
-                'vagas_extras': _to_int(vals[10]),
-                'perc_extras': _to_decimal_str(vals[11]),
-                'perc_desperdicadas': _to_decimal_str(vals[12]),
-            })
+        registros = _montar_registros(
+            ((row_idx + 1, [ws.cell(row_idx, c).value for c in range(13)]) for row_idx in range(7, ws.nrows)),
+            cronometro,
+        )
         return mes_ano, registros
 
     except Exception:
         # Arquivo provavelmente é HTML exportado como XLS (padrão de sistemas web)
-        for enc in ('utf-8', 'latin-1', 'cp1252'):
-            try:
-                html_text = content.decode(enc)
-                break
-            except UnicodeDecodeError:
-                continue
-        else:
+        html_text = _decodificar(content, ('utf-8', 'latin-1', 'cp1252'), cronometro)
+        if html_text is None:
             raise ValueError(
                 "Formato de arquivo não suportado. Salve como .xlsx no Excel e tente novamente."
             )
@@ -855,7 +983,58 @@ def _parse_xls(arquivo):
                 "Formato de arquivo não reconhecido. Salve como .xlsx no Excel e tente novamente."
             )
 
-        return _parse_html_as_sheet(html_text)
+        return _parse_html_as_sheet(html_text, cronometro)
+
+
+def gravar_producao_mensal(importacao, registros, usuario, cronometro=None):
+    """Grava os registros como o lote de `importacao` e o torna o ativo do mês.
+
+    Os registros anteriores do mês continuam no banco, como lote inativo,
+    até serem removidos por `limpar_importacoes`. Os tempos de cada etapa
+    ficam em `importacao.tempos['confirmacao']`.
+    """
+    def _d(v):
+        return Decimal(v) if v is not None else None
+
+    cronometro = cronometro or Cronometro()
+    with transaction.atomic():
+        with cronometro.etapa('especialidades'):
+            especialidades = mapa_especialidades([reg['especialidade'] for reg in registros])
+        with cronometro.etapa('gravacao'):
+            ProducaoMensal.todas.bulk_create(
+                [
+                    ProducaoMensal(
+                        importacao=importacao,
+                        mes_ano=importacao.mes_ano,
+                        especialidade=reg['especialidade'],
+                        especialidade_ref_id=especialidades.get(reg['especialidade']),
+                        vagas_ofertadas=reg['vagas_ofertadas'],
+                        total_agendamentos=reg['total_agendamentos'],
+                        perc_agendamentos=_d(reg['perc_agendamentos']),
+                        agendamentos_cota=reg['agendamentos_cota'],
+                        perc_cota=_d(reg['perc_cota']),
+                        vagas_bolsao=reg['vagas_bolsao'],
+                        perc_bolsao=_d(reg['perc_bolsao']),
+                        vagas_nao_distribuidas=reg['vagas_nao_distribuidas'],
+                        perc_nao_distribuidas=_d(reg['perc_nao_distribuidas']),
+                        vagas_extras=reg['vagas_extras'],
+                        perc_extras=_d(reg['perc_extras']),
+                        perc_desperdicadas=_d(reg['perc_desperdicadas']),
+                        importado_por=usuario,
+                    )
+                    for reg in registros
+                ],
+                batch_size=1000,
+            )
+        cronometro.contar('registros_gravados', len(registros))
+        with cronometro.etapa('ativacao'):
+            ativar_importacao(importacao)
+        # Os dados passam a viver em ProducaoMensal; fica só o histórico da importação
+        BlocoImportacao.objects.filter(importacao=importacao).delete()
+        importacao.total_registros = len(registros)
+        importacao.confirmado_em = timezone.now()
+        importacao.tempos = {**importacao.tempos, 'confirmacao': cronometro.resultado()}
+        importacao.save(update_fields=['total_registros', 'confirmado_em', 'tempos'])
 
 
 @login_required
@@ -877,23 +1056,21 @@ def producao_upload_view(request):
         if form.is_valid():
             arquivo = request.FILES['arquivo']
             nome = arquivo.name.lower()
+            cronometro = Cronometro()
             try:
                 if nome.endswith('.xlsx'):
-                    mes_ano, registros = _parse_xlsx(arquivo)
+                    mes_ano, registros = _parse_xlsx(arquivo, cronometro)
                 elif nome.endswith('.csv'):
-                    mes_ano, registros = _parse_csv(arquivo)
+                    mes_ano, registros = _parse_csv(arquivo, cronometro)
                 else:
-                    mes_ano, registros = _parse_xls(arquivo)
+                    mes_ano, registros = _parse_xls(arquivo, cronometro)
 
                 if not registros:
                     messages.error(request, 'Nenhum dado encontrado no arquivo. Verifique a estrutura da planilha.')
                     return render(request, 'core/producao_upload.html', {'form': form})
 
-                request.session['producao_upload'] = {
-                    'mes_ano': mes_ano.isoformat(),
-                    'mes_ano_display': f"{_NOMES_MESES[mes_ano.month]}/{mes_ano.year}",
-                    'registros': registros,
-                }
+                importacao = _preparar_importacao(mes_ano, registros, arquivo.name, request.user, cronometro)
+                request.session['producao_importacao'] = importacao.pk
                 return redirect('producao_confirmar')
 
             except ValueError as e:
@@ -906,104 +1083,643 @@ def producao_upload_view(request):
     return render(request, 'core/producao_upload.html', {'form': form})
 
 
+def _resumo_diferencas(mes_ano, registros):
+    """Conta registros novos, alterados, iguais e removidos em relação ao mês já gravado."""
+    campos = [campo for campo, _ in _COLUNAS_PRODUCAO]
+    existentes = {
+        valores[0]: valores[1:]
+        for valores in ProducaoMensal.objects.filter(mes_ano=mes_ano).values_list('especialidade', *campos)
+    }
+
+    def _normalizar(valor):
+        return Decimal(valor) if isinstance(valor, str) else valor
+
+    novos = alterados = iguais = 0
+    for reg in registros:
+        atuais = existentes.get(reg['especialidade'])
+        if atuais is None:
+            novos += 1
+        elif all(_normalizar(reg[campo]) == atual for campo, atual in zip(campos, atuais)):
+            iguais += 1
+        else:
+            alterados += 1
+    enviados = {reg['especialidade'] for reg in registros}
+    return {
+        'existentes': len(existentes),
+        'novos': novos,
+        'alterados': alterados,
+        'iguais': iguais,
+        'removidos': sum(1 for especialidade in existentes if especialidade not in enviados),
+    }
+
+
+def _preparar_importacao(mes_ano, registros, nome_arquivo, usuario, cronometro=None):
+    """Valida os registros e os guarda em uma ImportacaoProducao até a confirmação.
+
+    Os tempos da leitura (etapas já marcadas em `cronometro` pelo parser),
+    da validação e do armazenamento ficam em `tempos['upload']`.
+    """
+    cronometro = cronometro or Cronometro()
+    with cronometro.etapa('validacao'):
+        validacao = validar(registros)
+        for registro, violacoes in zip(registros, validacao['por_registro']):
+            registro['violacoes'] = violacoes
+    cronometro.contar('registros_com_violacao', validacao['registros_com_violacao'])
+
+    def _total(campo):
+        return sum(reg[campo] or 0 for reg in registros)
+
+    with cronometro.etapa('diferencas'):
+        diferencas = _resumo_diferencas(mes_ano, registros)
+    resumo = {
+        'vagas_ofertadas': _total('vagas_ofertadas'),
+        'total_agendamentos': _total('total_agendamentos'),
+        'diferencas': diferencas,
+        'regras_violadas': validacao['regras'],
+        'registros_com_violacao': validacao['registros_com_violacao'],
+    }
+
+    # Importações pendentes do mesmo usuário, ou de sessões que já expiraram, não serão mais confirmadas
+    limite = timezone.now() - timedelta(seconds=settings.SESSION_COOKIE_AGE)
+    with cronometro.etapa('armazenamento'):
+        ImportacaoProducao.objects.filter(confirmado_em__isnull=True).filter(
+            Q(enviado_por=usuario) | Q(criado_em__lt=limite)
+        ).delete()
+        importacao = ImportacaoProducao.objects.create(
+            mes_ano=mes_ano,
+            nome_arquivo=nome_arquivo[:255],
+            resumo=resumo,
+            total_registros=len(registros),
+            enviado_por=usuario,
+        )
+        _guardar_registros(importacao, registros)
+    # Gravados à parte para incluir o tempo do próprio armazenamento
+    importacao.tempos = {'upload': cronometro.resultado()}
+    importacao.save(update_fields=['tempos'])
+    return importacao
+
+
+_REGISTROS_POR_BLOCO = 500
+
+
+def _guardar_registros(importacao, registros):
+    """Grava os registros da importação pendente em blocos de `_REGISTROS_POR_BLOCO`.
+
+    Os registros com violações formam também uma sequência própria de blocos,
+    para que o filtro da tela de confirmação pagine sem ler os demais.
+    """
+    blocos = []
+    for violacoes, sequencia in ((False, registros), (True, [reg for reg in registros if reg.get('violacoes')])):
+        for inicio in range(0, len(sequencia), _REGISTROS_POR_BLOCO):
+            trecho = sequencia[inicio:inicio + _REGISTROS_POR_BLOCO]
+            blocos.append(BlocoImportacao(
+                importacao=importacao, violacoes=violacoes, inicio=inicio, fim=inicio + len(trecho),
+                registros=trecho,
+            ))
+    BlocoImportacao.objects.bulk_create(blocos, batch_size=100)
+
+
+def _registros_pendentes(importacao):
+    """Todos os registros da importação pendente, na ordem da planilha."""
+    registros = []
+    for trecho in (
+        BlocoImportacao.objects.filter(importacao=importacao, violacoes=False)
+        .order_by('inicio').values_list('registros', flat=True).iterator()
+    ):
+        registros.extend(trecho)
+    return registros
+
+
+def _fatia_registros(importacao, inicio, fim, violacoes=False):
+    """Registros `inicio` a `fim - 1` da importação pendente, lendo só os blocos que os contêm."""
+    registros = []
+    blocos = (
+        BlocoImportacao.objects.filter(importacao=importacao, violacoes=violacoes, inicio__lt=fim, fim__gt=inicio)
+        .order_by('inicio').values_list('inicio', 'registros')
+    )
+    for inicio_bloco, trecho in blocos:
+        registros.extend(trecho[max(inicio - inicio_bloco, 0):fim - inicio_bloco])
+    return registros
+
+
+def _importacao_pendente(request):
+    """ImportacaoProducao da sessão do usuário, ainda não confirmada (ou None)."""
+    pk = request.session.get('producao_importacao')
+    if pk is None:
+        return None
+    return ImportacaoProducao.objects.filter(pk=pk, enviado_por=request.user, confirmado_em__isnull=True).first()
+
+
 @login_required
 def producao_confirmar_view(request):
-    """Exibe os dados carregados para confirmação antes de gravar."""
+    """Exibe o resumo da importação para confirmação antes de gravar.
+
+    Os registros não são renderizados aqui: a tabela é carregada por página
+    de `producao_confirmar_linhas`.
+    """
     if request.user.primeiro_acesso:
         return redirect('trocar_senha')
 
-    dados = request.session.get('producao_upload')
-    if not dados:
+    importacao = _importacao_pendente(request)
+    if importacao is None:
         messages.warning(request, 'Sessão expirada. Faça o upload novamente.')
         return redirect('producao_upload')
 
-    mes_ano = date.fromisoformat(dados['mes_ano'])
-    mes_ano_display = dados.get('mes_ano_display', mes_ano.strftime('%m/%Y'))
-    registros = dados['registros']
-    existe = ProducaoMensal.objects.filter(mes_ano=mes_ano).exists()
+    mes_ano = importacao.mes_ano
+    mes_ano_display = f"{_NOMES_MESES[mes_ano.month]}/{mes_ano.year}"
 
     if request.method == 'POST':
         try:
-            with transaction.atomic():
-                ProducaoMensal.objects.filter(mes_ano=mes_ano).delete()
-                for reg in registros:
-                    def _d(v):
-                        return Decimal(v) if v is not None else None
-                    ProducaoMensal.objects.create(
-                        mes_ano=mes_ano,
-                        especialidade=reg['especialidade'],
-                        vagas_ofertadas=reg['vagas_ofertadas'],
-                        total_agendamentos=reg['total_agendamentos'],
-                        perc_agendamentos=_d(reg['perc_agendamentos']),
-                        agendamentos_cota=reg['agendamentos_cota'],
-                        perc_cota=_d(reg['perc_cota']),
-                        vagas_bolsao=reg['vagas_bolsao'],
-                        perc_bolsao=_d(reg['perc_bolsao']),
-                        vagas_nao_distribuidas=reg['vagas_nao_distribuidas'],
-                        perc_nao_distribuidas=_d(reg['perc_nao_distribuidas']),
-                        vagas_extras=reg['vagas_extras'],
-                        perc_extras=_d(reg['perc_extras']),
-                        perc_desperdicadas=_d(reg['perc_desperdicadas']),
-                        importado_por=request.user,
-                    )
-            del request.session['producao_upload']
+            cronometro = Cronometro()
+            with reservar_mes(mes_ano, request.user), transaction.atomic():
+                with cronometro.etapa('leitura_registros'):
+                    registros = _registros_pendentes(importacao)
+                gravar_producao_mensal(importacao, registros, request.user, cronometro)
+            del request.session['producao_importacao']
             messages.success(
                 request,
-                f'{len(registros)} registro(s) gravado(s) com sucesso para {mes_ano_display}!'
+                f'{importacao.total_registros} registro(s) gravado(s) com sucesso para {mes_ano_display}!'
             )
             return redirect('producao_dashboard')
+        except ImportacaoEmAndamento as e:
+            messages.warning(request, str(e))
         except Exception as e:
             messages.error(request, f'Erro ao gravar os dados: {e}')
 
+    resumo = importacao.resumo
     context = {
+        'importacao': importacao,
         'mes_ano': mes_ano,
         'mes_ano_display': mes_ano_display,
-        'registros': registros,
-        'existe': existe,
-        'total': len(registros),
+        'resumo': resumo,
+        'diferencas': resumo['diferencas'],
+        'regras_violadas': resumo['regras_violadas'],
+        'registros_com_violacao': resumo['registros_com_violacao'],
+        'existe': resumo['diferencas']['existentes'] > 0,
+        'total': importacao.total_registros,
+        'tempos': importacao.tempos.get('upload'),
+        'em_andamento': importacao_em_andamento(mes_ano),
+        'por_pagina': _LINHAS_POR_PAGINA,
     }
     return render(request, 'core/producao_confirmar.html', context)
 
 
+_LINHAS_POR_PAGINA = 50
+_LINHAS_POR_PAGINA_MAXIMO = 500
+
+
 @login_required
-def producao_dashboard_view(request):
-    """Dashboard de acompanhamento da produção mensal."""
+def producao_confirmar_linhas_view(request):
+    """Uma página dos registros da importação pendente, em JSON.
+
+    Parâmetros: `pagina` (a partir de 1), `por_pagina` e `violacoes=1` para
+    listar só as linhas com inconsistências.
+    """
+    importacao = _importacao_pendente(request)
+    if importacao is None:
+        return JsonResponse({'erro': 'Nenhuma importação pendente.'}, status=404)
+
+    violacoes = request.GET.get('violacoes') == '1'
+    try:
+        por_pagina = min(max(int(request.GET.get('por_pagina', _LINHAS_POR_PAGINA)), 1), _LINHAS_POR_PAGINA_MAXIMO)
+        pagina = max(int(request.GET.get('pagina', 1)), 1)
+    except ValueError:
+        return JsonResponse({'erro': 'Parâmetros de paginação inválidos.'}, status=400)
+
+    total = importacao.resumo['registros_com_violacao'] if violacoes else importacao.total_registros
+    paginas = max((total + por_pagina - 1) // por_pagina, 1)
+    pagina = min(pagina, paginas)
+    inicio = (pagina - 1) * por_pagina
+    return JsonResponse({
+        'pagina': pagina,
+        'paginas': paginas,
+        'total': total,
+        'linhas': _fatia_registros(importacao, inicio, inicio + por_pagina, violacoes),
+    })
+
+
+@login_required
+def producao_importacoes_view(request):
+    """Importações confirmadas de cada mês, com a ativa destacada."""
     if request.user.primeiro_acesso:
         return redirect('trocar_senha')
 
-    meses_disponiveis = (
-        ProducaoMensal.objects
-        .values_list('mes_ano', flat=True)
-        .distinct()
-        .order_by('-mes_ano')
+    importacoes = (
+        ImportacaoProducao.objects.filter(confirmado_em__isnull=False)
+        .select_related('enviado_por', 'mes_ativo')
+        .order_by('-mes_ano', '-criado_em')
     )
-
     mes_selecionado = None
+    mes_str = request.GET.get('mes')
+    if mes_str:
+        try:
+            mes_selecionado = date.fromisoformat(mes_str)
+            importacoes = importacoes.filter(mes_ano=mes_selecionado)
+        except ValueError:
+            pass
+
+    meses = []
+    for importacao in importacoes:
+        if not meses or meses[-1]['mes_ano'] != importacao.mes_ano:
+            meses.append({
+                'mes_ano': importacao.mes_ano,
+                'display': f"{_NOMES_MESES[importacao.mes_ano.month]}/{importacao.mes_ano.year}",
+                'importacoes': [],
+            })
+        meses[-1]['importacoes'].append(importacao)
+
+    context = {
+        'meses': meses,
+        'mes_selecionado': mes_selecionado,
+        'retidas': settings.PRODUCAO_IMPORTACOES_RETIDAS,
+    }
+    return render(request, 'core/producao_importacoes.html', context)
+
+
+@login_required
+def producao_importacao_ativar_view(request, pk):
+    """Torna uma importação anterior a ativa do seu mês (reversão)."""
+    if request.user.primeiro_acesso:
+        return redirect('trocar_senha')
+
+    importacao = get_object_or_404(ImportacaoProducao, pk=pk, confirmado_em__isnull=False)
+    mes_ano_display = f"{_NOMES_MESES[importacao.mes_ano.month]}/{importacao.mes_ano.year}"
+    if request.method == 'POST':
+        try:
+            with reservar_mes(importacao.mes_ano, request.user), transaction.atomic():
+                ativar_importacao(importacao)
+            messages.success(
+                request,
+                f'{mes_ano_display} agora exibe a importação de '
+                f'{timezone.localtime(importacao.confirmado_em).strftime("%d/%m/%Y %H:%M")}.'
+            )
+        except ImportacaoEmAndamento as e:
+            messages.warning(request, str(e))
+    return redirect(f"{reverse('producao_importacoes')}?mes={importacao.mes_ano.isoformat()}")
+
+
+class _Eco:
+    """Arquivo falso para o csv.writer: devolve a linha em vez de gravá-la."""
+
+    def write(self, valor):
+        return valor
+
+
+_COLUNAS_EXPORTACAO = [
+    ('mes_ano', 'Mês/Ano'),
+    ('especialidade', 'Especialidade'),
+    ('vagas_ofertadas', 'Vagas Ofertadas'),
+    ('total_agendamentos', 'Total de Agendamentos'),
+    ('perc_agendamentos', '% Agendamentos'),
+    ('agendamentos_cota', 'Agendamentos da Cota'),
+    ('perc_cota', '% da Cota'),
+    ('vagas_bolsao', 'Vagas de Bolsão'),
+    ('perc_bolsao', '% de Bolsão'),
+    ('vagas_nao_distribuidas', 'Vagas Não Distribuídas'),
+    ('perc_nao_distribuidas', '% Não Distribuídas'),
+    ('vagas_extras', 'Vagas Extras'),
+    ('perc_extras', '% Extras'),
+    ('perc_desperdicadas', '% Desperdiçadas'),
+]
+
+
+def _formatar_exportacao(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, date):
+        return valor.strftime('%m/%Y')
+    if isinstance(valor, Decimal):
+        return str(valor).replace('.', ',')
+    return valor
+
+
+@login_required
+@leitura_replica
+def producao_exportar_view(request):
+    """Exporta a produção em CSV (um mês ou todo o histórico), em streaming."""
+    if request.user.primeiro_acesso:
+        return redirect('trocar_senha')
+
+    # O corpo é gerado depois que a view retorna: o banco de leitura é fixado aqui
+    producoes = ProducaoMensal.objects.using(banco_leitura()).order_by('-mes_ano', 'especialidade')
+    nome_arquivo = 'producao.csv'
+    mes_str = request.GET.get('mes')
+    if mes_str:
+        try:
+            mes = date.fromisoformat(mes_str)
+            producoes = producoes.filter(mes_ano=mes)
+            nome_arquivo = f'producao_{mes.strftime("%Y_%m")}.csv'
+        except ValueError:
+            pass
+
+    campos = [campo for campo, _ in _COLUNAS_EXPORTACAO]
+    escritor = csv.writer(_Eco(), delimiter=';')
+
+    def linhas():
+        # BOM para o Excel reconhecer o UTF-8
+        yield '\ufeff' + escritor.writerow([rotulo for _, rotulo in _COLUNAS_EXPORTACAO])
+        for valores in producoes.values_list(*campos).iterator(chunk_size=2000):
+            yield escritor.writerow([_formatar_exportacao(v) for v in valores])
+
+    response = StreamingHttpResponse(linhas(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
+    return response
+
+
+def _meses_producao():
+    """Meses com produção importada, do mais recente para o mais antigo."""
+    return em_cache(
+        'producao_meses',
+        (ProducaoMensal,),
+        lambda: list(
+            MesProducao.objects
+            .filter(importacao_ativa__isnull=False)
+            .values_list('mes_ano', flat=True)
+            .order_by('-mes_ano')
+        ),
+    )
+
+
+def _mes_selecionado(request, meses_disponiveis):
+    """Mês do parâmetro `?mes=` ou, na falta dele, o mais recente."""
     mes_selecionado_str = request.GET.get('mes')
     if mes_selecionado_str:
         try:
-            mes_selecionado = date.fromisoformat(mes_selecionado_str)
+            return date.fromisoformat(mes_selecionado_str)
         except ValueError:
             pass
+    return meses_disponiveis[0] if meses_disponiveis else None
+
+
+def _meses_com_display(meses_disponiveis):
+    return [
+        {'valor': m.isoformat(), 'display': f"{_NOMES_MESES[m.month]}/{m.year}"}
+        for m in meses_disponiveis
+    ]
+
+
+@login_required
+@leitura_replica
+@get_condicional(ProducaoMensal, MesProducao, AnomaliaProducao)
+def producao_dashboard_view(request):
+    """Dashboard de acompanhamento da produção mensal."""
+    if request.user.primeiro_acesso:
+        return redirect('trocar_senha')
 
-    if mes_selecionado is None and meses_disponiveis:
-        mes_selecionado = meses_disponiveis[0]
+    meses_disponiveis = _meses_producao()
+    mes_selecionado = _mes_selecionado(request, meses_disponiveis)
 
     producoes = None
+    anomalias = None
     mes_selecionado_display = None
     if mes_selecionado:
         producoes = ProducaoMensal.objects.filter(mes_ano=mes_selecionado).order_by('especialidade')
+        anomalias = (
+            AnomaliaProducao.objects
+            .filter(mes_ano=mes_selecionado)
+            .select_related('especialidade')
+            .order_by(Abs('zscore').desc())
+        )
         mes_selecionado_display = f"{_NOMES_MESES[mes_selecionado.month]}/{mes_selecionado.year}"
 
-    meses_com_display = [
-        {'valor': m.isoformat(), 'display': f"{_NOMES_MESES[m.month]}/{m.year}"}
-        for m in meses_disponiveis
-    ]
-
     context = {
-        'meses_com_display': meses_com_display,
+        'meses_com_display': _meses_com_display(meses_disponiveis),
         'mes_selecionado': mes_selecionado,
         'mes_selecionado_display': mes_selecionado_display,
         'producoes': producoes,
+        'anomalias': anomalias,
+        'versao_cache': versao(ProducaoMensal, AnomaliaProducao),
     }
     return render(request, 'core/producao_dashboard.html', context)
+
+
+@login_required
+@leitura_replica
+@get_condicional(AnomaliaProducao)
+def producao_anomalias_view(request):
+    """Todas as anomalias do histórico de produção, da mais recente para a mais antiga."""
+    if request.user.primeiro_acesso:
+        return redirect('trocar_senha')
+
+    anomalias = AnomaliaProducao.objects.select_related('especialidade').order_by(
+        '-mes_ano', Abs('zscore').desc()
+    )
+    metrica = request.GET.get('metrica')
+    if metrica in dict(AnomaliaProducao.METRICA_CHOICES):
+        anomalias = anomalias.filter(metrica=metrica)
+
+    context = {
+        'anomalias': anomalias,
+        'metricas': AnomaliaProducao.METRICA_CHOICES,
+        'metrica_selecionada': metrica,
+        'versao_cache': versao(AnomaliaProducao),
+    }
+    return render(request, 'core/producao_anomalias.html', context)
+
+
+def _contagem_por_especialidade(modelo, **filtros):
+    return dict(
+        modelo.objects
+        .filter(especialidade_ref__isnull=False, **filtros)
+        .values_list('especialidade_ref')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+
+
+def _comparativo_catalogo(mes):
+    """Produção do mês versus médicos e procedimentos ativos de cada especialidade.
+
+    Cada agregado é agrupado pela chave inteira `especialidade_ref` em uma
+    consulta própria; o cruzamento é feito em memória pelo id.
+    """
+    producao = {
+        linha['especialidade_ref']: linha
+        for linha in (
+            ProducaoMensal.objects
+            .filter(mes_ano=mes, especialidade_ref__isnull=False)
+            .values('especialidade_ref')
+            .annotate(vagas=Sum('vagas_ofertadas'), agendamentos=Sum('total_agendamentos'))
+            .order_by()
+        )
+    }
+    medicos = _contagem_por_especialidade(Medico, ativo=True)
+    cirurgias = _contagem_por_especialidade(Cirurgia, ativa=True)
+    servicos = _contagem_por_especialidade(ServicoMedico, ativo=True)
+
+    ids = set(producao) | set(medicos) | set(cirurgias) | set(servicos)
+    linhas = []
+    for pk, nome in Especialidade.objects.filter(pk__in=ids).values_list('pk', 'nome').order_by('nome'):
+        prod = producao.get(pk, {})
+        procedimentos = cirurgias.get(pk, 0) + servicos.get(pk, 0)
+        linhas.append({
+            'nome': nome,
+            'vagas': prod.get('vagas'),
+            'agendamentos': prod.get('agendamentos'),
+            'medicos': medicos.get(pk, 0),
+            'cirurgias': cirurgias.get(pk, 0),
+            'servicos': servicos.get(pk, 0),
+            'sem_catalogo': bool(prod) and procedimentos == 0,
+            'sem_producao': not prod and procedimentos > 0,
+        })
+    return linhas
+
+
+@tier5_required
+@leitura_replica
+@get_condicional(ProducaoMensal, MesProducao, Medico, Cirurgia, ServicoMedico, Especialidade)
+def producao_catalogo_view(request):
+    """Comparativo entre a produção do mês e o catálogo de procedimentos por especialidade."""
+    meses_disponiveis = _meses_producao()
+    mes_selecionado = _mes_selecionado(request, meses_disponiveis)
+
+    linhas = []
+    mes_selecionado_display = None
+    if mes_selecionado:
+        linhas = em_cache(
+            f'producao_catalogo:{mes_selecionado.isoformat()}',
+            (ProducaoMensal, Medico, Cirurgia, ServicoMedico, Especialidade),
+            lambda: _comparativo_catalogo(mes_selecionado),
+        )
+        mes_selecionado_display = f"{_NOMES_MESES[mes_selecionado.month]}/{mes_selecionado.year}"
+
+    context = {
+        'meses_com_display': _meses_com_display(meses_disponiveis),
+        'mes_selecionado': mes_selecionado,
+        'mes_selecionado_display': mes_selecionado_display,
+        'linhas': linhas,
+    }
+    return render(request, 'core/producao_catalogo.html', context)
+
+
+@tier5_required
+@leitura_replica
+@get_condicional(*ENTRADAS_VALORACAO)
+def producao_valoracao_view(request):
+    """Receita estimada por especialidade nos últimos meses importados."""
+    try:
+        quantidade_meses = max(1, int(request.GET.get('meses', 12)))
+    except ValueError:
+        quantidade_meses = 12
+
+    dados = valoracao()
+    inicio = max(0, len(dados['meses']) - quantidade_meses)
+    meses = [f"{_NOMES_MESES[m.month][:3]}/{m.year}" for m in dados['meses'][inicio:]]
+    linhas = [
+        {
+            'nome': nome,
+            'preco': preco,
+            'valores': valores[inicio:],
+            'total': sum(v for v in valores[inicio:] if v is not None),
+        }
+        for nome, preco, valores in zip(dados['especialidades'], dados['precos'], dados['receita'])
+    ]
+
+    context = {
+        'meses': meses,
+        'linhas': linhas,
+        'total_mes': dados['total_mes'][inicio:],
+        'total_geral': sum(dados['total_mes'][inicio:]),
+        'sem_preco': dados['sem_preco'],
+        'quantidade_meses': quantidade_meses,
+        'opcoes_meses': [3, 6, 12, 24],
+    }
+    return render(request, 'core/producao_valoracao.html', context)
+
+
+_NOMES_METRICAS_PREVISAO = {
+    'vagas_ofertadas': 'Vagas ofertadas',
+    'total_agendamentos': 'Agendamentos',
+}
+_NOMES_METODOS_PREVISAO = {
+    'sazonal': 'Tendência + sazonalidade',
+    'tendencia': 'Tendência',
+    'media': 'Média',
+}
+
+
+@login_required
+@leitura_replica
+@get_condicional(ProducaoMensal, MesProducao, Especialidade)
+def producao_previsao_view(request):
+    """Projeção de vagas ofertadas e agendamentos para os próximos meses."""
+    if request.user.primeiro_acesso:
+        return redirect('trocar_senha')
+
+    try:
+        horizonte = min(max(1, int(request.GET.get('meses', 3))), HORIZONTE_MAXIMO)
+    except ValueError:
+        horizonte = 3
+
+    dados = previsao()
+    linhas = [
+        {
+            'especialidade': linha['especialidade'],
+            'metricas': [
+                {
+                    'nome': _NOMES_METRICAS_PREVISAO[m['metrica']],
+                    'metodo': _NOMES_METODOS_PREVISAO[m['metodo']],
+                    'ultimo': m['ultimo'],
+                    'projecao': m['projecao'][:horizonte],
+                }
+                for m in linha['metricas']
+            ],
+        }
+        for linha in dados['linhas']
+    ]
+    ultimo_mes = dados['ultimo_mes']
+
+    context = {
+        'linhas': linhas,
+        'meses': [f"{_NOMES_MESES[m.month][:3]}/{m.year}" for m in dados['meses'][:horizonte]],
+        'ultimo_mes_display': f"{_NOMES_MESES[ultimo_mes.month][:3]}/{ultimo_mes.year}" if ultimo_mes else None,
+        'horizonte': horizonte,
+        'opcoes_meses': [1, 3, 6, 12],
+    }
+    return render(request, 'core/producao_previsao.html', context)
+
+
+@tier5_required
+def consultas_lentas_view(request):
+    """Consultas lentas registradas neste processo, agrupadas pelo SQL normalizado."""
+    if request.method == 'POST':
+        consultas_lentas.limpar()
+        messages.success(request, 'Registro de consultas lentas esvaziado.')
+        return redirect('consultas_lentas')
+
+    context = {
+        'grupos': consultas_lentas.agrupadas(),
+        'limiar_ms': settings.CONSULTAS_LENTAS_LIMIAR_MS,
+        'maximo': settings.CONSULTAS_LENTAS_MAXIMO,
+    }
+    return render(request, 'core/admin/consultas_lentas.html', context)
+
+
+@tier5_required
+def perfis_view(request):
+    """Perfis de requisição gravados com ?perfil=1 (`core/perfis.py`)."""
+    if request.method == 'POST':
+        PerfilRequisicao.objects.all().delete()
+        messages.success(request, 'Perfis de requisição excluídos.')
+        return redirect('perfis')
+
+    context = {
+        'perfis': PerfilRequisicao.objects.select_related('usuario').defer('funcoes', 'alocacoes'),
+        'retidos': settings.PERFIS_RETIDOS,
+    }
+    return render(request, 'core/admin/perfis.html', context)
+
+
+@tier5_required
+def perfil_detalhe_view(request, pk):
+    """Funções com maior tempo acumulado e alocações de um perfil."""
+    perfil = get_object_or_404(PerfilRequisicao.objects.select_related('usuario'), pk=pk)
+    return render(request, 'core/admin/perfil_detalhe.html', {'perfil': perfil})
+
+
+@tier5_required
+def metricas_view(request):
+    """Métricas por view no formato texto do Prometheus (`core/metricas.py`)."""
+    return HttpResponse(
+        registro_metricas.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -27,13 +27,19 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metricas.MetricasMiddleware',
+    'core.consultas_lentas.ConsultasLentasMiddleware',
+    'core.compressao.CompressaoMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.estaticos.EstaticosMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.perfis.PerfilMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.roteadores.FixarPrimarioMiddleware',
 ]
 
 ROOT_URLCONF = 'farol.urls'
@@ -49,6 +55,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.cache',
             ],
         },
     },
@@ -57,12 +64,87 @@ TEMPLATES = [
 WSGI_APPLICATION = 'farol.wsgi.application'
 
 # Database
-DATABASES = {
+# DB_ENGINE: 'sqlite' (desenvolvimento) ou 'postgresql' (produção)
+DB_ENGINE = config('DB_ENGINE', default='sqlite')
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='farol'),
+            'USER': config('DB_USER', default='farol'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='127.0.0.1'),
+            'PORT': config('DB_PORT', default='5432'),
+            # Conexões persistentes, verificadas antes de serem reutilizadas
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+            'OPTIONS': {
+                'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+            },
+        }
+    }
+    # Pool externo (PgBouncer em modo transaction): cursores do lado do servidor
+    # não sobrevivem entre transações e as conexões do Django devem ser curtas.
+    if config('DB_POOLER', default=False, cast=bool):
+        DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+        }
+    }
+
+# Réplica de leitura (opcional): dashboards, listas e exportações leem dela
+# (core/roteadores.py). Para testar localmente com SQLite, copie o db.sqlite3
+# para o arquivo da réplica.
+if config('DB_REPLICA_NAME', default=''):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': config('DB_REPLICA_NAME'),
+        'HOST': config('DB_REPLICA_HOST', default=DATABASES['default'].get('HOST', '')),
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default'].get('PORT', '')),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['core.roteadores.RoteadorReplica']
+# Atraso máximo de replicação esperado (s): tempo que o usuário fica no primário
+# após gravar e validade do que for cacheado a partir da réplica
+DB_REPLICA_ATRASO_MAX = config('DB_REPLICA_ATRASO_MAX', default=5, cast=int)
+
+# PRAGMAs aplicados a cada conexão SQLite (core/signals.py). Em WAL os leitores
+# não bloqueiam durante uma importação e vice-versa.
+SQLITE_PRAGMAS = {
+    'journal_mode': config('SQLITE_JOURNAL_MODE', default='WAL'),
+    'synchronous': config('SQLITE_SYNCHRONOUS', default='NORMAL'),
+    'busy_timeout': config('SQLITE_BUSY_TIMEOUT', default=5000, cast=int),  # ms
+    'mmap_size': config('SQLITE_MMAP_SIZE', default=268435456, cast=int),  # bytes
+    'cache_size': config('SQLITE_CACHE_SIZE', default=-65536, cast=int),  # negativo = KiB
+}
+
+# Cache
+# Backends: 'arquivo' (padrão: todos os processos da máquina compartilham o
+# cache, inclusive comandos de gerenciamento e o shell), 'locmem' (um processo
+# só; invalidações feitas por outros processos não chegam a ele) ou 'redis'
+# (requer o pacote redis).
+_CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'farol'),
+    'arquivo': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / 'cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+_cache_backend, _cache_location = _CACHE_BACKENDS[config('CACHE_BACKEND', default='arquivo')]
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': _cache_backend,
+        'LOCATION': config('CACHE_LOCATION', default=_cache_location),
+        # As chaves são versionadas e invalidadas a cada gravação (core/cache.py); a
+        # expiração só limita por quanto tempo um processo que não recebeu a
+        # invalidação (locmem) serve dados antigos. 0 = sem expiração.
+        'TIMEOUT': config('CACHE_TIMEOUT', default=3600, cast=int) or None,
     }
 }
+if not _cache_backend.endswith('RedisCache'):
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=5000, cast=int)}
 
 # Custom user model
 AUTH_USER_MODEL = 'core.Usuario'
@@ -97,6 +179,16 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static', BASE_DIR / 'farol' / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Nomes com hash e versões .gz/.br geradas pelo collectstatic (core/estaticos.py)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'core.estaticos.ArmazenamentoEstatico'},
+}
+# Serve STATIC_ROOT pela aplicação; desligue quando nginx ou uma CDN servir os estáticos
+ESTATICOS_SERVIR = config('ESTATICOS_SERVIR', default=True, cast=bool)
+# Cache, em segundos, dos arquivos com hash no nome (imutáveis)
+ESTATICOS_MAX_AGE = config('ESTATICOS_MAX_AGE', default=31536000, cast=int)
+
 # Media files
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -114,5 +206,44 @@ LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'login'
 
 # Session settings
+SESSION_ENGINE = 'core.sessoes'
 SESSION_COOKIE_AGE = 3600  # 1 hour
 SESSION_SAVE_EVERY_REQUEST = True
+# Só regrava a expiração após essa fração de SESSION_COOKIE_AGE (core/sessoes.py)
+SESSION_GRAVACAO_FRACAO = config('SESSION_GRAVACAO_FRACAO', default=0.25, cast=float)
+
+# Detecção de anomalias na produção (core/anomalias.py)
+PRODUCAO_ANOMALIA_JANELA = config('PRODUCAO_ANOMALIA_JANELA', default=6, cast=int)
+PRODUCAO_ANOMALIA_MINIMO = config('PRODUCAO_ANOMALIA_MINIMO', default=3, cast=int)
+PRODUCAO_ANOMALIA_LIMIAR = config('PRODUCAO_ANOMALIA_LIMIAR', default=3.0, cast=float)
+
+# Segundos após os quais a reserva de um mês por uma importação interrompida é considerada
+# abandonada (core/importacao.py)
+PRODUCAO_IMPORTACAO_TIMEOUT = config('PRODUCAO_IMPORTACAO_TIMEOUT', default=600, cast=int)
+# Importações anteriores (inativas) mantidas por mês pelo comando limpar_importacoes
+PRODUCAO_IMPORTACOES_RETIDAS = config('PRODUCAO_IMPORTACOES_RETIDAS', default=3, cast=int)
+
+# Métricas de tempo, consultas e tamanho por view em /metrics (core/metricas.py)
+METRICAS_ATIVAS = config('METRICAS_ATIVAS', default=True, cast=bool)
+
+# Consultas acima do limiar (ms) são registradas com o plano de execução; 0 desliga
+# (core/consultas_lentas.py)
+CONSULTAS_LENTAS_LIMIAR_MS = config('CONSULTAS_LENTAS_LIMIAR_MS', default=200, cast=int)
+CONSULTAS_LENTAS_MAXIMO = config('CONSULTAS_LENTAS_MAXIMO', default=500, cast=int)
+
+# Perfil sob demanda com ?perfil=1 (ou ?perfil=memoria) para usuários Tier 5; só os
+# PERFIS_RETIDOS mais recentes ficam gravados (core/perfis.py)
+PERFIS_ATIVOS = config('PERFIS_ATIVOS', default=True, cast=bool)
+PERFIS_RETIDOS = config('PERFIS_RETIDOS', default=50, cast=int)
+
+# Compressão gzip (e Brotli, se o pacote brotli estiver instalado) das respostas de
+# texto com ao menos COMPRESSAO_TAMANHO_MINIMO bytes (core/compressao.py)
+COMPRESSAO_ATIVA = config('COMPRESSAO_ATIVA', default=True, cast=bool)
+COMPRESSAO_TIPOS = config(
+    'COMPRESSAO_TIPOS',
+    default='text/html,text/plain,text/csv,text/css,application/json,application/javascript',
+).split(',')
+COMPRESSAO_TAMANHO_MINIMO = config('COMPRESSAO_TAMANHO_MINIMO', default=1024, cast=int)
+COMPRESSAO_NIVEL_GZIP = config('COMPRESSAO_NIVEL_GZIP', default=6, cast=int)
+COMPRESSAO_BROTLI = config('COMPRESSAO_BROTLI', default=True, cast=bool)
+COMPRESSAO_NIVEL_BROTLI = config('COMPRESSAO_NIVEL_BROTLI', default=5, cast=int)